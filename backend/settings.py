@@ -78,6 +78,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'statsapp.request_metrics.RequestMetricsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -164,6 +165,11 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get("DJANGO_FILE_UPLOAD_MAX_MEMORY_
 # Custom auth/session settings
 # Si quieres deshabilitar el cierre por inactividad, deja este valor en None.
 INACTIVITY_TIMEOUT = None
+# La ultima actividad se guarda en memoria por proceso y se escribe en la base como
+# mucho una vez cada USER_ACTIVITY_WRITE_SECONDS por usuario.
+USER_ACTIVITY_WRITE_SECONDS = int(os.environ.get("USER_ACTIVITY_WRITE_SECONDS", 60))
+# Foto de is_active/is_staff por token de acceso; se invalida al guardar el usuario.
+AUTH_USER_CACHE_SECONDS = int(os.environ.get("AUTH_USER_CACHE_SECONDS", 30))
 
 # Facturacion. ARCA_PROVIDER=mock permite probar el flujo completo sin emitir
 # comprobantes reales. Cambiar a un proveedor real solo despues de configurar
@@ -173,6 +179,38 @@ ARCA_DEFAULT_POINT_OF_SALE = int(os.environ.get("ARCA_DEFAULT_POINT_OF_SALE", "0
 ARCA_DEFAULT_VOUCHER_TYPE = int(os.environ.get("ARCA_DEFAULT_VOUCHER_TYPE", "0") or "0")
 GETNET_WEBHOOK_SECRET = os.environ.get("GETNET_WEBHOOK_SECRET", "")
 
+# Metricas por request: cantidad de consultas, tiempo de base y tiempo Python.
+# Los requests que superan alguno de los umbrales se loguean con sus SQL mas repetidos.
+REQUEST_METRICS_ENABLED = os.environ.get("REQUEST_METRICS_ENABLED", "True").lower() == "true"
+REQUEST_METRICS_SLOW_MS = int(os.environ.get("REQUEST_METRICS_SLOW_MS", "1000") or "1000")
+REQUEST_METRICS_SLOW_QUERIES = int(os.environ.get("REQUEST_METRICS_SLOW_QUERIES", "50") or "50")
+REQUEST_METRICS_TOP_SQL = int(os.environ.get("REQUEST_METRICS_TOP_SQL", "5") or "5")
+
+# Sincronizacion incremental de sueldos: segundos que se vuelven a revisar antes
+# de la marca de agua, para no perder filas confirmadas tarde por otra transaccion.
+SALARY_SYNC_OVERLAP_SECONDS = int(os.environ.get("SALARY_SYNC_OVERLAP_SECONDS", "120") or "120")
+# Worker de sueldos (manage.py run_salary_sync --loop): cada cuantos segundos revisa
+# pedidos de las importaciones y antiguedad maxima de la ultima sincronizacion.
+SALARY_SYNC_POLL_SECONDS = float(os.environ.get("SALARY_SYNC_POLL_SECONDS", "5") or "5")
+SALARY_SYNC_MAX_AGE_SECONDS = int(os.environ.get("SALARY_SYNC_MAX_AGE_SECONDS", "300") or "300")
+
+# Worker de eventos externos (manage.py run_external_events --loop): el webhook de Getnet
+# solo encola; el worker aplica los eventos por lotes, con backoff exponencial
+# (EXTERNAL_EVENT_RETRY_SECONDS * 2^intento) hasta EXTERNAL_EVENT_MAX_ATTEMPTS.
+EXTERNAL_EVENT_POLL_SECONDS = float(os.environ.get("EXTERNAL_EVENT_POLL_SECONDS", "2") or "2")
+EXTERNAL_EVENT_BATCH_SIZE = int(os.environ.get("EXTERNAL_EVENT_BATCH_SIZE", "50") or "50")
+EXTERNAL_EVENT_MAX_ATTEMPTS = int(os.environ.get("EXTERNAL_EVENT_MAX_ATTEMPTS", "5") or "5")
+EXTERNAL_EVENT_RETRY_SECONDS = int(os.environ.get("EXTERNAL_EVENT_RETRY_SECONDS", "30") or "30")
+# Cuanto queda reservado un evento tomado por un worker; si el worker se cae, otro lo retoma al vencer.
+EXTERNAL_EVENT_LEASE_SECONDS = int(os.environ.get("EXTERNAL_EVENT_LEASE_SECONDS", "300") or "300")
+# Worker de facturacion de cierre (manage.py run_invoicing_jobs --loop).
+INVOICING_JOBS_POLL_SECONDS = float(os.environ.get("INVOICING_JOBS_POLL_SECONDS", "5") or "5")
+# Un job en curso sin avance en este tiempo se considera abandonado y el worker lo retoma.
+INVOICING_JOB_STALE_SECONDS = int(os.environ.get("INVOICING_JOB_STALE_SECONDS", "900") or "900")
+# Paginacion por cursor de facturas y cobros (?limit= no puede superar el maximo).
+BILLING_LIST_PAGE_SIZE = int(os.environ.get("BILLING_LIST_PAGE_SIZE", "200") or "200")
+BILLING_LIST_MAX_PAGE_SIZE = int(os.environ.get("BILLING_LIST_MAX_PAGE_SIZE", "1000") or "1000")
+
 # Logging a stdout para que los errores (p. ej. fallas del OCR) queden visibles
 # en la consola de Dokploy. Sin esto, los errores manejados no se registran.
 LOGGING = {
@@ -105,6 +105,9 @@ export default function BillingPage() {
   const [summary, setSummary] = useState(null)
   const [invoices, setInvoices] = useState([])
   const [payments, setPayments] = useState([])
+  const [invoicesCursor, setInvoicesCursor] = useState(null)
+  const [paymentsCursor, setPaymentsCursor] = useState(null)
+  const [pageLoading, setPageLoading] = useState(false)
   const [terminals, setTerminals] = useState([])
   const [selectedTerminalId, setSelectedTerminalId] = useState('')
   const [invoiceBranchId, setInvoiceBranchId] = useState('')
@@ -160,8 +163,10 @@ export default function BillingPage() {
       if (!invoicesResp.ok) throw new Error(invoicesData.detail || 'No se pudieron cargar las facturas')
       if (!paymentsResp.ok) throw new Error(paymentsData.detail || 'No se pudieron cargar los pagos')
       setSummary(summaryData)
-      setInvoices(invoicesData || [])
-      setPayments(paymentsData || [])
+      setInvoices(invoicesData.results || [])
+      setInvoicesCursor(invoicesData.next_cursor || null)
+      setPayments(paymentsData.results || [])
+      setPaymentsCursor(paymentsData.next_cursor || null)
     } catch (err) {
       setError(err.message)
     } finally {
@@ -169,6 +174,38 @@ export default function BillingPage() {
     }
   }, [authFetch, queryString])
 
+  const loadMoreInvoices = async () => {
+    if (!invoicesCursor) return
+    setPageLoading(true)
+    try {
+      const resp = await authFetch(`${API_BILLING_INVOICES}?${queryString}&cursor=${encodeURIComponent(invoicesCursor)}`)
+      const data = await resp.json()
+      if (!resp.ok) throw new Error(data.detail || 'No se pudieron cargar las facturas')
+      setInvoices((prev) => [...prev, ...(data.results || [])])
+      setInvoicesCursor(data.next_cursor || null)
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setPageLoading(false)
+    }
+  }
+
+  const loadMorePayments = async () => {
+    if (!paymentsCursor) return
+    setPageLoading(true)
+    try {
+      const resp = await authFetch(`${API_BILLING_PAYMENTS}?${queryString}&cursor=${encodeURIComponent(paymentsCursor)}`)
+      const data = await resp.json()
+      if (!resp.ok) throw new Error(data.detail || 'No se pudieron cargar los pagos')
+      setPayments((prev) => [...prev, ...(data.results || [])])
+      setPaymentsCursor(data.next_cursor || null)
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setPageLoading(false)
+    }
+  }
+
   const loadClients = useCallback(async () => {
     if (branches.length > 1 && !invoiceBranchId) {
       setClients([])
@@ -637,6 +674,11 @@ export default function BillingPage() {
                   )}
                 </TableBody>
               </Table>
+              {invoicesCursor && (
+                <Button sx={{ mt: 1 }} size="small" onClick={loadMoreInvoices} disabled={pageLoading}>
+                  Cargar mas facturas
+                </Button>
+              )}
             </CardContent>
           </Card>
         </Box>
@@ -681,6 +723,11 @@ export default function BillingPage() {
                   )}
                 </TableBody>
               </Table>
+              {paymentsCursor && (
+                <Button sx={{ mt: 1 }} size="small" onClick={loadMorePayments} disabled={pageLoading}>
+                  Cargar mas cobros
+                </Button>
+              )}
             </CardContent>
           </Card>
         </Box>
@@ -52,6 +52,7 @@ Chart.register(ArcElement, BarElement, CategoryScale, LinearScale, ChartTooltip,
 
 const API_SALARIES_SUMMARY = `${API_BASE}/salaries/summary/`
 const API_SALARIES_MONTHLY = `${API_BASE}/salaries/monthly/`
+const API_SALARIES_MOVEMENTS = `${API_BASE}/salaries/movements/`
 const API_SALARIES_AGUINALDO = `${API_BASE}/salaries/aguinaldo/`
 const API_ACCOUNT_DEDUCTIONS_CONFIRM = `${API_BASE}/salaries/account-deductions/confirm/`
 const API_EMPLOYEES = `${API_BASE}/salaries/employees/`
@@ -239,6 +240,9 @@ export default function SalariesPage() {
   const [movementSource, setMovementSource] = useState('all')
   const [movementPage, setMovementPage] = useState(0)
   const [movementRowsPerPage, setMovementRowsPerPage] = useState(10)
+  const [movementQuery, setMovementQuery] = useState('')
+  const [movementsPage, setMovementsPage] = useState(null)
+  const [movementsLoading, setMovementsLoading] = useState(false)
   const [employeeForm, setEmployeeForm] = useState(emptyEmployeeForm)
   const [employeeStatusFilter, setEmployeeStatusFilter] = useState('active')
   const [editEmployee, setEditEmployee] = useState(null)
@@ -252,6 +256,7 @@ export default function SalariesPage() {
   })
   const [deductionDialog, setDeductionDialog] = useState({ open: false, row: null })
   const accountSearchTimer = useRef(null)
+  const movementsRequest = useRef(0)
 
   const defaultBranchId = useMemo(() => {
     const primary = branches.find((branch) => branch.slug === 'sucursal-primaria') || branches[0]
@@ -279,6 +284,29 @@ export default function SalariesPage() {
     }
   }, [authFetch, queryString])
 
+  // La tabla pide cada pagina al backend con los filtros, asi busca en todo el mes y no solo en lo cargado.
+  const fetchMovements = useCallback(async () => {
+    const requestId = movementsRequest.current + 1
+    movementsRequest.current = requestId
+    const params = new URLSearchParams(queryString)
+    params.set('limit', String(movementRowsPerPage))
+    params.set('offset', String(movementPage * movementRowsPerPage))
+    if (movementQuery) params.set('search', movementQuery)
+    if (movementEmployee !== 'all') params.set('employee_id', movementEmployee)
+    if (movementSource !== 'all') params.set('source', movementSource)
+    setMovementsLoading(true)
+    try {
+      const resp = await authFetch(`${API_SALARIES_MOVEMENTS}?${params.toString()}`)
+      const data = await resp.json()
+      if (!resp.ok) throw new Error(data.detail || 'No se pudieron cargar los movimientos')
+      if (movementsRequest.current === requestId) setMovementsPage(data)
+    } catch (err) {
+      if (movementsRequest.current === requestId) setError(err.message)
+    } finally {
+      if (movementsRequest.current === requestId) setMovementsLoading(false)
+    }
+  }, [authFetch, movementEmployee, movementPage, movementQuery, movementRowsPerPage, movementSource, queryString])
+
   const fetchMonthlySummary = useCallback(async () => {
     setMonthlyLoading(true)
     setError('')
@@ -381,6 +409,15 @@ export default function SalariesPage() {
     if (accountSearchTimer.current) clearTimeout(accountSearchTimer.current)
   }, [])
 
+  useEffect(() => {
+    const timer = setTimeout(() => setMovementQuery(movementSearch.trim()), 300)
+    return () => clearTimeout(timer)
+  }, [movementSearch])
+
+  useEffect(() => {
+    if (summary) fetchMovements()
+  }, [fetchMovements, summary])
+
   useEffect(() => {
     const loadedBranchId = String(monthlySummary?.branch_id || '')
     if (employeeView === 'monthly' && (monthlySummary?.year !== Number(year) || loadedBranchId !== branchId)) fetchMonthlySummary()
@@ -590,7 +627,8 @@ export default function SalariesPage() {
   }
 
   const totals = summary?.totals || {}
-  const movements = summary?.movements || []
+  const movements = movementsPage?.results || []
+  const periodMovementsCount = summary?.movements_page?.count ?? 0
   const employeeRows = summary?.employees || []
   const accountDeductions = summary?.account_deductions || {}
   const accountDeductionRows = accountDeductions.employees || []
@@ -630,7 +668,7 @@ export default function SalariesPage() {
 
   useEffect(() => {
     setMovementPage(0)
-  }, [movementSearch, movementEmployee, movementSource, movementRowsPerPage, movements])
+  }, [movementQuery, movementEmployee, movementSource, movementRowsPerPage, queryString])
 
   useEffect(() => {
     setMovementEmployee('all')
@@ -638,26 +676,12 @@ export default function SalariesPage() {
   }, [branchId])
 
   const selectedEmployee = displayedEmployeeRows.find((row) => row.employee_id === selectedEmployeeId) || null
-  const movementEmployeeOptions = useMemo(() => {
-    const options = new Map()
-    movements.forEach((movement) => options.set(movement.employee_id, movement.employee_name))
-    return [...options.entries()].map(([id, name]) => ({ id, name })).sort((a, b) => a.name.localeCompare(b.name, 'es'))
-  }, [movements])
-  const filteredMovements = useMemo(() => {
-    const search = movementSearch.trim().toLocaleLowerCase('es')
-    return movements.filter((movement) => {
-      if (movementEmployee !== 'all' && movement.employee_id !== movementEmployee) return false
-      if (movementSource !== 'all' && movement.source !== movementSource) return false
-      if (!search) return true
-      return [movement.date, movement.employee_name, movement.source_label, movement.description]
-        .filter(Boolean)
-        .some((value) => String(value).toLocaleLowerCase('es').includes(search))
-    })
-  }, [movementEmployee, movementSearch, movementSource, movements])
-  const paginatedMovements = useMemo(() => {
-    const start = movementPage * movementRowsPerPage
-    return filteredMovements.slice(start, start + movementRowsPerPage)
-  }, [filteredMovements, movementPage, movementRowsPerPage])
+  const movementEmployeeOptions = useMemo(() => (
+    employeeRows
+      .map((row) => ({ id: row.employee_id, name: row.employee_name }))
+      .sort((a, b) => a.name.localeCompare(b.name, 'es'))
+  ), [employeeRows])
+  const filteredMovementsCount = movementsPage?.count ?? 0
 
   const compositionChartData = useMemo(() => ({
     labels: Object.keys(CHART_LABELS).map((source) => CHART_LABELS[source]),
@@ -1047,10 +1071,10 @@ export default function SalariesPage() {
             <Stack direction={{ xs: 'column', sm: 'row' }} justifyContent="space-between" alignItems={{ xs: 'flex-start', sm: 'baseline' }} spacing={0.5}>
               <Typography variant="h6" fontWeight={700}>Movimientos detectados</Typography>
               <Typography variant="caption" color="text.secondary">
-                {filteredMovements.length} de {movements.length} movimientos
+                {filteredMovementsCount} de {periodMovementsCount} movimientos
               </Typography>
             </Stack>
-            {movements.length > 0 && <Box sx={{ display: 'grid', gridTemplateColumns: { xs: '1fr', sm: 'minmax(180px, 1fr) minmax(150px, 0.7fr) minmax(150px, 0.7fr)' }, gap: 1.5, mt: 2 }}>
+            {periodMovementsCount > 0 && <Box sx={{ display: 'grid', gridTemplateColumns: { xs: '1fr', sm: 'minmax(180px, 1fr) minmax(150px, 0.7fr) minmax(150px, 0.7fr)' }, gap: 1.5, mt: 2 }}>
               <TextField
                 size="small"
                 label="Buscar movimiento"
@@ -1089,7 +1113,7 @@ export default function SalariesPage() {
               </FormControl>
             </Box>}
             <Divider sx={{ my: 2 }} />
-            {paginatedMovements.length ? (
+            {movements.length ? (
               <TableContainer sx={{ maxHeight: 560 }}>
                 <Table stickyHeader size="small" sx={{ minWidth: 820 }}>
                   <TableHead>
@@ -1102,7 +1126,7 @@ export default function SalariesPage() {
                     </TableRow>
                   </TableHead>
                   <TableBody>
-                    {paginatedMovements.map((movement) => (
+                    {movements.map((movement) => (
                       <TableRow key={movement.id} hover>
                       <TableCell sx={{ whiteSpace: 'nowrap' }}>{formatDate(movement.date)}</TableCell>
                       <TableCell>{movement.employee_name}</TableCell>
@@ -1127,11 +1151,11 @@ export default function SalariesPage() {
               <EmptyState
                 icon={PointOfSaleIcon}
                 testId="movements-empty"
-                title={movements.length ? 'Sin resultados' : `Sin movimientos en ${MONTHS[Number(month) - 1]?.label.toLocaleLowerCase('es')}`}
-                description={movements.length
+                title={periodMovementsCount ? (movementsLoading ? 'Buscando movimientos' : 'Sin resultados') : `Sin movimientos en ${MONTHS[Number(month) - 1]?.label.toLocaleLowerCase('es')}`}
+                description={periodMovementsCount
                   ? 'Los filtros actuales no coinciden con ningun movimiento detectado.'
                   : 'No se detectaron movimientos de empleados para este periodo.'}
-                action={movements.length ? (
+                action={periodMovementsCount ? (
                   <Button
                     size="small"
                     variant="outlined"
@@ -1146,9 +1170,9 @@ export default function SalariesPage() {
                 ) : null}
               />
             )}
-            {filteredMovements.length > 0 && <TablePagination
+            {filteredMovementsCount > 0 && <TablePagination
               component="div"
-              count={filteredMovements.length}
+              count={filteredMovementsCount}
               page={movementPage}
               onPageChange={(_event, page) => setMovementPage(page)}
               rowsPerPage={movementRowsPerPage}
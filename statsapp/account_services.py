@@ -0,0 +1,131 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When
+
+from .models import AccountClient, AccountClientBranchBalance, AccountTransaction
+
+
+OPEN_TRANSACTION = Q(original_amount__gt=F('paid_amount'))
+
+
+def _pending_sum():
+    pending_expr = ExpressionWrapper(
+        F('original_amount') - F('paid_amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    return Sum(
+        Case(
+            When(OPEN_TRANSACTION, then=pending_expr),
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+    )
+
+
+def balance_aggregates():
+    return {
+        'original': Sum('original_amount'),
+        'paid': Sum('paid_amount'),
+        'pending': _pending_sum(),
+        'transactions': Count('id'),
+        'pending_count': Count('id', filter=OPEN_TRANSACTION),
+        'overdue': Count('id', filter=OPEN_TRANSACTION & Q(status=AccountTransaction.Status.OVERDUE)),
+        'partial': Count('id', filter=OPEN_TRANSACTION & Q(status=AccountTransaction.Status.PARTIAL)),
+    }
+
+
+def client_status_for(pending, overdue, partial):
+    if not pending or pending <= Decimal('0'):
+        return AccountClient.Status.PAID
+    if overdue:
+        return AccountClient.Status.OVERDUE
+    if partial:
+        return AccountClient.Status.PARTIAL
+    return AccountClient.Status.ACTIVE
+
+
+def refresh_branch_balances(client_ids=None):
+    """Recalcula los saldos (cliente, sucursal) de los clientes indicados, o de todos si client_ids es None."""
+    qs = AccountTransaction.objects.filter(branch__isnull=False)
+    stale = AccountClientBranchBalance.objects.all()
+    if client_ids is not None:
+        client_ids = list(client_ids)
+        if not client_ids:
+            return 0
+        qs = qs.filter(client_id__in=client_ids)
+        stale = stale.filter(client_id__in=client_ids)
+
+    rows = qs.values('client_id', 'branch_id').annotate(**balance_aggregates()).order_by()
+    balances = [
+        AccountClientBranchBalance(
+            client_id=row['client_id'],
+            branch_id=row['branch_id'],
+            total_debt=row['pending'] or Decimal('0'),
+            status=client_status_for(row['pending'], row['overdue'], row['partial']),
+            original_amount=row['original'] or Decimal('0'),
+            paid_amount=row['paid'] or Decimal('0'),
+            transactions_count=row['transactions'],
+            pending_count=row['pending_count'],
+            overdue_count=row['overdue'],
+            partial_count=row['partial'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        stale.delete()
+        AccountClientBranchBalance.objects.bulk_create(balances, batch_size=1000)
+    return len(balances)
+
+
+@transaction.atomic
+def recalc_account_totals(client_ids=None):
+    """Recalcula deuda y estado de los clientes (global y por sucursal) con consultas agrupadas."""
+    if client_ids is not None:
+        client_ids = set(client_ids)
+        if not client_ids:
+            return
+    qs = AccountTransaction.objects.all()
+    if client_ids is not None:
+        qs = qs.filter(client_id__in=client_ids)
+
+    updates = []
+    for row in qs.values('client_id').annotate(**balance_aggregates()).order_by():
+        updates.append(AccountClient(
+            id=row['client_id'],
+            total_debt=row['pending'] or Decimal('0'),
+            status=client_status_for(row['pending'], row['overdue'], row['partial']),
+        ))
+    if updates:
+        AccountClient.objects.bulk_update(updates, ['total_debt', 'status'], batch_size=500)
+
+    updated_ids = {str(client.id) for client in updates}
+    if client_ids is None:
+        remaining_qs = AccountClient.objects.filter(transactions__isnull=True)
+    else:
+        remaining_qs = AccountClient.objects.filter(
+            id__in=[client_id for client_id in client_ids if str(client_id) not in updated_ids]
+        )
+    remaining_qs.exclude(total_debt=Decimal('0'), status=AccountClient.Status.PAID).update(
+        total_debt=Decimal('0'),
+        status=AccountClient.Status.PAID,
+    )
+
+    refresh_branch_balances(client_ids)
+
+
+def branch_balance_totals(client, branch_id):
+    """Totales del cliente en una sucursal desde la tabla materializada (None si aun no fue calculada)."""
+    balance = (
+        AccountClientBranchBalance.objects
+        .filter(client=client, branch_id=branch_id)
+        .only('original_amount', 'paid_amount', 'total_debt')
+        .first()
+    )
+    if balance is None:
+        return None
+    return {
+        'original': float(balance.original_amount),
+        'paid': float(balance.paid_amount),
+        'remaining': float(balance.total_debt),
+    }
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from threading import Lock
 
 from django.conf import settings
 from django.utils import timezone
@@ -7,6 +8,11 @@ from rest_framework.exceptions import AuthenticationFailed
 from .models import UserActivity
 
 
+_ACTIVITY_LOCK = Lock()
+# user_id -> (ultima actividad vista en este proceso, ultima escritura en la base)
+_ACTIVITY_CACHE = {}
+
+
 def _get_inactivity_limit():
     """
     Inactividad deshabilitada: siempre devuelve None para evitar cierre de sesión automático.
@@ -14,22 +20,43 @@ def _get_inactivity_limit():
     return None
 
 
-def touch_user_activity(user, *, enforce_timeout=False):
+def _write_granularity():
+    return timedelta(seconds=getattr(settings, 'USER_ACTIVITY_WRITE_SECONDS', 60))
+
+
+def reset_activity_cache():
+    with _ACTIVITY_LOCK:
+        _ACTIVITY_CACHE.clear()
+
+
+def touch_user_activity(user, *, enforce_timeout=False, force=False):
     """
     Update the user's last_activity timestamp.
+    The last-seen time is kept per process and only written to UserActivity when the
+    stored value is older than USER_ACTIVITY_WRITE_SECONDS (or when force is True).
     When enforce_timeout is True, the function raises AuthenticationFailed if
-    the stored timestamp is older than the inactivity limit.
+    the last activity is older than the inactivity limit.
     """
     if not user or not getattr(user, 'is_authenticated', False):
         return
 
     now = timezone.now()
-    activity, _ = UserActivity.objects.get_or_create(user=user, defaults={'last_activity': now})
-    limit = _get_inactivity_limit()
+    with _ACTIVITY_LOCK:
+        seen, written = _ACTIVITY_CACHE.get(user.pk, (None, None))
 
-    if enforce_timeout and limit and activity.last_activity and now - activity.last_activity > limit:
-        raise AuthenticationFailed('Sesión expirada por inactividad')
-
-    if activity.last_activity != now:
-        activity.last_activity = now
-        activity.save(update_fields=['last_activity'])
+    limit = _get_inactivity_limit()
+    if enforce_timeout and limit:
+        if seen is None or now - seen > limit:
+            # Otro proceso pudo registrar actividad mas reciente: se confirma contra la base antes de cortar.
+            stored = UserActivity.objects.filter(user=user).values_list('last_activity', flat=True).first()
+            seen = max((value for value in (seen, stored) if value), default=None)
+            written = stored
+        if seen and now - seen > limit:
+            raise AuthenticationFailed('Sesión expirada por inactividad')
+
+    if force or written is None or now - written >= _write_granularity():
+        if not UserActivity.objects.filter(user=user).update(last_activity=now, updated_at=now):
+            UserActivity.objects.get_or_create(user=user, defaults={'last_activity': now})
+        written = now
+    with _ACTIVITY_LOCK:
+        _ACTIVITY_CACHE[user.pk] = (now, written)
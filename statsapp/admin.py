@@ -7,7 +7,9 @@ from .models import (
     BankUploadBatch,
     BankTransaction,
     AccountClient,
+    AccountClientBranchBalance,
     AccountTransaction,
+    AccountInvoicingJob,
     ExternalEvent,
     GetnetTerminal,
     Employee,
@@ -17,7 +19,11 @@ from .models import (
     InvoiceAccountTransaction,
     InvoiceLine,
     Payment,
+    SalarySyncState,
+    VoucherSequence,
 )
+from .search import search_filter
+from .vales_services import refresh_client_vale_search
 
 
 @admin.register(Branch)
@@ -59,6 +65,10 @@ class BankTransactionAdmin(admin.ModelAdmin):
     search_fields = ('concept', 'description')
     autocomplete_fields = ('batch',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Usa el indice de texto (GIN/FTS5) en lugar de icontains sobre concept/description.
+        return search_filter(queryset, search_term), False
+
 
 @admin.register(AccountClient)
 class AccountClientAdmin(admin.ModelAdmin):
@@ -67,6 +77,22 @@ class AccountClientAdmin(admin.ModelAdmin):
     search_fields = ('first_name', 'last_name', 'external_id')
     ordering = ('last_name', 'first_name')
 
+    def get_search_results(self, request, queryset, search_term):
+        return search_filter(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and {'first_name', 'last_name'} & set(form.changed_data):
+            refresh_client_vale_search([obj.pk])
+
+
+@admin.register(AccountClientBranchBalance)
+class AccountClientBranchBalanceAdmin(admin.ModelAdmin):
+    list_display = ('client', 'branch', 'status', 'total_debt', 'pending_count', 'overdue_count', 'updated_at')
+    list_filter = ('branch', 'status')
+    search_fields = ('client__first_name', 'client__last_name', 'client__external_id')
+    readonly_fields = [field.name for field in AccountClientBranchBalance._meta.fields]
+
 
 @admin.register(AccountTransaction)
 class AccountTransactionAdmin(admin.ModelAdmin):
@@ -92,6 +118,19 @@ class InvoiceAdmin(admin.ModelAdmin):
     date_hierarchy = 'issue_date'
 
 
+@admin.register(AccountInvoicingJob)
+class AccountInvoicingJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'period_end', 'branch', 'status', 'processed_groups', 'total_groups', 'invoices_created', 'created_at')
+    list_filter = ('status', 'branch')
+    date_hierarchy = 'period_end'
+
+
+@admin.register(VoucherSequence)
+class VoucherSequenceAdmin(admin.ModelAdmin):
+    list_display = ('point_of_sale', 'voucher_type', 'last_number', 'updated_at')
+    ordering = ('point_of_sale', 'voucher_type')
+
+
 @admin.register(InvoiceAccountTransaction)
 class InvoiceAccountTransactionAdmin(admin.ModelAdmin):
     list_display = ('invoice', 'transaction', 'amount', 'created_at')
@@ -116,7 +155,7 @@ class GetnetTerminalAdmin(admin.ModelAdmin):
 
 @admin.register(ExternalEvent)
 class ExternalEventAdmin(admin.ModelAdmin):
-    list_display = ('provider', 'event_id', 'event_type', 'status', 'created_at', 'processed_at')
+    list_display = ('provider', 'event_id', 'event_type', 'status', 'attempts', 'next_attempt_at', 'created_at', 'processed_at')
     list_filter = ('provider', 'event_type', 'status')
     search_fields = ('event_id', 'event_type')
 
@@ -141,3 +180,9 @@ class EmployeeMovementAdmin(admin.ModelAdmin):
     list_filter = ('source', 'status', 'date')
     search_fields = ('employee__name', 'description', 'matched_alias')
     autocomplete_fields = ('employee', 'bank_transaction', 'account_transaction')
+
+
+@admin.register(SalarySyncState)
+class SalarySyncStateAdmin(admin.ModelAdmin):
+    list_display = ('source', 'last_id', 'last_updated_at', 'rows_scanned', 'synced_at')
+    readonly_fields = [field.name for field in SalarySyncState._meta.fields]
@@ -1,7 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _install_sqlite_search(sender, using, **kwargs):
+    from django.db import connections
+
+    from .search import install_sqlite_search
+
+    # SQLite rehace las tablas al alterarlas y pierde los triggers FTS: se recrean despues de cada migrate.
+    install_sqlite_search(connections[using])
 
 
 class StatsappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'statsapp'
 
+    def ready(self):
+        from . import auth_cache  # noqa: F401 - registra la invalidacion por signals
+
+        post_migrate.connect(_install_sqlite_search, sender=self)
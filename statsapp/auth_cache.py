@@ -0,0 +1,69 @@
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+_USER_CACHE_LOCK = Lock()
+# (user_id, jti) -> (vencimiento, valores del usuario sin password)
+_USER_CACHE = {}
+_MAX_ENTRIES = 2000
+
+
+def _ttl():
+    return getattr(settings, 'AUTH_USER_CACHE_SECONDS', 30)
+
+
+def _snapshot_fields(user_model):
+    return [field.attname for field in user_model._meta.concrete_fields if field.attname != 'password']
+
+
+def cached_token_user(user_model, user_id, jti):
+    """Usuario reconstruido desde la foto en memoria del token, o None si no esta o vencio."""
+    key = (str(user_id), jti)
+    with _USER_CACHE_LOCK:
+        entry = _USER_CACHE.get(key)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if expires_at <= monotonic():
+            del _USER_CACHE[key]
+            return None
+    # Los campos no guardados (password) quedan diferidos y se cargan solo si alguien los usa.
+    return user_model.from_db('default', _snapshot_fields(user_model), values)
+
+
+def remember_token_user(user, jti):
+    ttl = _ttl()
+    if ttl <= 0:
+        return
+    values = [getattr(user, attname) for attname in _snapshot_fields(type(user))]
+    now = monotonic()
+    with _USER_CACHE_LOCK:
+        if len(_USER_CACHE) >= _MAX_ENTRIES:
+            for key in [key for key, (expires_at, _) in _USER_CACHE.items() if expires_at <= now]:
+                del _USER_CACHE[key]
+            if len(_USER_CACHE) >= _MAX_ENTRIES:
+                _USER_CACHE.clear()
+        _USER_CACHE[(str(user.pk), jti)] = (now + ttl, values)
+
+
+def forget_user(user_id):
+    user_id = str(user_id)
+    with _USER_CACHE_LOCK:
+        for key in [key for key in _USER_CACHE if key[0] == user_id]:
+            del _USER_CACHE[key]
+
+
+def reset_auth_user_cache():
+    with _USER_CACHE_LOCK:
+        _USER_CACHE.clear()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def _invalidate_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
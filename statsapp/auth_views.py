@@ -50,7 +50,7 @@ class StaffTokenObtainPairSerializer(TokenObtainPairSerializer):
         data = super().validate(attrs)
         if not self.user.is_staff:
             raise AuthenticationFailed('No autorizado', code='authorization')
-        touch_user_activity(self.user)
+        touch_user_activity(self.user, force=True)
         data['user'] = _user_payload(self.user)
         return data
 
@@ -1,11 +1,15 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
 
 from .activity import touch_user_activity
+from .auth_cache import cached_token_user, remember_token_user
 
 
 class InactivityJWTAuthentication(JWTAuthentication):
     """
     Extends the default JWT authentication to enforce inactivity timeouts.
+    Users are resolved from a short-lived per-token snapshot (see auth_cache)
+    so repeated calls with the same access token skip the user query.
     """
 
     def authenticate(self, request):
@@ -15,3 +19,15 @@ class InactivityJWTAuthentication(JWTAuthentication):
         user, token = result
         touch_user_activity(user, enforce_timeout=True)
         return (user, token)
+
+    def get_user(self, validated_token):
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        # CHECK_REVOKE_TOKEN compara el hash del password: requiere la fila completa.
+        if not jti or user_id is None or getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+            return super().get_user(validated_token)
+        user = cached_token_user(self.user_model, user_id, jti)
+        if user is None:
+            user = super().get_user(validated_token)
+            remember_token_user(user, jti)
+        return user
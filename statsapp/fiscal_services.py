@@ -1,17 +1,20 @@
 import hashlib
 import hmac
 import json
-from datetime import timedelta
+from collections import defaultdict
+from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from django.conf import settings
 from django.db import transaction as db_transaction
-from django.db.models import F, Q, Sum
+from django.db.models import Count, F, Max, Q, Sum
 from django.utils import timezone
 
 from .models import (
     AccountClient,
+    AccountInvoicingJob,
+    AccountClientBranchBalance,
     AccountTransaction,
     BankTransaction,
     ExternalEvent,
@@ -19,7 +22,9 @@ from .models import (
     InvoiceAccountTransaction,
     InvoiceLine,
     Payment,
+    VoucherSequence,
 )
+from .account_services import branch_balance_totals
 
 
 GETNET_APPROVED_STATUSES = {
@@ -128,6 +133,163 @@ def payment_payload(payment):
     }
 
 
+def _client_display_name(first_name, last_name, external_id):
+    if first_name and last_name:
+        return f"{last_name}, {first_name}"
+    return last_name or first_name or external_id or ''
+
+
+_INVOICE_LIST_FIELDS = (
+    'id',
+    'client_id',
+    'client__first_name',
+    'client__last_name',
+    'client__external_id',
+    'branch_id',
+    'branch__name',
+    'source',
+    'status',
+    'issue_date',
+    'point_of_sale',
+    'voucher_type',
+    'voucher_number',
+    'total_amount',
+    'net_amount',
+    'vat_amount',
+    'cae',
+    'cae_due_date',
+    'external_reference',
+    'error_message',
+    'created_at',
+)
+_PAYMENT_LIST_FIELDS = (
+    'id',
+    'source',
+    'status',
+    'date',
+    'amount',
+    'external_id',
+    'provider_status',
+    'terminal_id',
+    'terminal__code',
+    'branch_id',
+    'branch__name',
+    'client_id',
+    'client__first_name',
+    'client__last_name',
+    'client__external_id',
+    'invoice_id',
+    'created_at',
+)
+
+
+def invoice_row_payload(row):
+    """Igual que invoice_payload(include_lines=False) pero desde .values(), para listados."""
+    return {
+        'id': str(row['id']),
+        'client_id': str(row['client_id']) if row['client_id'] else None,
+        'client_name': _client_display_name(
+            row['client__first_name'],
+            row['client__last_name'],
+            row['client__external_id'],
+        ) if row['client_id'] else '',
+        'branch': {
+            'id': row['branch_id'],
+            'name': row['branch__name'],
+        } if row['branch_id'] else None,
+        'source': row['source'],
+        'source_label': Invoice.Source(row['source']).label,
+        'status': row['status'],
+        'status_label': Invoice.Status(row['status']).label,
+        'issue_date': row['issue_date'].isoformat() if row['issue_date'] else None,
+        'point_of_sale': row['point_of_sale'],
+        'voucher_type': row['voucher_type'],
+        'voucher_number': row['voucher_number'],
+        'total_amount': float(row['total_amount'] or 0),
+        'net_amount': float(row['net_amount'] or 0),
+        'vat_amount': float(row['vat_amount'] or 0),
+        'cae': row['cae'],
+        'cae_due_date': row['cae_due_date'].isoformat() if row['cae_due_date'] else None,
+        'external_reference': row['external_reference'],
+        'error_message': row['error_message'],
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+    }
+
+
+def payment_row_payload(row):
+    """Igual que payment_payload pero desde .values(), para listados."""
+    return {
+        'id': str(row['id']),
+        'source': row['source'],
+        'source_label': Payment.Source(row['source']).label,
+        'status': row['status'],
+        'status_label': Payment.Status(row['status']).label,
+        'date': row['date'].isoformat() if row['date'] else None,
+        'amount': float(row['amount'] or 0),
+        'external_id': row['external_id'],
+        'provider_status': row['provider_status'],
+        'terminal': {
+            'id': row['terminal_id'],
+            'code': row['terminal__code'],
+        } if row['terminal_id'] else None,
+        'branch': {
+            'id': row['branch_id'],
+            'name': row['branch__name'],
+        } if row['branch_id'] else None,
+        'client_id': str(row['client_id']) if row['client_id'] else None,
+        'client_name': _client_display_name(
+            row['client__first_name'],
+            row['client__last_name'],
+            row['client__external_id'],
+        ) if row['client_id'] else '',
+        'invoice_id': str(row['invoice_id']) if row['invoice_id'] else None,
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+    }
+
+
+def _encode_cursor(row_date, row_id):
+    return f'{row_date.isoformat()}.{row_id}'
+
+
+def _decode_cursor(cursor):
+    try:
+        raw_date, raw_id = str(cursor).split('.', 1)
+        return date.fromisoformat(raw_date), UUID(raw_id)
+    except ValueError as exc:
+        raise FiscalError('Cursor de paginacion invalido') from exc
+
+
+def _keyset_page(queryset, date_field, fields, serializer, cursor=None, limit=None):
+    """
+    Pagina por (fecha, id) descendente: cada pagina filtra despues del ultimo par visto, asi el
+    costo no crece con la profundidad y no se saltean ni repiten filas entre paginas.
+    """
+    max_limit = getattr(settings, 'BILLING_LIST_MAX_PAGE_SIZE', 1000)
+    limit = min(max(limit or getattr(settings, 'BILLING_LIST_PAGE_SIZE', 200), 1), max_limit)
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__lt': cursor_date})
+            | Q(**{date_field: cursor_date, 'id__lt': cursor_id})
+        )
+    rows = list(queryset.order_by(f'-{date_field}', '-id').values(*fields)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'results': [serializer(row) for row in rows],
+        'limit': limit,
+        'next_cursor': _encode_cursor(rows[-1][date_field], rows[-1]['id']) if has_more else None,
+    }
+
+
+def invoices_page(queryset, cursor=None, limit=None):
+    return _keyset_page(queryset, 'issue_date', _INVOICE_LIST_FIELDS, invoice_row_payload, cursor=cursor, limit=limit)
+
+
+def payments_page(queryset, cursor=None, limit=None):
+    return _keyset_page(queryset, 'date', _PAYMENT_LIST_FIELDS, payment_row_payload, cursor=cursor, limit=limit)
+
+
 def _transaction_remaining_expr():
     return Q(original_amount__gt=F('paid_amount'))
 
@@ -146,12 +308,14 @@ def pending_account_transactions(client, branch=None):
 def account_invoice_preview(client, branch=None):
     transactions = list(pending_account_transactions(client, branch=branch).select_related('branch'))
     total = sum((tx.remaining_amount for tx in transactions), Decimal('0'))
+    branch_totals = branch_balance_totals(client, branch.id) if branch else None
     return {
         'client': {
             'id': str(client.id),
             'name': client.full_name,
             'external_id': client.external_id,
             'total_debt': float(client.total_debt or 0),
+            'branch_total_debt': branch_totals['remaining'] if branch_totals else None,
         },
         'branch': {
             'id': branch.id,
@@ -185,6 +349,41 @@ def _default_voucher_type():
     return int(getattr(settings, 'ARCA_DEFAULT_VOUCHER_TYPE', 0) or 0)
 
 
+def _build_account_invoice(client, txs, branch, created_by=None):
+    """Factura borrador con sus lineas y vinculos, sin guardar, por el saldo de txs."""
+    total = sum((tx.remaining_amount for tx in txs), Decimal('0'))
+    invoice = Invoice(
+        client=client,
+        branch=branch,
+        source=Invoice.Source.ACCOUNT,
+        status=Invoice.Status.DRAFT,
+        point_of_sale=_default_point_of_sale(),
+        voucher_type=_default_voucher_type(),
+        net_amount=total,
+        total_amount=total,
+        idempotency_key=f"account:{client.id}:{uuid4().hex}",
+        meta={
+            'created_by': getattr(created_by, 'username', '') if created_by else '',
+            'branch_id': branch.id if branch else None,
+        },
+    )
+    lines = []
+    links = []
+    for tx in txs:
+        amount = tx.remaining_amount
+        description = tx.description or f"Cuenta corriente {tx.date.isoformat() if tx.date else tx.external_id}"
+        lines.append(InvoiceLine(
+            invoice=invoice,
+            description=description[:255],
+            quantity=Decimal('1'),
+            unit_price=amount,
+            total=amount,
+            account_transaction=tx,
+        ))
+        links.append(InvoiceAccountTransaction(invoice=invoice, transaction=tx, amount=amount))
+    return invoice, lines, links
+
+
 def create_account_invoice(client, transaction_ids, authorize=False, created_by=None, branch=None):
     if not transaction_ids:
         raise FiscalError('Selecciona al menos un movimiento para facturar')
@@ -208,41 +407,11 @@ def create_account_invoice(client, transaction_ids, authorize=False, created_by=
         if invoice_branch is None and txs and txs[0].branch_id:
             invoice_branch = txs[0].branch
 
-        total = sum((tx.remaining_amount for tx in txs), Decimal('0'))
-        if total <= Decimal('0'):
+        invoice, lines, links = _build_account_invoice(client, txs, invoice_branch, created_by=created_by)
+        if invoice.total_amount <= Decimal('0'):
             raise FiscalError('No hay saldo pendiente para facturar')
 
-        invoice = Invoice.objects.create(
-            client=client,
-            branch=invoice_branch,
-            source=Invoice.Source.ACCOUNT,
-            status=Invoice.Status.DRAFT,
-            point_of_sale=_default_point_of_sale(),
-            voucher_type=_default_voucher_type(),
-            net_amount=total,
-            total_amount=total,
-            idempotency_key=f"account:{client.id}:{uuid4().hex}",
-            meta={
-                'created_by': getattr(created_by, 'username', '') if created_by else '',
-                'branch_id': invoice_branch.id if invoice_branch else None,
-            },
-        )
-
-        lines = []
-        links = []
-        for tx in txs:
-            amount = tx.remaining_amount
-            description = tx.description or f"Cuenta corriente {tx.date.isoformat() if tx.date else tx.external_id}"
-            lines.append(InvoiceLine(
-                invoice=invoice,
-                description=description[:255],
-                quantity=Decimal('1'),
-                unit_price=amount,
-                total=amount,
-                account_transaction=tx,
-            ))
-            links.append(InvoiceAccountTransaction(invoice=invoice, transaction=tx, amount=amount))
-
+        invoice.save(force_insert=True)
         InvoiceLine.objects.bulk_create(lines)
         InvoiceAccountTransaction.objects.bulk_create(links)
 
@@ -251,23 +420,51 @@ def create_account_invoice(client, transaction_ids, authorize=False, created_by=
         return invoice
 
 
-def _next_mock_voucher_number(invoice):
-    latest = (
-        Invoice.objects
-        .filter(point_of_sale=invoice.point_of_sale, voucher_type=invoice.voucher_type, voucher_number__isnull=False)
-        .exclude(pk=invoice.pk)
-        .order_by('-voucher_number')
-        .first()
-    )
-    return (latest.voucher_number if latest else 0) + 1
-
-
-def authorize_invoice(invoice):
-    if invoice.status == Invoice.Status.AUTHORIZED:
-        return invoice
-    if invoice.total_amount <= Decimal('0'):
-        raise FiscalError('La factura debe tener importe mayor a cero')
-
+def _locked_voucher_sequence(point_of_sale, voucher_type):
+    key = {'point_of_sale': point_of_sale, 'voucher_type': voucher_type}
+    sequence = VoucherSequence.objects.select_for_update().filter(**key).first()
+    if sequence is None:
+        # Primera numeracion del par: arranca desde el ultimo comprobante ya emitido.
+        # ignore_conflicts evita el IntegrityError si otro proceso la crea al mismo tiempo.
+        last_number = (
+            Invoice.objects
+            .filter(voucher_number__isnull=False, **key)
+            .aggregate(last=Max('voucher_number'))['last']
+        ) or 0
+        VoucherSequence.objects.bulk_create([VoucherSequence(last_number=last_number, **key)], ignore_conflicts=True)
+        sequence = VoucherSequence.objects.select_for_update().get(**key)
+    return sequence
+
+
+def reserve_voucher_numbers(point_of_sale, voucher_type, count=1):
+    """
+    Reserva count numeros consecutivos del punto de venta y tipo. Debe llamarse dentro de la
+    transaccion que los asigna: la secuencia queda bloqueada hasta el commit y un rollback
+    devuelve los numeros, asi la numeracion no tiene huecos.
+    """
+    if count < 1:
+        return range(0)
+    if not db_transaction.get_connection().in_atomic_block:
+        raise FiscalError('La numeracion de comprobantes requiere una transaccion abierta')
+    sequence = _locked_voucher_sequence(point_of_sale, voucher_type)
+    first = sequence.last_number + 1
+    sequence.last_number += count
+    sequence.save(update_fields=['last_number', 'updated_at'])
+    return range(first, first + count)
+
+
+_AUTHORIZATION_FIELDS = [
+    'voucher_number',
+    'cae',
+    'cae_due_date',
+    'status',
+    'error_message',
+    'provider_result',
+    'updated_at',
+]
+
+
+def _check_arca_provider():
     provider = getattr(settings, 'ARCA_PROVIDER', 'mock').lower()
     if provider not in {'mock', 'disabled'}:
         raise ProviderConfigurationError(
@@ -276,32 +473,339 @@ def authorize_invoice(invoice):
     if provider == 'disabled':
         raise ProviderConfigurationError('ARCA_PROVIDER esta deshabilitado')
 
+
+def _apply_mock_authorization(invoice, voucher_number):
+    invoice.voucher_number = voucher_number
+    invoice.cae = f"MOCK{invoice.issue_date.strftime('%Y%m%d')}{voucher_number:08d}"[:32]
+    invoice.cae_due_date = invoice.issue_date + timedelta(days=10)
+    invoice.status = Invoice.Status.AUTHORIZED
+    invoice.error_message = ''
+    invoice.provider_result = {
+        'provider': 'mock',
+        'mode': 'homologacion-local',
+        'note': 'Reemplazar por WSFEv1 real al configurar credenciales ARCA',
+    }
+    invoice.updated_at = timezone.now()
+
+
+def authorize_invoice(invoice):
+    if invoice.status == Invoice.Status.AUTHORIZED:
+        return invoice
+    if invoice.total_amount <= Decimal('0'):
+        raise FiscalError('La factura debe tener importe mayor a cero')
+    _check_arca_provider()
+
     with db_transaction.atomic():
         locked = Invoice.objects.select_for_update().get(pk=invoice.pk)
         if locked.status == Invoice.Status.AUTHORIZED:
             return locked
-        locked.voucher_number = _next_mock_voucher_number(locked)
-        locked.cae = f"MOCK{locked.issue_date.strftime('%Y%m%d')}{locked.voucher_number:08d}"[:32]
-        locked.cae_due_date = locked.issue_date + timedelta(days=10)
-        locked.status = Invoice.Status.AUTHORIZED
-        locked.error_message = ''
-        locked.provider_result = {
-            'provider': 'mock',
-            'mode': 'homologacion-local',
-            'note': 'Reemplazar por WSFEv1 real al configurar credenciales ARCA',
-        }
-        locked.save(update_fields=[
-            'voucher_number',
-            'cae',
-            'cae_due_date',
-            'status',
-            'error_message',
-            'provider_result',
-            'updated_at',
-        ])
+        voucher_number = reserve_voucher_numbers(locked.point_of_sale, locked.voucher_type)[0]
+        _apply_mock_authorization(locked, voucher_number)
+        locked.save(update_fields=_AUTHORIZATION_FIELDS)
         return locked
 
 
+AUTHORIZABLE_INVOICE_STATUSES = [Invoice.Status.DRAFT, Invoice.Status.ERROR]
+MAX_INVOICES_PER_AUTHORIZATION = 500
+
+
+def authorize_invoices(invoice_ids=None, start_date=None, end_date=None, source=None, branch_id=None):
+    """
+    Autoriza varias facturas en una transaccion: las bloquea en una consulta, numera cada
+    punto de venta/tipo con un bloque contiguo y guarda con bulk_update. Devuelve el resultado
+    por factura; las que no pasan la validacion quedan en Error y no consumen numero. Por
+    periodo se toman hasta MAX_INVOICES_PER_AUTHORIZATION: `remaining`/`has_more` indican si
+    quedan facturas y hay que volver a llamar.
+    """
+    _check_arca_provider()
+    if invoice_ids is not None:
+        invoice_ids = list(dict.fromkeys(str(invoice_id) for invoice_id in invoice_ids))
+        if not invoice_ids:
+            raise FiscalError('No se indicaron facturas para autorizar')
+        if len(invoice_ids) > MAX_INVOICES_PER_AUTHORIZATION:
+            raise FiscalError(f'Se pueden autorizar hasta {MAX_INVOICES_PER_AUTHORIZATION} facturas por vez')
+        filters = Q(pk__in=invoice_ids)
+    else:
+        if not start_date or not end_date:
+            raise FiscalError('Indica las facturas o un periodo para autorizar')
+        # Sin importe nunca se autorizan: se excluyen para que volver a llamar siempre avance.
+        filters = Q(
+            issue_date__gte=start_date,
+            issue_date__lte=end_date,
+            status__in=AUTHORIZABLE_INVOICE_STATUSES,
+            total_amount__gt=0,
+        )
+        if source:
+            filters &= Q(source=source)
+        if branch_id:
+            filters &= Q(branch_id=branch_id)
+
+    with db_transaction.atomic():
+        invoices = list(
+            Invoice.objects
+            .select_for_update(of=('self',))
+            .select_related('client', 'branch')
+            .filter(filters)
+            .order_by('issue_date', 'created_at', 'id')[:MAX_INVOICES_PER_AUTHORIZATION]
+        )
+        remaining = 0
+        if invoice_ids is None and len(invoices) == MAX_INVOICES_PER_AUTHORIZATION:
+            remaining = Invoice.objects.filter(filters).count() - len(invoices)
+        outcomes = {}
+        pending_by_series = {}
+        changed = []
+        now = timezone.now()
+        for invoice in invoices:
+            if invoice.status == Invoice.Status.AUTHORIZED:
+                outcomes[invoice.pk] = 'already_authorized'
+            elif invoice.status not in AUTHORIZABLE_INVOICE_STATUSES:
+                outcomes[invoice.pk] = 'skipped'
+            elif invoice.total_amount <= Decimal('0'):
+                invoice.status = Invoice.Status.ERROR
+                invoice.error_message = 'La factura debe tener importe mayor a cero'
+                invoice.updated_at = now
+                outcomes[invoice.pk] = 'error'
+                changed.append(invoice)
+            else:
+                pending_by_series.setdefault((invoice.point_of_sale, invoice.voucher_type), []).append(invoice)
+
+        # Un bloque por serie; con un cliente WSFEv1 real aca se envian los lotes al proveedor.
+        for (point_of_sale, voucher_type), series in sorted(pending_by_series.items()):
+            numbers = reserve_voucher_numbers(point_of_sale, voucher_type, count=len(series))
+            for invoice, voucher_number in zip(series, numbers):
+                _apply_mock_authorization(invoice, voucher_number)
+                outcomes[invoice.pk] = 'authorized'
+                changed.append(invoice)
+        Invoice.objects.bulk_update(changed, _AUTHORIZATION_FIELDS)
+
+    found = {str(invoice.pk): invoice for invoice in invoices}
+    order = invoice_ids if invoice_ids is not None else list(found)
+    results = []
+    for invoice_id in order:
+        invoice = found.get(invoice_id)
+        if invoice is None:
+            results.append({'id': invoice_id, 'result': 'not_found', 'invoice': None})
+            continue
+        results.append({
+            'id': invoice_id,
+            'result': outcomes[invoice.pk],
+            'invoice': invoice_payload(invoice, include_lines=False),
+        })
+    counts = {'authorized': 0, 'already_authorized': 0, 'skipped': 0, 'error': 0, 'not_found': 0}
+    for item in results:
+        counts[item['result']] += 1
+    return {**counts, 'remaining': remaining, 'has_more': remaining > 0, 'results': results}
+
+
+INVOICING_JOB_CHUNK_SIZE = 100
+_INVOICING_PROGRESS_FIELDS = [
+    'status',
+    'total_groups',
+    'processed_groups',
+    'invoices_created',
+    'invoices_authorized',
+    'total_amount',
+    'error_message',
+    'started_at',
+    'finished_at',
+    'updated_at',
+]
+
+
+def invoicing_job_payload(job):
+    if job.total_groups:
+        progress = round(job.processed_groups * 100 / job.total_groups, 1)
+    else:
+        progress = 100.0 if job.status == AccountInvoicingJob.Status.DONE else 0.0
+    return {
+        'id': job.id,
+        'status': job.status,
+        'status_label': job.get_status_display(),
+        'period_end': job.period_end.isoformat(),
+        'branch': {
+            'id': job.branch_id,
+            'name': job.branch.name,
+        } if job.branch_id else None,
+        'authorize': job.authorize,
+        'total_groups': job.total_groups,
+        'processed_groups': job.processed_groups,
+        'progress': progress,
+        'invoices_created': job.invoices_created,
+        'invoices_authorized': job.invoices_authorized,
+        'total_amount': float(job.total_amount or 0),
+        'error_message': job.error_message,
+        'created_by': job.created_by.username if job.created_by_id else '',
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def queue_account_invoicing(period_end, branch=None, authorize=False, user=None):
+    """
+    Encola la facturacion de cierre; si ya hay una pendiente para el mismo corte y sucursal la
+    devuelve (created=False). Un job RUNNING abandonado lo retoma el worker, ver run_next_invoicing_job.
+    """
+    active = (
+        AccountInvoicingJob.objects
+        .filter(
+            period_end=period_end,
+            branch=branch,
+            status__in=[AccountInvoicingJob.Status.QUEUED, AccountInvoicingJob.Status.RUNNING],
+        )
+        .first()
+    )
+    if active:
+        return active, False
+    job = AccountInvoicingJob.objects.create(
+        period_end=period_end,
+        branch=branch,
+        authorize=authorize,
+        created_by=user,
+    )
+    return job, True
+
+
+def _invoicing_candidates(job):
+    queryset = (
+        AccountTransaction.objects
+        .filter(_transaction_remaining_expr())
+        .filter(invoice_link__isnull=True, date__lte=job.period_end)
+    )
+    if job.branch_id:
+        queryset = queryset.filter(branch_id=job.branch_id)
+    return queryset
+
+
+def _invoice_group_chunk(job, groups):
+    """Crea en una transaccion las facturas de un bloque de (cliente, sucursal)."""
+    wanted = set(groups)
+    with db_transaction.atomic():
+        txs = (
+            _invoicing_candidates(job)
+            .select_for_update(of=('self',))
+            .select_related('client', 'branch')
+            .filter(client_id__in={client_id for client_id, _ in groups})
+            .order_by('date', 'created_at', 'id')
+        )
+        grouped = defaultdict(list)
+        for tx in txs:
+            key = (tx.client_id, tx.branch_id)
+            if key in wanted:
+                grouped[key].append(tx)
+
+        invoices = []
+        lines = []
+        links = []
+        for key in groups:
+            group = grouped.get(key)
+            if not group:
+                continue
+            invoice, invoice_lines, invoice_links = _build_account_invoice(
+                group[0].client,
+                group,
+                group[0].branch,
+                created_by=job.created_by,
+            )
+            if invoice.total_amount <= Decimal('0'):
+                continue
+            invoice.invoicing_job = job
+            invoices.append(invoice)
+            lines.extend(invoice_lines)
+            links.extend(invoice_links)
+        Invoice.objects.bulk_create(invoices)
+        InvoiceLine.objects.bulk_create(lines)
+        InvoiceAccountTransaction.objects.bulk_create(links)
+
+        job.processed_groups += len(groups)
+        job.invoices_created += len(invoices)
+        job.total_amount += sum((invoice.total_amount for invoice in invoices), Decimal('0'))
+        job.save(update_fields=_INVOICING_PROGRESS_FIELDS)
+    return invoices
+
+
+def run_account_invoicing_job(job):
+    """
+    Factura el saldo pendiente no facturado hasta job.period_end: una factura por cliente y
+    sucursal. Arma la lista de grupos en una consulta y procesa bloques de
+    INVOICING_JOB_CHUNK_SIZE, guardando el avance en el job despues de cada uno.
+    """
+    groups = list(
+        _invoicing_candidates(job)
+        .order_by('client__last_name', 'client__first_name', 'client_id', 'branch_id')
+        .values_list('client_id', 'branch_id')
+        .distinct()
+    )
+    job.status = AccountInvoicingJob.Status.RUNNING
+    job.started_at = job.started_at or timezone.now()
+    # Al retomar, los grupos ya facturados no vuelven como candidatos: se conserva el total
+    # original y el avance sigue sumando sobre lo ya procesado.
+    if job.total_groups:
+        job.total_groups = max(job.total_groups, job.processed_groups + len(groups))
+    else:
+        job.total_groups = len(groups)
+        job.processed_groups = 0
+    job.save(update_fields=_INVOICING_PROGRESS_FIELDS)
+
+    if job.authorize:
+        # Si el job se retoma, autoriza lo que una corrida cortada dejo en borrador.
+        leftover = list(
+            Invoice.objects
+            .filter(invoicing_job=job, status=Invoice.Status.DRAFT)
+            .values_list('pk', flat=True)
+        )
+        for offset in range(0, len(leftover), MAX_INVOICES_PER_AUTHORIZATION):
+            result = authorize_invoices(leftover[offset:offset + MAX_INVOICES_PER_AUTHORIZATION])
+            job.invoices_authorized += result['authorized']
+            job.save(update_fields=_INVOICING_PROGRESS_FIELDS)
+
+    for offset in range(0, len(groups), INVOICING_JOB_CHUNK_SIZE):
+        invoices = _invoice_group_chunk(job, groups[offset:offset + INVOICING_JOB_CHUNK_SIZE])
+        if job.authorize and invoices:
+            result = authorize_invoices([invoice.pk for invoice in invoices])
+            job.invoices_authorized += result['authorized']
+            job.save(update_fields=_INVOICING_PROGRESS_FIELDS)
+
+    job.status = AccountInvoicingJob.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=_INVOICING_PROGRESS_FIELDS)
+    return job
+
+
+def run_next_invoicing_job(now=None):
+    """
+    Toma el proximo job en cola (lo usa el worker); los errores quedan anotados en el job.
+    Tambien retoma los RUNNING sin avance en INVOICING_JOB_STALE_SECONDS (worker reiniciado o
+    caido): rehacerlos es seguro porque los movimientos ya facturados no vuelven a ser candidatos.
+    """
+    now = now or timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'INVOICING_JOB_STALE_SECONDS', 900))
+    with db_transaction.atomic():
+        job = (
+            AccountInvoicingJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=AccountInvoicingJob.Status.QUEUED)
+                | Q(status=AccountInvoicingJob.Status.RUNNING, updated_at__lt=stale_before)
+            )
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = AccountInvoicingJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=_INVOICING_PROGRESS_FIELDS)
+    try:
+        return run_account_invoicing_job(job)
+    except Exception as exc:
+        job.status = AccountInvoicingJob.Status.ERROR
+        job.error_message = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=_INVOICING_PROGRESS_FIELDS)
+        raise
+
+
 def verify_getnet_signature(raw_body, signature):
     secret = getattr(settings, 'GETNET_WEBHOOK_SECRET', '')
     if not secret:
@@ -339,7 +843,11 @@ def normalize_getnet_status(value):
     return Payment.Status.PENDING
 
 
-def process_getnet_webhook(raw_body, signature=''):
+def receive_getnet_webhook(raw_body, signature=''):
+    """
+    Verifica la firma y deja el evento en la bandeja como RECEIVED; lo aplica el worker
+    (process_external_events). Solo toca ExternalEvent para responder rapido al proveedor.
+    """
     if not verify_getnet_signature(raw_body, signature):
         raise FiscalError('Firma Getnet invalida')
 
@@ -349,38 +857,137 @@ def process_getnet_webhook(raw_body, signature=''):
         raise FiscalError(f'Payload Getnet invalido: {exc}') from exc
 
     event_id = str(_first_present(payload, 'id', 'event_id', 'notification_id', 'payment.payment_id', 'payment_id') or uuid4())
-    event_type = str(_first_present(payload, 'type', 'event_type', 'status', 'payment.status') or 'payment')
+    event_type = str(_first_present(payload, 'type', 'event_type', 'status', 'payment.status') or 'payment')[:64]
     payload_digest = _payload_hash(raw_body)
 
     event, created = ExternalEvent.objects.get_or_create(
         provider='getnet',
         event_id=event_id,
         defaults={
-            'event_type': event_type[:64],
+            'event_type': event_type,
             'payload_hash': payload_digest,
             'payload': payload,
         },
     )
-    if not created and event.status == ExternalEvent.Status.PROCESSED:
-        event.status = ExternalEvent.Status.DUPLICATE
-        event.save(update_fields=['status'])
-        return {'event': event, 'payment': None, 'duplicate': True}
-
+    if created:
+        return {'event': event, 'duplicate': False}
+    if event.status in (ExternalEvent.Status.PROCESSED, ExternalEvent.Status.DUPLICATE):
+        if event.status == ExternalEvent.Status.PROCESSED:
+            event.status = ExternalEvent.Status.DUPLICATE
+            event.save(update_fields=['status'])
+        return {'event': event, 'duplicate': True}
+
+    # Reenvio de un evento pendiente o descartado: se vuelve a encolar con el payload recibido.
+    event.status = ExternalEvent.Status.RECEIVED
+    event.event_type = event_type
+    event.payload_hash = payload_digest
+    event.payload = payload
+    event.attempts = 0
+    event.next_attempt_at = None
+    event.error_message = ''
+    event.save(update_fields=[
+        'status',
+        'event_type',
+        'payload_hash',
+        'payload',
+        'attempts',
+        'next_attempt_at',
+        'error_message',
+    ])
+    return {'event': event, 'duplicate': False}
+
+
+_EVENT_RESULT_FIELDS = ['status', 'attempts', 'next_attempt_at', 'error_message', 'processed_at']
+
+
+def _apply_external_event(event, now):
+    """Aplica el evento en su propio savepoint y anota el resultado en memoria (sin guardar)."""
+    event.attempts += 1
     try:
-        payment = upsert_getnet_payment_from_payload(payload)
-        event.status = ExternalEvent.Status.PROCESSED
-        event.error_message = ''
-        event.processed_at = timezone.now()
-        event.payload_hash = payload_digest
-        event.payload = payload
-        event.save(update_fields=['status', 'error_message', 'processed_at', 'payload_hash', 'payload'])
-        return {'event': event, 'payment': payment, 'duplicate': False}
+        with db_transaction.atomic():
+            payment = upsert_getnet_payment_from_payload(event.payload)
     except Exception as exc:
-        event.status = ExternalEvent.Status.ERROR
         event.error_message = str(exc)
-        event.processed_at = timezone.now()
-        event.save(update_fields=['status', 'error_message', 'processed_at'])
-        raise
+        max_attempts = getattr(settings, 'EXTERNAL_EVENT_MAX_ATTEMPTS', 5)
+        if event.attempts >= max_attempts:
+            event.status = ExternalEvent.Status.ERROR
+            event.next_attempt_at = None
+            event.processed_at = now
+        else:
+            delay = getattr(settings, 'EXTERNAL_EVENT_RETRY_SECONDS', 30) * 2 ** (event.attempts - 1)
+            event.status = ExternalEvent.Status.RECEIVED
+            event.next_attempt_at = now + timedelta(seconds=delay)
+        return None, exc
+    event.status = ExternalEvent.Status.PROCESSED
+    event.error_message = ''
+    event.next_attempt_at = None
+    event.processed_at = now
+    return payment, None
+
+
+def _claim_external_events(limit, now):
+    """Reserva eventos vencidos en una transaccion corta corriendo next_attempt_at (lease)."""
+    lease_until = now + timedelta(seconds=getattr(settings, 'EXTERNAL_EVENT_LEASE_SECONDS', 300))
+    with db_transaction.atomic():
+        # skip_locked permite varios workers sin tomar el mismo evento (en SQLite se ignora).
+        event_ids = list(
+            ExternalEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(provider='getnet', status=ExternalEvent.Status.RECEIVED)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by('created_at', 'id')
+            .values_list('pk', flat=True)[:limit]
+        )
+        ExternalEvent.objects.filter(pk__in=event_ids).update(next_attempt_at=lease_until)
+    return event_ids, lease_until
+
+
+def process_external_events(limit=None, now=None):
+    """
+    Drena la bandeja de eventos RECEIVED vencidos, en orden de llegada. Primero los reserva con
+    un lease de EXTERNAL_EVENT_LEASE_SECONDS y despues aplica y guarda cada uno en su propia
+    transaccion, asi los bloqueos de facturas y numeradores duran lo que dura un evento. Si el
+    worker se cae, el lease vence y otro worker los retoma. Los que fallan se reintentan con
+    backoff exponencial y pasan a ERROR al agotar EXTERNAL_EVENT_MAX_ATTEMPTS.
+    """
+    limit = limit or getattr(settings, 'EXTERNAL_EVENT_BATCH_SIZE', 50)
+    now = now or timezone.now()
+    result = {'processed': 0, 'retrying': 0, 'failed': 0}
+    event_ids, lease_until = _claim_external_events(limit, now)
+    for event_id in event_ids:
+        with db_transaction.atomic():
+            # Un reenvio del proveedor o un lease vencido pueden haber cambiado el evento.
+            event = (
+                ExternalEvent.objects
+                .select_for_update()
+                .filter(pk=event_id, status=ExternalEvent.Status.RECEIVED, next_attempt_at=lease_until)
+                .first()
+            )
+            if event is None:
+                continue
+            _, error = _apply_external_event(event, now)
+            event.save(update_fields=_EVENT_RESULT_FIELDS)
+        if error is None:
+            result['processed'] += 1
+        elif event.status == ExternalEvent.Status.ERROR:
+            result['failed'] += 1
+        else:
+            result['retrying'] += 1
+    return result
+
+
+def process_getnet_webhook(raw_body, signature=''):
+    """Recibe y aplica el evento en el momento (scripts y pruebas); el webhook HTTP solo lo encola."""
+    received = receive_getnet_webhook(raw_body, signature=signature)
+    event = received['event']
+    if received['duplicate']:
+        return {'event': event, 'payment': None, 'duplicate': True}
+
+    payment, error = _apply_external_event(event, timezone.now())
+    event.save(update_fields=_EVENT_RESULT_FIELDS)
+    if error is not None:
+        raise error
+    return {'event': event, 'payment': payment, 'duplicate': False}
 
 
 def upsert_getnet_payment_from_payload(payload):
@@ -445,62 +1052,77 @@ def create_manual_payment(source, amount, payment_date=None, client=None, invoic
     return payment
 
 
+_COLLECTED_PAYMENT_STATUSES = [Payment.Status.APPROVED, Payment.Status.RECONCILED]
+_PENDING_PAYMENT_STATUSES = [Payment.Status.PENDING, Payment.Status.NEEDS_REVIEW]
+
+
 def billing_summary(start_date, end_date, getnet_terminal_id=None):
-    invoices = Invoice.objects.filter(issue_date__gte=start_date, issue_date__lte=end_date)
-    authorized = invoices.filter(status=Invoice.Status.AUTHORIZED)
-    payments = Payment.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date,
-        status__in=[Payment.Status.APPROVED, Payment.Status.RECONCILED],
-    )
-    getnet_payments = payments.filter(source=Payment.Source.GETNET)
-    pending_getnet = Payment.objects.filter(
-        source=Payment.Source.GETNET,
-        date__gte=start_date,
-        date__lte=end_date,
-        status__in=[Payment.Status.PENDING, Payment.Status.NEEDS_REVIEW],
+    """Resumen de facturacion con una consulta agrupada por tabla (facturas, pagos, bancos, cuentas)."""
+    invoice_totals = (
+        Invoice.objects
+        .filter(issue_date__gte=start_date, issue_date__lte=end_date)
+        .aggregate(
+            authorized_total=Sum('total_amount', filter=Q(status=Invoice.Status.AUTHORIZED)),
+            draft_total=Sum('total_amount', filter=Q(status=Invoice.Status.DRAFT)),
+            count=Count('id'),
+            authorized_count=Count('id', filter=Q(status=Invoice.Status.AUTHORIZED)),
+        )
     )
+
+    # El filtro por terminal solo aplica a Getnet; los demas medios se suman completos.
+    terminal_filter = Q(source=Payment.Source.GETNET)
     if getnet_terminal_id:
-        getnet_payments = getnet_payments.filter(terminal_id=getnet_terminal_id)
-        pending_getnet = pending_getnet.filter(terminal_id=getnet_terminal_id)
-    bank_income = BankTransaction.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date,
-        amount__gt=0,
-    )
-    getnet_bank_filter = Q(concept__icontains='getnet') | Q(description__icontains='getnet')
-    bank_transfer_income = (
-        bank_income
-        .exclude(getnet_bank_filter)
-        .values('batch__bank')
-        .annotate(total=Sum('amount'))
-    )
-    getnet_bank_income = (
-        bank_income
-        .filter(getnet_bank_filter)
-        .values('batch__bank')
-        .annotate(total=Sum('amount'))
+        terminal_filter &= Q(terminal_id=getnet_terminal_id)
+    in_scope = terminal_filter | ~Q(source=Payment.Source.GETNET)
+    payment_rows = (
+        Payment.objects
+        .filter(date__gte=start_date, date__lte=end_date)
+        .values('source')
+        .annotate(
+            collected=Sum('amount', filter=in_scope & Q(status__in=_COLLECTED_PAYMENT_STATUSES)),
+            pending_total=Sum('amount', filter=terminal_filter & Q(status__in=_PENDING_PAYMENT_STATUSES)),
+            pending_count=Count('id', filter=terminal_filter & Q(status__in=_PENDING_PAYMENT_STATUSES)),
+        )
+        .order_by()
     )
-    bank_totals = {row['batch__bank']: float(row['total'] or 0) for row in bank_transfer_income}
-    getnet_bank_totals = {row['batch__bank']: float(row['total'] or 0) for row in getnet_bank_income}
     payment_totals = {}
-    for row in payments.exclude(source=Payment.Source.GETNET).values('source').annotate(total=Sum('amount')):
-        payment_totals[row['source']] = float(row['total'] or 0)
-    payment_totals[Payment.Source.GETNET] = float(
-        getnet_payments.aggregate(total=Sum('amount')).get('total') or 0
+    pending_getnet = {'total': 0.0, 'count': 0}
+    for row in payment_rows:
+        payment_totals[row['source']] = float(row['collected'] or 0)
+        if row['source'] == Payment.Source.GETNET:
+            pending_getnet = {'total': float(row['pending_total'] or 0), 'count': row['pending_count']}
+
+    bank_totals = {}
+    getnet_bank_totals = {}
+    bank_rows = (
+        BankTransaction.objects
+        .filter(date__gte=start_date, date__lte=end_date, amount__gt=0)
+        .values('batch__bank', 'is_getnet')
+        .annotate(total=Sum('amount'))
+        .order_by()
     )
+    for row in bank_rows:
+        target = getnet_bank_totals if row['is_getnet'] else bank_totals
+        target[row['batch__bank']] = float(row['total'] or 0)
 
     account_debt = AccountClient.objects.aggregate(total=Sum('total_debt')).get('total') or Decimal('0')
+    account_debt_by_branch = (
+        AccountClientBranchBalance.objects
+        .filter(total_debt__gt=0)
+        .values('branch_id', 'branch__name')
+        .annotate(total=Sum('total_debt'), clients=Count('id'))
+        .order_by('branch__name')
+    )
     return {
         'period': {
             'start': start_date.isoformat(),
             'end': end_date.isoformat(),
         },
         'invoices': {
-            'authorized_total': float(authorized.aggregate(total=Sum('total_amount')).get('total') or 0),
-            'draft_total': float(invoices.filter(status=Invoice.Status.DRAFT).aggregate(total=Sum('total_amount')).get('total') or 0),
-            'count': invoices.count(),
-            'authorized_count': authorized.count(),
+            'authorized_total': float(invoice_totals['authorized_total'] or 0),
+            'draft_total': float(invoice_totals['draft_total'] or 0),
+            'count': invoice_totals['count'],
+            'authorized_count': invoice_totals['authorized_count'],
         },
         'collections': {
             'getnet': payment_totals.get(Payment.Source.GETNET, 0.0),
@@ -511,12 +1133,21 @@ def billing_summary(start_date, end_date, getnet_terminal_id=None):
         },
         'getnet': {
             'terminal_id': getnet_terminal_id,
-            'pending_total': float(pending_getnet.aggregate(total=Sum('amount')).get('total') or 0),
-            'pending_count': pending_getnet.count(),
+            'pending_total': pending_getnet['total'],
+            'pending_count': pending_getnet['count'],
             'bank_settled_total': sum(getnet_bank_totals.values()),
             'bank_settled_by_bank': getnet_bank_totals,
         },
         'account_current': {
             'total_debt': float(account_debt),
+            'by_branch': [
+                {
+                    'branch_id': row['branch_id'],
+                    'branch_name': row['branch__name'],
+                    'total_debt': float(row['total'] or 0),
+                    'clients': row['clients'],
+                }
+                for row in account_debt_by_branch
+            ],
         },
     }
@@ -1,4 +1,6 @@
+from calendar import monthrange
 from datetime import date, timedelta
+from uuid import UUID
 
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -12,14 +14,19 @@ from .fiscal_services import (
     FiscalError,
     account_invoice_preview,
     authorize_invoice,
+    authorize_invoices,
     billing_summary,
     create_account_invoice,
     create_manual_payment,
     invoice_payload,
+    invoices_page,
+    invoicing_job_payload,
     payment_payload,
-    process_getnet_webhook,
+    payments_page,
+    queue_account_invoicing,
+    receive_getnet_webhook,
 )
-from .models import AccountClient, Branch, GetnetTerminal, Invoice, Payment
+from .models import AccountClient, AccountInvoicingJob, Branch, GetnetTerminal, Invoice, Payment
 
 
 def _parse_date(value):
@@ -71,8 +78,6 @@ def invoices_list(request):
         start, end = _month_range(request)
     qs = (
         Invoice.objects
-        .select_related('client', 'branch')
-        .prefetch_related('lines')
         .filter(issue_date__gte=start, issue_date__lte=end)
     )
     status_filter = (request.query_params.get('status') or '').strip()
@@ -81,7 +86,15 @@ def invoices_list(request):
     source_filter = (request.query_params.get('source') or '').strip()
     if source_filter:
         qs = qs.filter(source=source_filter)
-    return Response([invoice_payload(invoice, include_lines=False) for invoice in qs[:500]])
+    try:
+        page = invoices_page(
+            qs,
+            cursor=(request.query_params.get('cursor') or '').strip(),
+            limit=_positive_int(request.query_params.get('limit')),
+        )
+    except FiscalError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(page)
 
 
 @api_view(['GET'])
@@ -108,6 +121,78 @@ def invoice_authorize(request, pk):
     return Response(invoice_payload(invoice))
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def invoices_authorize_batch(request):
+    raw_ids = request.data.get('invoice_ids')
+    invoice_ids = None
+    if raw_ids is not None:
+        if not isinstance(raw_ids, list):
+            return Response({'detail': 'invoice_ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            invoice_ids = [str(UUID(str(value))) for value in raw_ids]
+        except ValueError:
+            return Response({'detail': 'Hay ids de factura invalidos'}, status=status.HTTP_400_BAD_REQUEST)
+
+    branch_value = request.data.get('branch_id')
+    branch_id = _positive_int(branch_value)
+    if branch_value not in (None, '') and not branch_id:
+        return Response({'detail': 'Sucursal invalida'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        result = authorize_invoices(
+            invoice_ids=invoice_ids,
+            start_date=_parse_date(request.data.get('start_date')),
+            end_date=_parse_date(request.data.get('end_date')),
+            source=(request.data.get('source') or '').strip() or None,
+            branch_id=branch_id,
+        )
+    except FiscalError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def invoicing_jobs(request):
+    if request.method == 'POST':
+        data = request.data or {}
+        today = timezone.localdate()
+        try:
+            year = int(data.get('year') or today.year)
+            month = int(data.get('month') or today.month)
+            period_end = date(year, month, monthrange(year, month)[1])
+        except (TypeError, ValueError):
+            return Response({'detail': 'Periodo invalido'}, status=status.HTTP_400_BAD_REQUEST)
+        branch_value = data.get('branch_id')
+        branch_id = _positive_int(branch_value)
+        if branch_value not in (None, '') and not branch_id:
+            return Response({'detail': 'Sucursal invalida'}, status=status.HTTP_400_BAD_REQUEST)
+        branch = get_object_or_404(Branch, pk=branch_id, active=True) if branch_id else None
+        authorize = str(data.get('authorize', '')).lower() in {'1', 'true', 'yes'}
+        job, created = queue_account_invoicing(period_end, branch=branch, authorize=authorize, user=request.user)
+        if not created and job.authorize != authorize:
+            detail = (
+                'Ya hay una facturacion pendiente para ese cierre '
+                f"{'con' if job.authorize else 'sin'} autorizacion; espera a que termine"
+            )
+            return Response({'detail': detail, 'job': invoicing_job_payload(job)}, status=status.HTTP_409_CONFLICT)
+        # La facturacion corre en el worker (manage.py run_invoicing_jobs); se consulta el avance por GET.
+        return Response(
+            {**invoicing_job_payload(job), 'created': created},
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
+    qs = AccountInvoicingJob.objects.select_related('branch', 'created_by')[:20]
+    return Response([invoicing_job_payload(job) for job in qs])
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def invoicing_job_detail(request, pk):
+    job = get_object_or_404(AccountInvoicingJob.objects.select_related('branch', 'created_by'), pk=pk)
+    return Response(invoicing_job_payload(job))
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def account_invoice_preview_view(request, pk):
@@ -174,17 +259,22 @@ def payments_list(request):
     end = _parse_date(request.query_params.get('end_date'))
     if not start or not end:
         start, end = _month_range(request)
-    qs = Payment.objects.select_related('client', 'invoice', 'terminal', 'branch').filter(
-        date__gte=start,
-        date__lte=end,
-    )
+    qs = Payment.objects.filter(date__gte=start, date__lte=end)
     source_filter = (request.query_params.get('source') or '').strip()
     if source_filter:
         qs = qs.filter(source=source_filter)
     terminal_id = _positive_int(request.query_params.get('terminal_id'))
     if terminal_id:
         qs = qs.filter(terminal_id=terminal_id)
-    return Response([payment_payload(payment) for payment in qs[:500]])
+    try:
+        page = payments_page(
+            qs,
+            cursor=(request.query_params.get('cursor') or '').strip(),
+            limit=_positive_int(request.query_params.get('limit')),
+        )
+    except FiscalError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(page)
 
 
 @api_view(['POST'])
@@ -236,13 +326,12 @@ def getnet_webhook(request):
         or ''
     )
     try:
-        result = process_getnet_webhook(request.body, signature=signature)
+        result = receive_getnet_webhook(request.body, signature=signature)
     except FiscalError as exc:
         return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-    payment = result.get('payment')
+    # El pago se aplica en el worker de eventos (manage.py run_external_events).
     return Response({
-        'detail': 'Evento procesado',
-        'duplicate': result.get('duplicate', False),
+        'detail': 'Evento recibido',
+        'duplicate': result['duplicate'],
         'event_id': result['event'].event_id,
-        'payment': payment_payload(payment) if payment else None,
-    })
+    }, status=status.HTTP_202_ACCEPTED)
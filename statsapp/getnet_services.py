@@ -2,6 +2,7 @@ import csv
 import io
 import unicodedata
 from collections import defaultdict
+from contextlib import closing
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 
@@ -41,15 +42,6 @@ def _normalize(value):
     return ''.join(char for char in text if not unicodedata.combining(char))
 
 
-def _decode_csv(raw_bytes):
-    for encoding in ('utf-8-sig', 'cp1252'):
-        try:
-            return raw_bytes.decode(encoding)
-        except UnicodeDecodeError:
-            continue
-    raise GetnetImportError('El CSV no usa una codificacion UTF-8 o Windows-1252 valida')
-
-
 def _parse_decimal(value, field_name):
     text = str(value or '').strip().replace('\u00a0', '').replace(' ', '')
     if not text:
@@ -136,104 +128,144 @@ def terminal_payload(terminal):
     }
 
 
-@transaction.atomic
-def import_getnet_csv(uploaded_file, default_branch=None):
-    raw_bytes = uploaded_file.read()
-    if not raw_bytes:
-        raise GetnetImportError('El archivo Getnet esta vacio')
-
-    text = _decode_csv(raw_bytes)
-    reader = csv.DictReader(io.StringIO(text, newline=''))
-    headers = set(reader.fieldnames or [])
-    missing_headers = sorted(REQUIRED_HEADERS - headers)
-    if missing_headers:
-        raise GetnetImportError(f'Faltan columnas obligatorias: {", ".join(missing_headers)}')
-
-    rows = list(reader)
-    if not rows:
-        raise GetnetImportError('El CSV Getnet no contiene transacciones')
-    if len(rows) > 50000:
-        raise GetnetImportError('El CSV Getnet supera el limite de 50.000 transacciones')
-
-    transaction_ids = []
-    terminal_codes = set()
-    for row_number, row in enumerate(rows, start=2):
-        transaction_id = str(row.get('Cód. de Transacción') or '').strip()
-        terminal_code = str(row.get('Código del POS') or '').strip()
-        if not transaction_id:
-            raise GetnetImportError(f'Fila {row_number}: falta Cód. de Transacción')
-        if not terminal_code:
-            raise GetnetImportError(f'Fila {row_number}: falta Código del POS')
-        transaction_ids.append(transaction_id)
-        terminal_codes.add(terminal_code)
-
-    if len(transaction_ids) != len(set(transaction_ids)):
-        raise GetnetImportError('El CSV contiene Cód. de Transacción duplicados')
-    if default_branch and len(terminal_codes) != 1:
-        raise GetnetImportError('El archivo contiene varias terminales; asigna cada una desde Facturacion')
-
+IMPORT_CHUNK_SIZE = 1000
+_PAYMENT_UPSERT_FIELDS = [
+    'source',
+    'status',
+    'provider_status',
+    'date',
+    'amount',
+    'external_id',
+    'terminal',
+    'branch',
+    'meta',
+    'updated_at',
+]
+
+
+def _csv_rows(uploaded_file, encoding):
+    """Lee el CSV fila a fila sin cargar el archivo completo en memoria."""
+    uploaded_file.seek(0)
+    stream = io.TextIOWrapper(uploaded_file, encoding=encoding, newline='')
+    try:
+        reader = csv.DictReader(stream)
+        headers = set(reader.fieldnames or [])
+        missing_headers = sorted(REQUIRED_HEADERS - headers)
+        if missing_headers:
+            raise GetnetImportError(f'Faltan columnas obligatorias: {", ".join(missing_headers)}')
+        yield from reader
+    finally:
+        # detach evita que el wrapper cierre el archivo subido al descartarse.
+        stream.detach()
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _import_terminal(terminal_code, sample, default_branch, now):
+    terminal, _ = GetnetTerminal.objects.select_for_update().get_or_create(
+        code=terminal_code,
+        defaults={'branch': default_branch},
+    )
+    if default_branch and terminal.branch_id not in (None, default_branch.id):
+        raise GetnetImportError(
+            f'La terminal {terminal.code} ya esta asignada a {terminal.branch.name}'
+        )
+    terminal.branch = default_branch or terminal.branch
+    terminal.establishment_number = str(sample.get('Nro de Establecimiento') or '').strip()
+    terminal.establishment_name = str(sample.get('Nombre Establecimiento') or '').strip()
+    terminal.last_seen_at = now
+    terminal.save(update_fields=[
+        'branch',
+        'establishment_number',
+        'establishment_name',
+        'last_seen_at',
+        'updated_at',
+    ])
+    return terminal
+
+
+def _upsert_payments(payments):
+    """Inserta o actualiza por idempotency_key en una sola sentencia; devuelve cuantos ya existian."""
+    existing_meta = dict(
+        Payment.objects.filter(idempotency_key__in=[payment.idempotency_key for payment in payments])
+        .values_list('idempotency_key', 'meta')
+    )
+    for payment in payments:
+        if payment.idempotency_key in existing_meta:
+            payment.meta = {**(existing_meta[payment.idempotency_key] or {}), **payment.meta}
+    Payment.objects.bulk_create(
+        payments,
+        update_conflicts=True,
+        unique_fields=['idempotency_key'],
+        update_fields=_PAYMENT_UPSERT_FIELDS,
+    )
+    return len(existing_meta)
+
+
+def _import_getnet_rows(rows, filename, default_branch):
     now = timezone.now()
     terminals = {}
-    for terminal_code in sorted(terminal_codes):
-        sample = next(row for row in rows if str(row.get('Código del POS') or '').strip() == terminal_code)
-        terminal, _ = GetnetTerminal.objects.select_for_update().get_or_create(
-            code=terminal_code,
-            defaults={'branch': default_branch},
-        )
-        if default_branch and terminal.branch_id not in (None, default_branch.id):
-            raise GetnetImportError(
-                f'La terminal {terminal.code} ya esta asignada a {terminal.branch.name}'
-            )
-        terminal.branch = default_branch or terminal.branch
-        terminal.establishment_number = str(sample.get('Nro de Establecimiento') or '').strip()
-        terminal.establishment_name = str(sample.get('Nombre Establecimiento') or '').strip()
-        terminal.last_seen_at = now
-        terminal.save(update_fields=[
-            'branch',
-            'establishment_number',
-            'establishment_name',
-            'last_seen_at',
-            'updated_at',
-        ])
-        terminals[terminal_code] = terminal
-
+    seen_transaction_ids = set()
     created_count = 0
     updated_count = 0
+    row_count = 0
     totals_by_terminal = defaultdict(lambda: {'rows': 0, 'gross_total': Decimal('0.00')})
-    filename = str(getattr(uploaded_file, 'name', '') or '')[:255]
 
-    for row in rows:
-        transaction_id = str(row.get('Cód. de Transacción') or '').strip()
-        terminal_code = str(row.get('Código del POS') or '').strip()
-        terminal = terminals[terminal_code]
-        operation_datetime = _parse_operation_date(row.get('Fecha de Operación'))
-        amount = _signed_amount(row)
-        provider_status = str(row.get('Estado') or '').strip()
-        key = f'getnet:{transaction_id}'
-
-        existing = Payment.objects.filter(idempotency_key=key).first()
-        meta = dict(existing.meta or {}) if existing else {}
-        meta['getnet_csv'] = _safe_metadata(row, filename)
-        payment, created = Payment.objects.update_or_create(
-            idempotency_key=key,
-            defaults={
-                'source': Payment.Source.GETNET,
-                'status': _payment_status(provider_status),
-                'provider_status': provider_status,
-                'date': operation_datetime.date(),
-                'amount': amount,
-                'external_id': transaction_id,
-                'terminal': terminal,
-                'branch': terminal.branch,
-                'meta': meta,
-            },
-        )
-        if created:
-            created_count += 1
-        else:
-            updated_count += 1
-        totals_by_terminal[terminal_code]['rows'] += 1
-        totals_by_terminal[terminal_code]['gross_total'] += amount
+    for chunk in _chunked(rows, IMPORT_CHUNK_SIZE):
+        payments = []
+        for row in chunk:
+            row_count += 1
+            row_number = row_count + 1
+            transaction_id = str(row.get('Cód. de Transacción') or '').strip()
+            terminal_code = str(row.get('Código del POS') or '').strip()
+            if not transaction_id:
+                raise GetnetImportError(f'Fila {row_number}: falta Cód. de Transacción')
+            if not terminal_code:
+                raise GetnetImportError(f'Fila {row_number}: falta Código del POS')
+            if transaction_id in seen_transaction_ids:
+                raise GetnetImportError('El CSV contiene Cód. de Transacción duplicados')
+            seen_transaction_ids.add(transaction_id)
+
+            terminal = terminals.get(terminal_code)
+            if terminal is None:
+                if default_branch and terminals:
+                    raise GetnetImportError('El archivo contiene varias terminales; asigna cada una desde Facturacion')
+                terminal = _import_terminal(terminal_code, row, default_branch, now)
+                terminals[terminal_code] = terminal
+
+            operation_datetime = _parse_operation_date(row.get('Fecha de Operación'))
+            amount = _signed_amount(row)
+            provider_status = str(row.get('Estado') or '').strip()
+            payments.append(Payment(
+                idempotency_key=f'getnet:{transaction_id}',
+                source=Payment.Source.GETNET,
+                status=_payment_status(provider_status),
+                provider_status=provider_status,
+                date=operation_datetime.date(),
+                amount=amount,
+                external_id=transaction_id,
+                terminal=terminal,
+                branch=terminal.branch,
+                meta={'getnet_csv': _safe_metadata(row, filename)},
+            ))
+            totals_by_terminal[terminal_code]['rows'] += 1
+            totals_by_terminal[terminal_code]['gross_total'] += amount
+
+        existing_count = _upsert_payments(payments)
+        updated_count += existing_count
+        created_count += len(payments) - existing_count
+
+    if not row_count:
+        raise GetnetImportError('El CSV Getnet no contiene transacciones')
 
     terminal_results = []
     for terminal_code in sorted(terminals):
@@ -246,7 +278,7 @@ def import_getnet_csv(uploaded_file, default_branch=None):
 
     return {
         'detail': 'Importacion Getnet completada',
-        'rows': len(rows),
+        'rows': row_count,
         'created': created_count,
         'updated': updated_count,
         'terminals': terminal_results,
@@ -256,3 +288,22 @@ def import_getnet_csv(uploaded_file, default_branch=None):
             if not terminal.branch_id
         ],
     }
+
+
+def import_getnet_csv(uploaded_file, default_branch=None):
+    """
+    Importa el CSV de Getnet leyendolo en streaming y guardando los pagos por bloques
+    (una consulta para los existentes y un upsert por bloque), sin limite de filas.
+    """
+    if not uploaded_file.read(1):
+        raise GetnetImportError('El archivo Getnet esta vacio')
+
+    filename = str(getattr(uploaded_file, 'name', '') or '')[:255]
+    for encoding in ('utf-8-sig', 'cp1252'):
+        try:
+            with transaction.atomic(), closing(_csv_rows(uploaded_file, encoding)) as rows:
+                return _import_getnet_rows(rows, filename, default_branch)
+        except UnicodeDecodeError:
+            # El error puede aparecer a mitad del archivo: se descarta lo escrito y se reintenta.
+            continue
+    raise GetnetImportError('El CSV no usa una codificacion UTF-8 o Windows-1252 valida')
@@ -0,0 +1,142 @@
+import json
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from statsapp.models import AccountTransaction, Branch
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def benchmark_endpoints(reference_date=None, branch_id=None):
+    """Endpoints medidos: nombre -> URL con parametros representativos del uso real."""
+    reference_date = reference_date or timezone.localdate()
+    year, month = reference_date.year, reference_date.month
+    branch_param = f'&branch_id={branch_id}' if branch_id else ''
+    return {
+        'stats': '/api/stats/',
+        'sales_daily': f'/api/sales/daily/?year={year}&month={month}',
+        'bank_stats': '/api/bank/stats/?bank=santander',
+        'list_account_clients': '/api/accounts/clients/?limit=15',
+        'list_account_clients_branch_debt': f'/api/accounts/clients/?limit=15&ordering=debt{branch_param}',
+        'account_clients_stats': f'/api/accounts/clients/stats/?year={year}',
+        'clientes_sugerencias': '/api/clientes/sugerencias/?alias=valeria',
+        'salaries_summary': f'/api/salaries/summary/?year={year}&month={month}',
+        'billing_dashboard': f'/api/billing/summary/?year={year}&month={month}',
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia (p50/p95) y cantidad de consultas de los endpoints principales. '
+        'Compara contra un baseline JSON y falla si hay regresiones mayores a la tolerancia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmark_baseline.json'))
+        parser.add_argument('--update-baseline', action='store_true', help='Guarda los resultados como nuevo baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Regresion de latencia permitida (0.25 = 25%%).')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Diferencia minima en ms para considerar regresion.')
+        parser.add_argument('--query-tolerance', type=int, default=0, help='Consultas extra permitidas por endpoint.')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', default=[], help='Limita a un endpoint (repetible).')
+        parser.add_argument('--username', default='benchmark')
+
+    def handle(self, *args, **options):
+        iterations = max(options['iterations'], 1)
+        user = self._benchmark_user(options['username'])
+        token = str(RefreshToken.for_user(user).access_token)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        latest = AccountTransaction.objects.aggregate(latest=Max('date'))['latest']
+        branch = Branch.objects.filter(active=True).order_by('id').first()
+        endpoints = benchmark_endpoints(latest, branch.id if branch else None)
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Endpoints desconocidos: {', '.join(sorted(unknown))}")
+            endpoints = {name: url for name, url in endpoints.items() if name in options['endpoints']}
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*'], REQUEST_METRICS_ENABLED=False):
+            for name, url in endpoints.items():
+                results[name] = self._measure(client, url, iterations, max(options['warmup'], 0))
+                row = results[name]
+                self.stdout.write(
+                    f"{name:<34} p50={row['p50_ms']:>8.1f}ms  p95={row['p95_ms']:>8.1f}ms  queries={row['queries']}"
+                )
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline_path.write_text(json.dumps({
+                'generated_at': timezone.now().isoformat(),
+                'iterations': iterations,
+                'endpoints': results,
+            }, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Baseline guardado en {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'Sin baseline en {baseline_path}; usar --update-baseline para crearlo.'))
+            return
+
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8')).get('endpoints', {})
+        regressions = []
+        for name, row in results.items():
+            previous = baseline.get(name)
+            if not previous:
+                continue
+            allowed_ms = previous['p95_ms'] * (1 + options['tolerance'])
+            if row['p95_ms'] > allowed_ms and row['p95_ms'] - previous['p95_ms'] > options['min_delta_ms']:
+                regressions.append(f"{name}: p95 {row['p95_ms']:.1f}ms (baseline {previous['p95_ms']:.1f}ms)")
+            if row['queries'] > previous['queries'] + options['query_tolerance']:
+                regressions.append(f"{name}: {row['queries']} consultas (baseline {previous['queries']})")
+
+        if regressions:
+            raise CommandError('Regresiones de rendimiento:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Sin regresiones respecto del baseline'))
+
+    def _benchmark_user(self, username):
+        user, _ = get_user_model().objects.get_or_create(username=username)
+        if not (user.is_active and user.is_staff and user.is_superuser):
+            user.is_active = True
+            user.is_staff = True
+            user.is_superuser = True
+            user.set_unusable_password()
+            user.save()
+        return user
+
+    def _measure(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+        durations = []
+        queries = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = perf_counter()
+                response = client.get(url)
+                durations.append((perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url} respondio {response.status_code}')
+            queries.append(len(captured.captured_queries))
+        return {
+            'url': url,
+            'p50_ms': round(_percentile(durations, 0.5), 2),
+            'p95_ms': round(_percentile(durations, 0.95), 2),
+            'max_ms': round(max(durations), 2),
+            'queries': max(queries),
+        }
@@ -0,0 +1,102 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from statsapp.models import BankTransaction, Employee
+from statsapp.salary_services import EmployeeMatcher, _employee_matchers, _match_employee
+from statsapp.text_utils import normalize_search_text
+
+
+FIRST_NAMES = ('JUAN', 'MARIA', 'DIEGO', 'ROCIO', 'CARLOS', 'LUCIA', 'PABLO', 'SOFIA', 'MARTIN', 'VALERIA')
+LAST_NAMES = ('GOMEZ', 'PEREZ', 'FERNANDEZ', 'LOPEZ', 'DIAZ', 'MARTINEZ', 'ROMERO', 'SOSA', 'TORRES', 'RUIZ')
+
+
+def _synthetic_matchers(rng, employees, aliases_per_employee):
+    matchers = []
+    for index in range(employees):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index:04d}"
+        document_number = str(20000000 + index)
+        employee = Employee(name=name, document_type=Employee.DocumentType.DNI, document_number=document_number)
+        names = [name] + [f"{name.split()[0]} {index:04d} ALIAS{alias}" for alias in range(aliases_per_employee)]
+        for raw in names:
+            matchers.append({
+                'employee': employee,
+                'alias': raw,
+                'normalized': normalize_search_text(raw),
+                'document_number': document_number,
+                'document_identity': document_number,
+            })
+    matchers.sort(key=lambda item: len(item['normalized']), reverse=True)
+    return matchers
+
+
+def _synthetic_texts(rng, matchers, rows):
+    texts = []
+    for index in range(rows):
+        kind = index % 4
+        if kind == 0:
+            texts.append(f"TRANSFERENCIA A TERCEROS {rng.choice(matchers)['alias']}")
+        elif kind == 1:
+            texts.append(f"TRANSFERENCIA DNI {rng.choice(matchers)['document_number']}")
+        else:
+            texts.append(f"PAGO PROVEEDOR {rng.randint(1, 99999)} {rng.choice(LAST_NAMES)} SRL")
+    return texts
+
+
+def _result_key(result):
+    employee, alias = result
+    return (employee.pk if employee else None, alias)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el matcher compilado de empleados contra el recorrido lineal de alias: '
+        'verifica que den el mismo resultado y mide el tiempo de cada uno.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--synthetic', action='store_true', help='Usa empleados y textos generados en memoria.')
+        parser.add_argument('--employees', type=int, default=400)
+        parser.add_argument('--aliases-per-employee', type=int, default=3)
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['synthetic']:
+            matchers = _synthetic_matchers(rng, options['employees'], options['aliases_per_employee'])
+            texts = _synthetic_texts(rng, matchers, options['rows'])
+        else:
+            matchers = _employee_matchers()
+            texts = [
+                f"{tx.concept} {tx.description} {tx.raw_details}"
+                for tx in BankTransaction.objects.filter(amount__lt=0).order_by('-id')[:options['rows']]
+            ]
+        if not matchers or not texts:
+            raise CommandError('No hay empleados o movimientos para medir; usar --synthetic.')
+
+        started = perf_counter()
+        linear = [_match_employee(text, matchers, match_documents=True) for text in texts]
+        linear_ms = (perf_counter() - started) * 1000
+
+        started = perf_counter()
+        matcher = EmployeeMatcher(matchers)
+        build_ms = (perf_counter() - started) * 1000
+        started = perf_counter()
+        compiled = [matcher.match(text, match_documents=True) for text in texts]
+        compiled_ms = (perf_counter() - started) * 1000
+
+        mismatches = [
+            text for text, left, right in zip(texts, linear, compiled)
+            if _result_key(left) != _result_key(right)
+        ]
+        if mismatches:
+            raise CommandError(f'El matcher compilado difiere en {len(mismatches)} textos, p. ej.: {mismatches[0]}')
+
+        matched = sum(1 for employee, _ in compiled if employee)
+        self.stdout.write(f'Alias: {len(matchers)}  Textos: {len(texts)}  Con empleado: {matched}')
+        self.stdout.write(f'Lineal:    {linear_ms:>9.1f}ms')
+        self.stdout.write(f'Compilado: {compiled_ms:>9.1f}ms (+{build_ms:.1f}ms de armado)')
+        speedup = linear_ms / max(compiled_ms + build_ms, 0.001)
+        self.stdout.write(self.style.SUCCESS(f'Mismos resultados; {speedup:.1f}x mas rapido'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from statsapp.account_services import recalc_account_totals
+from statsapp.models import AccountClient, AccountClientBranchBalance
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la deuda de cuentas corrientes y la tabla de saldos por cliente y sucursal.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--client',
+            action='append',
+            dest='clients',
+            default=[],
+            help='external_id del cliente a recalcular (repetible). Sin este parametro se recalculan todos.',
+        )
+
+    def handle(self, *args, **options):
+        external_ids = options['clients']
+        if external_ids:
+            client_ids = list(AccountClient.objects.filter(external_id__in=external_ids).values_list('id', flat=True))
+            recalc_account_totals(client_ids)
+            balances = AccountClientBranchBalance.objects.filter(client_id__in=client_ids).count()
+            self.stdout.write(self.style.SUCCESS(f'Saldos recalculados para {len(client_ids)} clientes ({balances} saldos por sucursal)'))
+            return
+
+        recalc_account_totals()
+        self.stdout.write(self.style.SUCCESS(
+            f'Saldos recalculados: {AccountClientBranchBalance.objects.count()} saldos por sucursal'
+        ))
@@ -0,0 +1,61 @@
+import logging
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from statsapp.fiscal_services import process_external_events
+
+
+logger = logging.getLogger('statsapp.external_events')
+
+
+class Command(BaseCommand):
+    help = (
+        'Aplica los eventos de Getnet recibidos por webhook. Sin --loop procesa un lote; '
+        'con --loop corre como worker y revisa la bandeja cada --interval segundos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Corre indefinidamente como worker.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'EXTERNAL_EVENT_POLL_SECONDS', 2),
+            help='Segundos entre revisiones cuando la bandeja queda vacia.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'EXTERNAL_EVENT_BATCH_SIZE', 50),
+            help='Eventos por lote.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self._drain(options['batch_size'])
+            return
+        self.stdout.write(f"Worker de eventos iniciado (cada {options['interval']}s, lotes de {options['batch_size']})")
+        while True:
+            close_old_connections()
+            busy = False
+            try:
+                busy = self._drain(options['batch_size'])
+            except Exception:
+                logger.exception('Fallo el procesamiento de eventos externos')
+            # Con un lote completo puede haber mas eventos esperando: se sigue sin dormir.
+            if not busy:
+                sleep(max(options['interval'], 0.5))
+
+    def _drain(self, batch_size):
+        result = process_external_events(limit=batch_size)
+        total = result['processed'] + result['retrying'] + result['failed']
+        if result['failed']:
+            logger.warning('Eventos externos descartados tras agotar reintentos: %s', result['failed'])
+        if total:
+            self.stdout.write(
+                f"Eventos aplicados: {result['processed']}, a reintentar: {result['retrying']}, "
+                f"descartados: {result['failed']}"
+            )
+        return total >= batch_size
@@ -0,0 +1,53 @@
+import logging
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from statsapp.fiscal_services import run_next_invoicing_job
+
+
+logger = logging.getLogger('statsapp.invoicing_jobs')
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta la facturacion de cierre de mes encolada desde Facturacion. Sin --loop procesa '
+        'los jobs pendientes y termina; con --loop corre como worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Corre indefinidamente como worker.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'INVOICING_JOBS_POLL_SECONDS', 5),
+            help='Segundos entre revisiones de la cola.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            while self._run_next():
+                pass
+            return
+        self.stdout.write(f"Worker de facturacion iniciado (cada {options['interval']}s)")
+        while True:
+            close_old_connections()
+            ran = False
+            try:
+                ran = self._run_next()
+            except Exception:
+                logger.exception('Fallo la facturacion de cierre')
+            if not ran:
+                sleep(max(options['interval'], 0.5))
+
+    def _run_next(self):
+        job = run_next_invoicing_job()
+        if job is None:
+            return False
+        self.stdout.write(
+            f"Facturacion al {job.period_end}: {job.invoices_created} facturas, "
+            f"{job.invoices_authorized} autorizadas, {job.processed_groups}/{job.total_groups} clientes"
+        )
+        return True
@@ -0,0 +1,57 @@
+import logging
+from time import sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from statsapp.salary_services import run_salary_sync
+from statsapp.salary_sync import salary_sync_due
+
+
+logger = logging.getLogger('statsapp.salary_sync')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mantiene al dia los movimientos de sueldos fuera del request. Sin --loop sincroniza una vez; '
+        'con --loop corre como worker: atiende los pedidos de las importaciones y resincroniza cada --max-age segundos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Corre indefinidamente como worker.')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'SALARY_SYNC_POLL_SECONDS', 5),
+            help='Segundos entre revisiones de pedidos pendientes.',
+        )
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=getattr(settings, 'SALARY_SYNC_MAX_AGE_SECONDS', 300),
+            help='Antiguedad maxima (segundos) de la ultima sincronizacion aunque no haya pedidos.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self._sync()
+            return
+        self.stdout.write(f"Worker de sueldos iniciado (cada {options['interval']}s, max {options['max_age']}s)")
+        while True:
+            close_old_connections()
+            try:
+                if salary_sync_due(options['max_age']):
+                    self._sync()
+            except Exception:
+                logger.exception('Fallo la sincronizacion de sueldos')
+            sleep(max(options['interval'], 0.5))
+
+    def _sync(self):
+        result = run_salary_sync()
+        if result.get('skipped'):
+            logger.warning('Sincronizacion de sueldos omitida: %s', result['skipped'])
+        self.stdout.write(
+            f"Sueldos sincronizados: {result.get('created', 0)} nuevos, {result.get('updated', 0)} actualizados, "
+            f"{result.get('deleted', 0)} borrados, {result.get('scanned', 0)} filas revisadas"
+        )
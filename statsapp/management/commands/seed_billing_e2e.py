@@ -23,6 +23,7 @@ from statsapp.models import (
     Record,
     UploadBatch,
 )
+from statsapp.account_services import refresh_branch_balances
 from statsapp.salary_services import create_employee
 
 
@@ -202,4 +203,5 @@ class Command(BaseCommand):
                 payments=[],
                 meta={'e2e': True},
             )
+        refresh_branch_balances([client.id, employee_client.id])
         self.stdout.write(self.style.SUCCESS('Datos E2E de facturacion cargados'))
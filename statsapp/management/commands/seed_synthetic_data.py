@@ -0,0 +1,325 @@
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from statsapp.account_services import recalc_account_totals
+from statsapp.models import (
+    AccountClient,
+    AccountTransaction,
+    BankTransaction,
+    BankUploadBatch,
+    Branch,
+    Employee,
+    ExpenseEntry,
+    Record,
+    UploadBatch,
+    ValeImportBatch,
+    ValeImportItem,
+)
+from statsapp.salary_services import create_employee, sync_employee_movements
+from statsapp.text_utils import mentions_getnet
+from statsapp.vales_services import refresh_vale_batch_search
+
+
+FIRST_NAMES = [
+    'Ana', 'Juan', 'Maria', 'Carlos', 'Lucia', 'Diego', 'Sofia', 'Martin', 'Valeria', 'Pablo',
+    'Natalia', 'Nicolas', 'Silvina', 'Luis', 'Micaela', 'Jose', 'Pilar', 'Dario', 'Monica', 'Ivano',
+]
+LAST_NAMES = [
+    'Perez', 'Gomez', 'Rodriguez', 'Fernandez', 'Lopez', 'Martinez', 'Sosa', 'Vera', 'Farias', 'Paz',
+    'Robles', 'Mendez', 'Leal', 'Ramirez', 'Navarro', 'Vidal', 'Jauregui', 'Coscarza', 'Viglianco', 'Marta',
+]
+SECTIONS = {
+    'CARNES': ['ASADO', 'VACIO', 'MATAMBRE', 'NALGA', 'PECETO', 'MOLIDA'],
+    'POLLO': ['POLLO ENTERO', 'PECHUGA', 'MUSLO'],
+    'CERDO': ['BONDIOLA', 'PECHITO', 'CHORIZO'],
+    'ALMACEN': ['CARBON', 'SAL GRUESA', 'CHIMICHURRI'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Genera volumenes sinteticos realistas (sucursales, ventas, bancos, cuentas, vales y sueldos) para medir rendimiento.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='SYN', help='Prefijo para identificar (y limpiar) los datos generados.')
+        parser.add_argument('--branches', type=int, default=3)
+        parser.add_argument('--years', type=int, default=2)
+        parser.add_argument('--records-per-day', type=int, default=20)
+        parser.add_argument('--bank-per-day', type=int, default=12)
+        parser.add_argument('--clients', type=int, default=50000)
+        parser.add_argument('--transactions-per-client', type=int, default=4)
+        parser.add_argument('--vale-batches', type=int, default=300)
+        parser.add_argument('--vales-per-batch', type=int, default=15)
+        parser.add_argument('--employees', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--end-date', default='', help='Ultimo dia generado (YYYY-MM-DD). Por defecto hoy.')
+        parser.add_argument('--reset', action='store_true', help='Elimina los datos sinteticos previos con el mismo prefijo.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix'].strip() or 'SYN'
+        end_date = date.fromisoformat(options['end_date']) if options['end_date'] else date.today()
+        start_date = end_date - timedelta(days=365 * max(options['years'], 1))
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+        if options['reset']:
+            self._reset()
+
+        with transaction.atomic():
+            branches = self._branches(options['branches'])
+            records = self._sales(branches, days, options['records_per_day'])
+            employees = self._employees(branches, options['employees'])
+            bank_rows = self._bank(days, options['bank_per_day'], employees)
+            expenses = self._cash_salaries(branches, days, employees)
+            clients, transactions = self._accounts(
+                branches, days, options['clients'], options['transactions_per_client']
+            )
+            vale_items = self._vales(branches, days, options['vale_batches'], options['vales_per_batch'])
+            recalc_account_totals()
+
+        movements = 0
+        if employees:
+            result = sync_employee_movements()
+            movements = result.get('created', 0) + result.get('updated', 0)
+
+        self.stdout.write(self.style.SUCCESS('Datos sinteticos generados'))
+        self.stdout.write(f'Sucursales: {len(branches)}')
+        self.stdout.write(f'Dias: {len(days)} ({start_date.isoformat()} a {end_date.isoformat()})')
+        self.stdout.write(f'Registros de ventas: {records}')
+        self.stdout.write(f'Movimientos bancarios: {bank_rows}')
+        self.stdout.write(f'Gastos de sueldos en efectivo: {expenses}')
+        self.stdout.write(f'Clientes: {clients}  Movimientos de cuenta: {transactions}')
+        self.stdout.write(f'Vales: {vale_items}')
+        self.stdout.write(f'Empleados: {len(employees)}  Movimientos de sueldo: {movements}')
+
+    def _reset(self):
+        slug_prefix = self.prefix.lower()
+        ValeImportItem.objects.filter(batch__lote_id__startswith=f'{slug_prefix}-').delete()
+        ValeImportBatch.objects.filter(lote_id__startswith=f'{slug_prefix}-').delete()
+        Employee.objects.filter(name__startswith=f'{self.prefix} ').delete()
+        AccountClient.objects.filter(external_id__startswith=f'{self.prefix}-').delete()
+        ExpenseEntry.objects.filter(external_id__startswith=f'{self.prefix}-').delete()
+        BankUploadBatch.objects.filter(original_filename__startswith=f'{slug_prefix}-').delete()
+        UploadBatch.objects.filter(original_filename__startswith=f'{slug_prefix}-').delete()
+        Branch.objects.filter(slug__startswith=f'{slug_prefix}-').delete()
+        get_user_model().objects.filter(username=f'{slug_prefix}-operador').delete()
+
+    def _branches(self, count):
+        branches = []
+        for index in range(1, max(count, 1) + 1):
+            branch, _ = Branch.objects.get_or_create(
+                slug=f'{self.prefix.lower()}-sucursal-{index}',
+                defaults={'name': f'{self.prefix} Sucursal {index}'},
+            )
+            branches.append(branch)
+        return branches
+
+    def _sales(self, branches, days, per_day):
+        total = 0
+        for branch in branches:
+            batches = UploadBatch.objects.bulk_create([
+                UploadBatch(
+                    branch=branch,
+                    original_filename=f'{self.prefix.lower()}-{branch.slug}-{day.isoformat()}.csv',
+                    single_date=day,
+                    is_single_day=True,
+                )
+                for day in days
+            ], batch_size=1000)
+            rows = []
+            for batch in batches:
+                for _ in range(per_day):
+                    section = self.rng.choice(list(SECTIONS))
+                    peso = round(self.rng.uniform(0.3, 4.5), 3)
+                    rows.append(Record(
+                        batch=batch,
+                        dsc_seccion=section,
+                        nom_plu=self.rng.choice(SECTIONS[section]),
+                        peso=peso,
+                        imp=round(peso * self.rng.uniform(4000, 12000), 2),
+                    ))
+                if len(rows) >= 5000:
+                    Record.objects.bulk_create(rows, batch_size=1000)
+                    total += len(rows)
+                    rows = []
+            Record.objects.bulk_create(rows, batch_size=1000)
+            total += len(rows)
+        return total
+
+    def _bank(self, days, per_day, employees):
+        rows = []
+        total = 0
+        for bank in ('santander', 'bancon'):
+            batch = BankUploadBatch.objects.create(
+                bank=bank,
+                original_filename=f'{self.prefix.lower()}-{bank}.csv',
+                fecha_desde=days[0],
+                fecha_hasta=days[-1],
+            )
+            for day in days:
+                for _ in range(per_day):
+                    if self.rng.random() < 0.6:
+                        concept = self.rng.choice([
+                            'Transferencia recibida - Cliente mostrador',
+                            'Credito transf online banking emp - De Getnet Argentina SAU',
+                            'Deposito en efectivo',
+                        ])
+                        amount = round(self.rng.uniform(1000, 250000), 2)
+                    else:
+                        concept = self.rng.choice(['Pago proveedor', 'Debito automatico', 'Impuesto ley 25413'])
+                        amount = -round(self.rng.uniform(1000, 150000), 2)
+                    rows.append(BankTransaction(
+                        batch=batch,
+                        date=day,
+                        concept=concept,
+                        amount=amount,
+                        is_getnet=mentions_getnet(concept),
+                    ))
+                if employees and day.day in (1, 15):
+                    for employee in employees:
+                        rows.append(BankTransaction(
+                            batch=batch,
+                            date=day,
+                            concept=f'TRANSFERENCIA {employee.name}',
+                            description='Pago sueldo',
+                            amount=-round(self.rng.uniform(80000, 300000), 2),
+                        ))
+                if len(rows) >= 5000:
+                    BankTransaction.objects.bulk_create(rows, batch_size=1000)
+                    total += len(rows)
+                    rows = []
+        BankTransaction.objects.bulk_create(rows, batch_size=1000)
+        return total + len(rows)
+
+    def _employees(self, branches, count):
+        employees = []
+        for index in range(1, count + 1):
+            name = f'{self.prefix} {self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {index}'
+            employees.append(create_employee(
+                name,
+                aliases=[name.upper()],
+                branch=branches[index % len(branches)],
+                hire_date=date(2020, 1, 1),
+            ))
+        return employees
+
+    def _cash_salaries(self, branches, days, employees):
+        rows = []
+        for day in days:
+            if day.day != 10:
+                continue
+            for employee in employees:
+                rows.append(ExpenseEntry(
+                    external_id=f'{self.prefix}-SUELDO-{employee.pk.hex[:8]}-{day.isoformat()}',
+                    branch=employee.branch or branches[0],
+                    date=day,
+                    amount=Decimal(self.rng.randint(10000, 60000)),
+                    method=ExpenseEntry.Method.CASH,
+                    category='SUELDOS',
+                    subcategory=employee.name,
+                    description='Adelanto en efectivo',
+                ))
+        ExpenseEntry.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    def _accounts(self, branches, days, count, per_client):
+        clients = [
+            AccountClient(
+                external_id=f'{self.prefix}-{index:06d}',
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                phone=f'+5435840{index:05d}',
+            )
+            for index in range(1, count + 1)
+        ]
+        AccountClient.objects.bulk_create(clients, batch_size=1000)
+
+        rows = []
+        total = 0
+        recent_days = days[-120:]
+        for client in clients:
+            for tx_index in range(per_client):
+                day = self.rng.choice(recent_days if self.rng.random() < 0.7 else days)
+                original = Decimal(self.rng.randint(1500, 90000))
+                paid = self.rng.choice([Decimal('0'), original, (original / 2).quantize(Decimal('1'))])
+                if paid >= original:
+                    status = AccountTransaction.Status.PAID
+                elif paid:
+                    status = AccountTransaction.Status.PARTIAL
+                elif day < days[-1] - timedelta(days=30):
+                    status = AccountTransaction.Status.OVERDUE
+                else:
+                    status = AccountTransaction.Status.ACTIVE
+                rows.append(AccountTransaction(
+                    client=client,
+                    branch=self.rng.choice(branches),
+                    external_id=f'{client.external_id}-{tx_index}',
+                    description='Venta cuenta corriente',
+                    date=day,
+                    created_at=timezone.make_aware(datetime.combine(day, time(12, 0))),
+                    original_amount=original,
+                    paid_amount=paid,
+                    status=status,
+                ))
+            if len(rows) >= 5000:
+                AccountTransaction.objects.bulk_create(rows, batch_size=1000)
+                total += len(rows)
+                rows = []
+        AccountTransaction.objects.bulk_create(rows, batch_size=1000)
+        return len(clients), total + len(rows)
+
+    def _vales(self, branches, days, batch_count, per_batch):
+        if not batch_count:
+            return 0
+        user, _ = get_user_model().objects.get_or_create(
+            username=f'{self.prefix.lower()}-operador',
+            defaults={'is_staff': True},
+        )
+        client_ids = list(
+            AccountClient.objects.filter(external_id__startswith=f'{self.prefix}-')
+            .values_list('id', flat=True)[:5000]
+        )
+        items = []
+        batch_ids = []
+        total = 0
+        for index in range(1, batch_count + 1):
+            day = self.rng.choice(days[-180:])
+            batch = ValeImportBatch.objects.create(
+                lote_id=f'{self.prefix.lower()}-{index:06d}',
+                date=day,
+                uploaded_by=user,
+                source_filenames=[f'vales_{day.isoformat()}.jpg'],
+                meta={'branch_id': self.rng.choice(branches).id},
+            )
+            batch_total = Decimal('0')
+            for row_index in range(per_batch):
+                amount = Decimal(self.rng.randint(1000, 60000))
+                pending = not client_ids or self.rng.random() < 0.15
+                items.append(ValeImportItem(
+                    batch=batch,
+                    date=day,
+                    amount=amount,
+                    client_id=None if pending else self.rng.choice(client_ids),
+                    client_raw=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}',
+                    pending_review=pending,
+                    confidence=Decimal('0.6') if pending else Decimal('0.95'),
+                    meta={'row_index': row_index + 1},
+                ))
+                batch_total += amount
+            batch.total = batch_total
+            batch.save(update_fields=['total'])
+            batch_ids.append(batch.pk)
+            if len(items) >= 5000:
+                ValeImportItem.objects.bulk_create(items, batch_size=1000)
+                total += len(items)
+                items = []
+        ValeImportItem.objects.bulk_create(items, batch_size=1000)
+        # Igual que el import real: sin search_text los lotes no aparecen en /api/vales/lotes/?q=.
+        for offset in range(0, len(batch_ids), 200):
+            refresh_vale_batch_search(batch_ids[offset:offset + 200])
+        return total + len(items)
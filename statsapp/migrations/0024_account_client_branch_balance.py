@@ -0,0 +1,68 @@
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+
+
+def backfill_branch_balances(apps, schema_editor):
+    AccountTransaction = apps.get_model('statsapp', 'AccountTransaction')
+    AccountClientBranchBalance = apps.get_model('statsapp', 'AccountClientBranchBalance')
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    open_tx = Q(original_amount__gt=F('paid_amount'))
+    rows = (
+        AccountTransaction.objects.filter(branch__isnull=False)
+        .values('client_id', 'branch_id')
+        .annotate(
+            pending=Sum(Case(
+                When(open_tx, then=F('original_amount') - F('paid_amount')),
+                default=Value(Decimal('0')),
+                output_field=money,
+            )),
+            overdue=Count('id', filter=open_tx & Q(status='vencido')),
+            partial=Count('id', filter=open_tx & Q(status='parcial')),
+            transactions=Count('id'),
+        )
+        .order_by()
+    )
+    balances = []
+    for row in rows.iterator():
+        pending = row['pending'] or Decimal('0')
+        status = 'paid'
+        if pending > 0:
+            status = 'overdue' if row['overdue'] else 'partial' if row['partial'] else 'active'
+        balances.append(AccountClientBranchBalance(
+            client_id=row['client_id'],
+            branch_id=row['branch_id'],
+            total_debt=pending,
+            status=status,
+            transactions_count=row['transactions'],
+        ))
+    AccountClientBranchBalance.objects.bulk_create(balances, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0023_employee_branch_employeemovement_branch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountClientBranchBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_debt', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('status', models.CharField(choices=[('active', 'Activo'), ('partial', 'Parcial'), ('overdue', 'Vencido'), ('paid', 'Pagado')], default='paid', max_length=16)),
+                ('transactions_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_balances', to='statsapp.branch')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='branch_balances', to='statsapp.accountclient')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['branch', 'status'], name='statsapp_ac_branch__73b4b6_idx'), models.Index(fields=['branch', '-total_debt'], name='statsapp_ac_branch__8d2c38_idx')],
+                'unique_together': {('client', 'branch')},
+            },
+        ),
+        migrations.RunPython(backfill_branch_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def backfill_balance_counts(apps, schema_editor):
+    AccountTransaction = apps.get_model('statsapp', 'AccountTransaction')
+    AccountClientBranchBalance = apps.get_model('statsapp', 'AccountClientBranchBalance')
+
+    open_tx = Q(original_amount__gt=F('paid_amount'))
+    rows = (
+        AccountTransaction.objects.filter(branch__isnull=False)
+        .values('client_id', 'branch_id')
+        .annotate(
+            original=Sum('original_amount'),
+            paid=Sum('paid_amount'),
+            pending=Count('id', filter=open_tx),
+            overdue=Count('id', filter=open_tx & Q(status='vencido')),
+            partial=Count('id', filter=open_tx & Q(status='parcial')),
+        )
+        .order_by()
+    )
+    for row in rows.iterator():
+        AccountClientBranchBalance.objects.filter(client_id=row['client_id'], branch_id=row['branch_id']).update(
+            original_amount=row['original'] or Decimal('0'),
+            paid_amount=row['paid'] or Decimal('0'),
+            pending_count=row['pending'],
+            overdue_count=row['overdue'],
+            partial_count=row['partial'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0024_account_client_branch_balance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountclientbranchbalance',
+            name='original_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='accountclientbranchbalance',
+            name='overdue_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='accountclientbranchbalance',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='accountclientbranchbalance',
+            name='partial_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='accountclientbranchbalance',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_balance_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0025_branch_balance_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalarySyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('bank_transfer', 'Transferencia bancaria'), ('cash_expense', 'Efectivo por gastos'), ('account_current', 'Cuenta corriente')], max_length=24, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('matcher_signature', models.CharField(blank=True, max_length=64)),
+                ('rows_scanned', models.PositiveIntegerField(default=0)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('meta', models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='banktransaction',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['updated_at'], name='statsapp_ac_updated_0387c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['updated_at'], name='statsapp_ba_updated_56689c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expenseentry',
+            index=models.Index(fields=['updated_at'], name='statsapp_ex_updated_ef9099_idx'),
+        ),
+    ]
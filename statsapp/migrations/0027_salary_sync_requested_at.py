@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0026_salary_sync_watermarks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salarysyncstate',
+            name='requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0027_salary_sync_requested_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['date'], name='statsapp_ac_date_b3a61d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accounttransaction',
+            index=models.Index(fields=['branch', 'date'], name='statsapp_ac_branch__95f727_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+from statsapp.text_utils import normalize_search_text
+
+
+def fill_vale_batch_search_text(apps, schema_editor):
+    ValeImportBatch = apps.get_model('statsapp', 'ValeImportBatch')
+    ValeImportItem = apps.get_model('statsapp', 'ValeImportItem')
+
+    for batch in ValeImportBatch.objects.select_related('uploaded_by').iterator(chunk_size=500):
+        user = batch.uploaded_by
+        parts = [batch.lote_id, *(batch.source_filenames or [])]
+        if user:
+            parts.extend([user.username, user.first_name, user.last_name])
+        items = ValeImportItem.objects.filter(batch_id=batch.id).values_list(
+            'client_raw',
+            'detail',
+            'client__first_name',
+            'client__last_name',
+        )
+        for row in items:
+            parts.extend(row)
+        normalized = []
+        for part in parts:
+            value = normalize_search_text(part)
+            if value and value not in normalized:
+                normalized.append(value)
+        ValeImportBatch.objects.filter(pk=batch.pk).update(search_text=' '.join(normalized))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0028_account_transaction_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='valeimportbatch',
+            name='search_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(fill_vale_batch_search_text, migrations.RunPython.noop),
+    ]
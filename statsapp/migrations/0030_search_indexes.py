@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from statsapp.search import install_postgres_search, install_sqlite_search, uninstall_search
+
+
+def install_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        install_postgres_search(schema_editor.connection)
+    elif schema_editor.connection.vendor == 'sqlite':
+        install_sqlite_search(schema_editor.connection)
+
+
+def remove_search_indexes(apps, schema_editor):
+    uninstall_search(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0029_vale_batch_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_indexes, remove_search_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0030_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='externalevent',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='externalevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-19 09:43
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def mark_getnet_bank_transactions(apps, schema_editor):
+    BankTransaction = apps.get_model('statsapp', 'BankTransaction')
+    BankTransaction.objects.filter(
+        Q(concept__icontains='getnet') | Q(description__icontains='getnet')
+    ).update(is_getnet=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0031_external_event_retries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banktransaction',
+            name='is_getnet',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_getnet_bank_transactions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-19 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0032_bank_transaction_is_getnet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoucherSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('point_of_sale', models.PositiveIntegerField()),
+                ('voucher_type', models.PositiveIntegerField()),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('point_of_sale', 'voucher_type')},
+            },
+        ),
+    ]
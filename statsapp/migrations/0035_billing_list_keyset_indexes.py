@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-19 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0034_account_invoicing_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-issue_date', '-id'], name='statsapp_in_issue_d_b6e511_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-date', '-id'], name='statsapp_pa_date_21e4d3_idx'),
+        ),
+    ]
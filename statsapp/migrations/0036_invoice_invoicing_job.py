@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-19 10:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_invoicing_job_from_meta(apps, schema_editor):
+    Invoice = apps.get_model('statsapp', 'Invoice')
+    AccountInvoicingJob = apps.get_model('statsapp', 'AccountInvoicingJob')
+    job_ids = set(AccountInvoicingJob.objects.values_list('id', flat=True))
+    for invoice in Invoice.objects.filter(meta__has_key='invoicing_job_id').only('id', 'meta'):
+        job_id = invoice.meta.pop('invoicing_job_id')
+        invoice.invoicing_job_id = job_id if job_id in job_ids else None
+        invoice.save(update_fields=['invoicing_job', 'meta'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statsapp', '0035_billing_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='invoicing_job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoices', to='statsapp.accountinvoicingjob'),
+        ),
+        migrations.RunPython(move_invoicing_job_from_meta, migrations.RunPython.noop),
+    ]
@@ -4,7 +4,7 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
-from .text_utils import normalize_search_text
+from .text_utils import mentions_getnet, normalize_search_text
 
 
 class Branch(models.Model):
@@ -88,14 +88,22 @@ class BankTransaction(models.Model):
     description = models.TextField(blank=True)
     raw_details = models.TextField(blank=True)
     amount = models.FloatField(default=0.0)
+    # Liquidacion de Getnet; se calcula al importar para no buscar 'getnet' en el texto al resumir.
+    is_getnet = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['date']),
             models.Index(fields=['concept']),
             models.Index(fields=['batch', 'date']),
+            models.Index(fields=['updated_at']),
         ]
 
+    def save(self, *args, **kwargs):
+        self.is_getnet = mentions_getnet(self.concept, self.description)
+        super().save(*args, **kwargs)
+
 
 class AccountClient(models.Model):
     class Status(models.TextChoices):
@@ -153,7 +161,10 @@ class AccountTransaction(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['client', '-date']),
+            models.Index(fields=['date']),
+            models.Index(fields=['branch', 'date']),
             models.Index(fields=['status']),
+            models.Index(fields=['updated_at']),
         ]
 
     @property
@@ -162,6 +173,29 @@ class AccountTransaction(models.Model):
         return remaining if remaining > Decimal('0') else Decimal('0')
 
 
+class AccountClientBranchBalance(models.Model):
+    """Saldo materializado por cliente y sucursal (se recalcula junto con AccountClient.total_debt)."""
+
+    client = models.ForeignKey(AccountClient, on_delete=models.CASCADE, related_name='branch_balances')
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='account_balances')
+    total_debt = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    status = models.CharField(max_length=16, choices=AccountClient.Status.choices, default=AccountClient.Status.PAID)
+    original_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'))
+    transactions_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    overdue_count = models.PositiveIntegerField(default=0)
+    partial_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('client', 'branch')
+        indexes = [
+            models.Index(fields=['branch', 'status']),
+            models.Index(fields=['branch', '-total_debt']),
+        ]
+
+
 class SalesManualEntry(models.Model):
     batch = models.ForeignKey(UploadBatch, on_delete=models.CASCADE, related_name='sales_manual_entries')
     date = models.DateField()
@@ -237,6 +271,7 @@ class ExpenseEntry(models.Model):
             models.Index(fields=['date']),
             models.Index(fields=['category']),
             models.Index(fields=['subcategory']),
+            models.Index(fields=['updated_at']),
         ]
 
     def __str__(self):
@@ -460,6 +495,22 @@ class EmployeeMovement(models.Model):
         return f"{self.employee.name} {self.source} {self.amount}"
 
 
+class SalarySyncState(models.Model):
+    """Marca de agua por fuente de la sincronizacion de movimientos de sueldos."""
+
+    source = models.CharField(max_length=24, choices=EmployeeMovement.Source.choices, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    matcher_signature = models.CharField(max_length=64, blank=True)
+    rows_scanned = models.PositiveIntegerField(default=0)
+    requested_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    meta = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.source} {self.last_updated_at}"
+
+
 class UserActivity(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='activity')
     last_activity = models.DateTimeField(default=timezone.now)
@@ -509,6 +560,8 @@ class ValeImportBatch(models.Model):
     source_photo = models.FileField(upload_to='vales/', null=True, blank=True)
     source_filenames = models.JSONField(default=list, blank=True)
     meta = models.JSONField(default=dict, blank=True)
+    # Texto normalizado (lote, archivos, usuario, clientes y detalles de los vales) para el buscador del listado.
+    search_text = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -581,6 +634,13 @@ class Invoice(models.Model):
     provider_result = models.JSONField(default=dict, blank=True)
     error_message = models.TextField(blank=True)
     meta = models.JSONField(default=dict, blank=True)
+    invoicing_job = models.ForeignKey(
+        'AccountInvoicingJob',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='invoices',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -592,6 +652,7 @@ class Invoice(models.Model):
             models.Index(fields=['client', '-issue_date']),
             models.Index(fields=['branch', '-issue_date']),
             models.Index(fields=['external_reference']),
+            models.Index(fields=['-issue_date', '-id']),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -606,6 +667,21 @@ class Invoice(models.Model):
         return f"{self.get_source_display()} {number} - {self.total_amount}"
 
 
+class VoucherSequence(models.Model):
+    """Ultimo numero de comprobante usado por punto de venta y tipo; se bloquea al numerar."""
+
+    point_of_sale = models.PositiveIntegerField()
+    voucher_type = models.PositiveIntegerField()
+    last_number = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('point_of_sale', 'voucher_type')
+
+    def __str__(self):
+        return f"PV {self.point_of_sale} tipo {self.voucher_type}: {self.last_number}"
+
+
 class InvoiceLine(models.Model):
     invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='lines')
     description = models.CharField(max_length=255)
@@ -643,6 +719,47 @@ class InvoiceAccountTransaction(models.Model):
         ]
 
 
+class AccountInvoicingJob(models.Model):
+    """Facturacion de cierre de mes de todas las cuentas corrientes; la ejecuta el worker."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'En cola'
+        RUNNING = 'running', 'En curso'
+        DONE = 'done', 'Terminado'
+        ERROR = 'error', 'Error'
+
+    period_end = models.DateField()
+    branch = models.ForeignKey(Branch, on_delete=models.SET_NULL, null=True, blank=True, related_name='invoicing_jobs')
+    authorize = models.BooleanField(default=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    total_groups = models.PositiveIntegerField(default=0)
+    processed_groups = models.PositiveIntegerField(default=0)
+    invoices_created = models.PositiveIntegerField(default=0)
+    invoices_authorized = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0'))
+    error_message = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='invoicing_jobs',
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Facturacion al {self.period_end} ({self.status})"
+
+
 class GetnetTerminal(models.Model):
     code = models.CharField(max_length=32, unique=True)
     branch = models.ForeignKey(
@@ -724,6 +841,7 @@ class Payment(models.Model):
             models.Index(fields=['invoice']),
             models.Index(fields=['terminal', '-date']),
             models.Index(fields=['branch', '-date']),
+            models.Index(fields=['-date', '-id']),
         ]
 
     def __str__(self):
@@ -744,6 +862,9 @@ class ExternalEvent(models.Model):
     payload = models.JSONField(default=dict, blank=True)
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.RECEIVED)
     error_message = models.TextField(blank=True)
+    # Reintentos del worker: RECEIVED con next_attempt_at futuro espera backoff; ERROR agoto los intentos.
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
     processed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -0,0 +1,155 @@
+import json
+import logging
+from collections import Counter, deque
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger('statsapp.request_metrics')
+
+_STATS_LOCK = Lock()
+_ENDPOINT_STATS = {}
+_RECENT_SAMPLES = 500
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.statement_time = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.statements[sql] += 1
+            self.statement_time[sql] += elapsed
+
+    def top_repeated(self, limit):
+        return [
+            {'sql': sql[:500], 'count': count, 'ms': round(self.statement_time[sql] * 1000, 2)}
+            for sql, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+
+def record_endpoint(key, total_ms, db_ms, queries, slow):
+    with _STATS_LOCK:
+        entry = _ENDPOINT_STATS.get(key)
+        if entry is None:
+            entry = _ENDPOINT_STATS[key] = {
+                'requests': 0,
+                'slow_requests': 0,
+                'total_ms': 0.0,
+                'db_ms': 0.0,
+                'queries': 0,
+                'max_ms': 0.0,
+                'max_queries': 0,
+                'recent_ms': deque(maxlen=_RECENT_SAMPLES),
+            }
+        entry['requests'] += 1
+        entry['slow_requests'] += 1 if slow else 0
+        entry['total_ms'] += total_ms
+        entry['db_ms'] += db_ms
+        entry['queries'] += queries
+        entry['max_ms'] = max(entry['max_ms'], total_ms)
+        entry['max_queries'] = max(entry['max_queries'], queries)
+        entry['recent_ms'].append(total_ms)
+
+
+def endpoint_stats():
+    with _STATS_LOCK:
+        snapshot = {key: dict(entry, recent_ms=list(entry['recent_ms'])) for key, entry in _ENDPOINT_STATS.items()}
+    rows = []
+    for key, entry in snapshot.items():
+        requests = entry['requests'] or 1
+        rows.append({
+            'endpoint': key,
+            'requests': entry['requests'],
+            'slow_requests': entry['slow_requests'],
+            'avg_ms': round(entry['total_ms'] / requests, 2),
+            'p50_ms': round(_percentile(entry['recent_ms'], 0.5), 2),
+            'p95_ms': round(_percentile(entry['recent_ms'], 0.95), 2),
+            'max_ms': round(entry['max_ms'], 2),
+            'avg_db_ms': round(entry['db_ms'] / requests, 2),
+            'avg_queries': round(entry['queries'] / requests, 2),
+            'max_queries': entry['max_queries'],
+        })
+    rows.sort(key=lambda row: row['avg_ms'] * row['requests'], reverse=True)
+    return rows
+
+
+def reset_endpoint_stats():
+    with _STATS_LOCK:
+        _ENDPOINT_STATS.clear()
+
+
+class RequestMetricsMiddleware:
+    """Mide consultas, tiempo de base y tiempo Python por request (log, Server-Timing y stats por endpoint)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _setting('REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        started = perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total_ms = (perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+        python_ms = max(total_ms - db_ms, 0.0)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries"',
+            f'app;dur={python_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        route = f'/{match.route}' if match is not None and match.route else None
+        slow = (
+            total_ms >= _setting('REQUEST_METRICS_SLOW_MS', 1000)
+            or recorder.count >= _setting('REQUEST_METRICS_SLOW_QUERIES', 50)
+        )
+        payload = {
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 2),
+            'python_ms': round(python_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        if slow:
+            payload['top_sql'] = recorder.top_repeated(_setting('REQUEST_METRICS_TOP_SQL', 5))
+            logger.warning('slow_request %s', json.dumps(payload))
+        else:
+            logger.debug('request %s', json.dumps(payload))
+
+        if route:
+            record_endpoint(f'{request.method} {route}', total_ms, db_ms, recorder.count, slow)
+        return response
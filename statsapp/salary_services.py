@@ -1,12 +1,15 @@
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import hashlib
 import re
 from threading import Lock
 from time import sleep
 
+from django.conf import settings
 from django.db import OperationalError, transaction
-from django.db.models import F, Max, Q, Sum
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, Now
 from django.utils import timezone
 
 from .models import (
@@ -20,13 +23,20 @@ from .models import (
     EmployeeRemuneration,
     ExpenseEntry,
     ExpenseSubcategory,
+    SalarySyncState,
 )
+from .account_services import OPEN_TRANSACTION, recalc_account_totals
+from .salary_sync import salary_sync_freshness
 from .text_utils import normalize_search_text
 
 
 SALARY_CATEGORY = 'SUELDOS'
 _SYNC_LOCK = Lock()
 _SYNC_RETRY_DELAYS = (0.05, 0.15, 0.3)
+_UNMATCHED_SAMPLE_SIZE = 20
+# Subirlo fuerza una pasada completa de todas las fuentes (p. ej. al cambiar lo que se guarda en el estado).
+_SYNC_STATE_VERSION = 2
+_DOCUMENT_PATTERN = re.compile(r'(?<!\d)(?:\d[.\-\s]?){6,10}\d(?!\d)')
 MONTH_LABELS = (
     '', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
     'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre',
@@ -264,14 +274,8 @@ def _latest_bank_dates():
     return dates
 
 
-def _salary_source_diagnostics(start_date, end_date, branch_id=None, limit=100):
+def _salary_source_periods(start_date, end_date, branch_id=None):
     bank_period = BankTransaction.objects.filter(date__gte=start_date, date__lte=end_date)
-    bank_candidates = (
-        bank_period
-        .filter(amount__lt=0, employee_movement__isnull=True)
-        .filter(Q(concept__icontains='transfer') | Q(description__icontains='transfer'))
-        .select_related('batch')
-    )
     cash_period = ExpenseEntry.objects.filter(
         date__gte=start_date,
         date__lte=end_date,
@@ -279,7 +283,6 @@ def _salary_source_diagnostics(start_date, end_date, branch_id=None, limit=100):
     )
     if branch_id:
         cash_period = cash_period.filter(branch_id=branch_id)
-    cash_candidates = cash_period.filter(employee_movement__isnull=True)
     account_period = AccountTransaction.objects.filter(
         date__gte=start_date,
         date__lte=end_date,
@@ -287,8 +290,40 @@ def _salary_source_diagnostics(start_date, end_date, branch_id=None, limit=100):
     )
     if branch_id:
         account_period = account_period.filter(branch_id=branch_id)
+    return bank_period, cash_period, account_period
+
+
+def _salary_source_counts(start_date, end_date, branch_id=None):
+    """Conteos baratos de las fuentes del periodo; alimentan las alertas del tablero."""
+    bank_period, cash_period, account_period = _salary_source_periods(start_date, end_date, branch_id)
+    bank_counts = bank_period.aggregate(total=Count('id'), outgoing=Count('id', filter=Q(amount__lt=0)))
+    return {
+        'active_employees': Employee.objects.filter(active=True, **({'branch_id': branch_id} if branch_id else {})).count(),
+        'bank_transactions': bank_counts['total'],
+        'bank_outgoing': bank_counts['outgoing'],
+        'salary_cash_expenses': cash_period.count(),
+        'account_current_transactions': account_period.count(),
+        'latest_bank_dates': _latest_bank_dates(),
+    }
+
+
+def _salary_unmatched(start_date, end_date, branch_id=None, limit=100):
+    """
+    Filas del periodo que podrian ser sueldos y no tienen movimiento asignado: anti-join contra
+    EmployeeMovement (FKs de origen unicas) sobre los indices por fecha de cada fuente.
+    """
+    bank_period, cash_period, account_period = _salary_source_periods(start_date, end_date, branch_id)
+    bank_candidates = (
+        bank_period
+        .filter(amount__lt=0, employee_movement__isnull=True)
+        .filter(Q(concept__icontains='transfer') | Q(description__icontains='transfer'))
+        .select_related('batch')
+    )
+    cash_candidates = cash_period.filter(employee_movement__isnull=True)
+    # Solo saldos abiertos de clientes que no son empleados (activos o dados de baja), igual que el sync.
     account_candidates = (
         account_period
+        .filter(OPEN_TRANSACTION)
         .filter(employee_movement__isnull=True, client__employee_profile__isnull=True)
         .select_related('client')
     )
@@ -341,20 +376,35 @@ def _salary_source_diagnostics(start_date, end_date, branch_id=None, limit=100):
         EmployeeMovement.Source.ACCOUNT_CURRENT: account_candidates.count(),
     }
     return {
-        'sources': {
-            'active_employees': Employee.objects.filter(active=True, **({'branch_id': branch_id} if branch_id else {})).count(),
-            'bank_transactions': bank_period.count(),
-            'bank_outgoing': bank_period.filter(amount__lt=0).count(),
-            'salary_cash_expenses': cash_period.count(),
-            'account_current_transactions': account_period.count(),
-            'latest_bank_dates': _latest_bank_dates(),
-        },
-        'unmatched': {
-            'count': sum(pending_counts.values()),
-            'counts': pending_counts,
-            'items': items[:limit],
-            'truncated': sum(pending_counts.values()) > limit,
+        'count': sum(pending_counts.values()),
+        'counts': pending_counts,
+        'items': items[:limit],
+        'truncated': sum(pending_counts.values()) > limit,
+    }
+
+
+def salary_sync_diagnostics():
+    """Resultado del matcher en la ultima pasada del worker, guardado junto a la marca de agua de cada fuente."""
+    return {
+        state.source: {
+            'synced_at': state.synced_at.isoformat() if state.synced_at else None,
+            'rows_scanned': state.rows_scanned,
+            'last_pass': (state.meta or {}).get('last_pass'),
+        }
+        for state in SalarySyncState.objects.order_by('source')
+    }
+
+
+def salary_source_diagnostics(start_date, end_date, branch_id=None, limit=100):
+    return {
+        'period': {
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
         },
+        'branch_id': branch_id,
+        'sources': _salary_source_counts(start_date, end_date, branch_id=branch_id),
+        'unmatched': _salary_unmatched(start_date, end_date, branch_id=branch_id, limit=limit),
+        'sync_state': salary_sync_diagnostics(),
     }
 
 
@@ -362,7 +412,7 @@ def _employee_matchers():
     employees = list(
         Employee.objects
         .filter(active=True)
-        .select_related('account_client')
+        .select_related('account_client', 'branch')
         .prefetch_related('aliases')
         .order_by('name')
     )
@@ -392,8 +442,7 @@ def _employee_matchers():
 
 def _document_identities_in_text(text):
     identities = set()
-    pattern = r'(?<!\d)(?:\d[.\-\s]?){6,10}\d(?!\d)'
-    for match in re.finditer(pattern, str(text or '')):
+    for match in _DOCUMENT_PATTERN.finditer(str(text or '')):
         number = re.sub(r'\D', '', match.group(0))
         if len(number) in {7, 8}:
             identities.add(number.lstrip('0') or '0')
@@ -403,6 +452,7 @@ def _document_identities_in_text(text):
 
 
 def _match_employee(text, matchers, match_documents=False):
+    # Recorrido lineal de referencia; la sincronizacion usa EmployeeMatcher.
     if match_documents:
         text_identities = _document_identities_in_text(text)
         document_matches = {}
@@ -428,16 +478,103 @@ def _match_employee(text, matchers, match_documents=False):
     return None, ''
 
 
-def _movement_branch(employee, existing=None):
+class EmployeeMatcher:
+    """Matcher compilado una vez por sincronizacion (Aho-Corasick sobre alias normalizados).
+
+    Devuelve lo mismo que `_match_employee`: identidad documental unica primero y,
+    si no, el alias mas largo contenido en el texto (a igual largo, el primero de
+    `_employee_matchers()`), pero recorriendo cada texto una sola vez.
+    """
+
+    def __init__(self, matchers):
+        self.matchers = matchers
+        self._documents = defaultdict(dict)
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+        for priority, item in enumerate(matchers):
+            identity = item.get('document_identity') or ''
+            if identity:
+                employee = item['employee']
+                self._documents[identity][str(employee.pk)] = (
+                    employee,
+                    f"{employee.get_document_type_display()} {item['document_number']}",
+                )
+            self._add(item['normalized'], priority)
+        self._link()
+
+    def _add(self, pattern, priority):
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+                self._goto[node][char] = child
+            node = child
+        if self._best[node] is None or priority < self._best[node]:
+            self._best[node] = priority
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+                queue.append(child)
+
+    def _best_alias(self, normalized_text):
+        goto, fail, best_by_node = self._goto, self._fail, self._best
+        node = 0
+        best = None
+        for char in normalized_text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            candidate = best_by_node[node]
+            if candidate is not None and (best is None or candidate < best):
+                best = candidate
+                if best == 0:
+                    break
+        return best
+
+    def match(self, text, match_documents=False):
+        if match_documents and self._documents:
+            document_matches = {}
+            for identity in _document_identities_in_text(text):
+                document_matches.update(self._documents.get(identity, {}))
+            if len(document_matches) == 1:
+                return next(iter(document_matches.values()))
+        normalized_text = normalize_search_text(text)
+        if not normalized_text:
+            return None, ''
+        best = self._best_alias(normalized_text)
+        if best is None:
+            return None, ''
+        item = self.matchers[best]
+        return item['employee'], item['alias']
+
+
+def _movement_branch(employee, existing=None, default_branch=None):
     if existing and existing.branch_id:
         return existing.branch
-    return employee.branch or default_employee_branch()
+    if employee.branch_id:
+        return employee.branch
+    return default_branch or default_employee_branch()
 
 
-def _movement_defaults(employee, source, movement_date, amount, description, alias, existing=None):
+def _movement_defaults(employee, source, movement_date, amount, description, alias, existing=None, default_branch=None):
     return {
         'employee': employee,
-        'branch': _movement_branch(employee, existing),
+        'branch': _movement_branch(employee, existing, default_branch),
         'source': source,
         'status': EmployeeMovement.Status.AUTO,
         'date': movement_date,
@@ -463,7 +600,14 @@ def _account_deduction_values(account_transaction, discount_percent):
     return gross_amount, percent, discount_amount, net_amount
 
 
-def _account_movement_defaults(employee, account_transaction, alias, status=EmployeeMovement.Status.AUTO, existing=None):
+def _account_movement_defaults(
+    employee,
+    account_transaction,
+    alias,
+    status=EmployeeMovement.Status.AUTO,
+    existing=None,
+    default_branch=None,
+):
     gross_amount, percent, discount_amount, net_amount = _account_deduction_values(
         account_transaction,
         employee.account_discount_percent,
@@ -476,6 +620,7 @@ def _account_movement_defaults(employee, account_transaction, alias, status=Empl
         description=f"Cuenta corriente: {account_transaction.description or account_transaction.external_id}",
         alias=alias,
         existing=existing,
+        default_branch=default_branch,
     )
     defaults.update({
         'status': status,
@@ -489,24 +634,204 @@ def _account_movement_defaults(employee, account_transaction, alias, status=Empl
     return defaults
 
 
-def _sync_employee_movements_once(start_date, end_date):
-    matchers = _employee_matchers()
-    created = 0
-    updated = 0
+def _matcher_signature():
+    """Huella de empleados, alias y clientes vinculados: si cambia, las fuentes se reprocesan completas."""
+    employees = Employee.objects.aggregate(total=Count('id'), updated=Max('updated_at'))
+    aliases = EmployeeAlias.objects.aggregate(total=Count('id'), updated=Max('updated_at'))
+    clients = AccountClient.objects.filter(employee_profile__isnull=False).aggregate(updated=Max('updated_at'))
+    raw = '|'.join(str(value) for value in (
+        _SYNC_STATE_VERSION,
+        employees['total'],
+        employees['updated'],
+        aliases['total'],
+        aliases['updated'],
+        clients['updated'],
+    ))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _sync_states(signature):
+    """
+    Bloquea el estado de las fuentes. sync_started_at es la hora de la base al tomar el lock y
+    se guarda como synced_at: un pedido que llega durante el sync queda con requested_at posterior.
+    """
+    states = {
+        state.source: state
+        for state in SalarySyncState.objects.select_for_update().annotate(sync_started_at=Now())
+    }
+    for source in EmployeeMovement.Source.values:
+        state = states.get(source)
+        if state is None:
+            state, _ = SalarySyncState.objects.get_or_create(source=source)
+            state.sync_started_at = None
+            states[source] = state
+        if state.matcher_signature != signature:
+            # Cambiaron empleados o alias: lo ya procesado puede matchear distinto.
+            state.last_id = 0
+            state.last_updated_at = None
+    return states
+
+
+def _source_watermark(model, with_id=True):
+    aggregates = {'updated': Max('updated_at')}
+    if with_id:
+        aggregates['last_id'] = Max('id')
+    row = model.objects.aggregate(**aggregates)
+    return row.get('last_id') or 0, row['updated']
+
+
+def _changed_since(qs, state, with_id=True):
+    """Filas nuevas o modificadas desde la ultima marca de agua de la fuente."""
+    if state.last_updated_at is None and not state.last_id:
+        return qs
+    overlap = timedelta(seconds=getattr(settings, 'SALARY_SYNC_OVERLAP_SECONDS', 120))
+    changed = Q()
+    if with_id:
+        changed |= Q(id__gt=state.last_id)
+    if state.last_updated_at is not None:
+        # Solapamiento para no perder filas confirmadas tarde con un updated_at anterior.
+        changed |= Q(updated_at__gt=state.last_updated_at - overlap)
+    return qs.filter(changed)
+
+
+def _new_pass(state):
+    return {
+        'full': not state.last_id and state.last_updated_at is None,
+        'scanned': 0,
+        'matched': 0,
+        'unmatched': 0,
+        'unmatched_sample': [],
+    }
 
-    for tx in (
-        BankTransaction.objects
-        .select_related('batch')
-        .filter(date__gte=start_date, date__lte=end_date, amount__lt=0)
-    ):
-        employee, alias = _match_employee(
+
+def _record_pass(stats, employee, source_id, movement_date, amount, description):
+    """Cuenta el resultado del matcher para la fila; guarda una muestra acotada de las no asignadas."""
+    if employee:
+        stats['matched'] += 1
+        return
+    stats['unmatched'] += 1
+    if len(stats['unmatched_sample']) < _UNMATCHED_SAMPLE_SIZE:
+        stats['unmatched_sample'].append({
+            'source_id': str(source_id),
+            'date': movement_date.isoformat() if movement_date else None,
+            'amount': abs(float(amount or 0)),
+            'description': (description or '')[:200],
+        })
+
+
+def _advance_state(state, signature, watermark, stats, now):
+    last_id, last_updated_at = watermark
+    now = state.sync_started_at or now
+    state.last_id = max(state.last_id, last_id)
+    if last_updated_at is not None:
+        state.last_updated_at = max(state.last_updated_at or last_updated_at, last_updated_at)
+    state.matcher_signature = signature
+    state.rows_scanned = stats['scanned']
+    state.synced_at = now
+    # Solo contadores y una muestra acotada; las filas sin empleado se consultan en _salary_unmatched.
+    meta = {key: value for key, value in (state.meta or {}).items() if key != 'unmatched'}
+    state.meta = {**meta, 'last_pass': stats}
+    # Sin requested_at: no pisar un pedido registrado mientras corria el sync.
+    state.save(update_fields=['last_id', 'last_updated_at', 'matcher_signature', 'rows_scanned', 'synced_at', 'meta'])
+
+
+_MOVEMENT_SYNC_FIELDS = (
+    'employee', 'branch', 'source', 'status', 'date', 'amount', 'description', 'matched_alias',
+    'gross_amount', 'discount_percent', 'discount_amount', 'deduction_status',
+    'deduction_confirmed_by', 'deduction_confirmed_at',
+)
+
+
+def _existing_movements(source_field, source_qs):
+    """Movimientos ya generados para las filas de origen, indexados por la FK de origen (una consulta)."""
+    movements = (
+        EmployeeMovement.objects
+        .select_related('branch')
+        .filter(**{f'{source_field}__in': source_qs.order_by().values('pk')})
+    )
+    return {getattr(movement, f'{source_field}_id'): movement for movement in movements}
+
+
+class _MovementBatch:
+    """Acumula altas, cambios y bajas de movimientos para escribirlos en bloque al final del sync."""
+
+    def __init__(self):
+        self.to_create = []
+        self.to_update = []
+        self.to_delete = []
+
+    def save(self, movement, source_field, source_obj, defaults):
+        if movement is None:
+            self.to_create.append(EmployeeMovement(**{source_field: source_obj}, **defaults))
+            return
+        changed = False
+        for name, value in defaults.items():
+            field = EmployeeMovement._meta.get_field(name)
+            if field.is_relation:
+                current = getattr(movement, field.attname)
+                desired = value.pk if value is not None else None
+            else:
+                current = getattr(movement, name)
+                desired = value
+            if current != desired:
+                setattr(movement, name, value)
+                changed = True
+        if changed:
+            self.to_update.append(movement)
+
+    def delete(self, movement):
+        self.to_delete.append(movement.pk)
+
+    def flush(self):
+        for offset in range(0, len(self.to_delete), 500):
+            EmployeeMovement.objects.filter(pk__in=self.to_delete[offset:offset + 500]).delete()
+        if self.to_create:
+            EmployeeMovement.objects.bulk_create(self.to_create, batch_size=500)
+        if self.to_update:
+            now = timezone.now()
+            for movement in self.to_update:
+                movement.updated_at = now
+            EmployeeMovement.objects.bulk_update(
+                self.to_update,
+                list(_MOVEMENT_SYNC_FIELDS) + ['updated_at'],
+                batch_size=500,
+            )
+        return {
+            'created': len(self.to_create),
+            'updated': len(self.to_update),
+            'deleted': len(self.to_delete),
+        }
+
+
+def _sync_employee_movements_once():
+    signature = _matcher_signature()
+    states = _sync_states(signature)
+    watermarks = {
+        EmployeeMovement.Source.BANK_TRANSFER: _source_watermark(BankTransaction),
+        EmployeeMovement.Source.CASH_EXPENSE: _source_watermark(ExpenseEntry, with_id=False),
+        EmployeeMovement.Source.ACCOUNT_CURRENT: _source_watermark(AccountTransaction),
+    }
+    passes = {source: _new_pass(state) for source, state in states.items()}
+    matcher = EmployeeMatcher(_employee_matchers())
+    default_branch = default_employee_branch()
+    batch = _MovementBatch()
+
+    bank_transactions = _changed_since(
+        BankTransaction.objects.select_related('batch').filter(amount__lt=0),
+        states[EmployeeMovement.Source.BANK_TRANSFER],
+    )
+    existing_by_source = _existing_movements('bank_transaction', bank_transactions)
+    stats = passes[EmployeeMovement.Source.BANK_TRANSFER]
+    for tx in bank_transactions:
+        stats['scanned'] += 1
+        employee, alias = matcher.match(
             f"{tx.concept} {tx.description} {tx.raw_details}",
-            matchers,
             match_documents=True,
         )
+        _record_pass(stats, employee, tx.id, tx.date, tx.amount, _bank_movement_description(tx))
         if not employee:
             continue
-        existing = EmployeeMovement.objects.select_related('branch').filter(bank_transaction=tx).first()
+        existing = existing_by_source.get(tx.id)
         defaults = _movement_defaults(
             employee=employee,
             source=EmployeeMovement.Source.BANK_TRANSFER,
@@ -515,27 +840,33 @@ def _sync_employee_movements_once(start_date, end_date):
             description=_bank_movement_description(tx),
             alias=alias,
             existing=existing,
+            default_branch=default_branch,
         )
-        _, was_created = EmployeeMovement.objects.update_or_create(
-            bank_transaction=tx,
-            defaults=defaults,
-        )
-        created += 1 if was_created else 0
-        updated += 0 if was_created else 1
+        batch.save(existing, 'bank_transaction', tx, defaults)
 
-    salary_expenses = (
-        ExpenseEntry.objects
-        .filter(date__gte=start_date, date__lte=end_date)
-        .filter(Q(category__iexact=SALARY_CATEGORY) | Q(method=ExpenseEntry.Method.CASH))
+    salary_expenses = _changed_since(
+        ExpenseEntry.objects.filter(Q(category__iexact=SALARY_CATEGORY) | Q(method=ExpenseEntry.Method.CASH)),
+        states[EmployeeMovement.Source.CASH_EXPENSE],
+        with_id=False,
     )
+    existing_by_source = _existing_movements('expense_entry', salary_expenses)
+    stats = passes[EmployeeMovement.Source.CASH_EXPENSE]
     for expense in salary_expenses:
-        employee, alias = _match_employee(
-            f"{expense.category} {expense.subcategory} {expense.description}",
-            matchers,
-        )
+        stats['scanned'] += 1
+        employee, alias = matcher.match(f"{expense.category} {expense.subcategory} {expense.description}")
+        is_salary = (expense.category or '').upper() == SALARY_CATEGORY
+        if employee or is_salary:
+            _record_pass(
+                stats,
+                employee,
+                expense.id,
+                expense.date,
+                expense.amount,
+                f"{expense.method}: {expense.subcategory or expense.description}",
+            )
         if not employee:
             continue
-        existing = EmployeeMovement.objects.select_related('branch').filter(expense_entry=expense).first()
+        existing = existing_by_source.get(expense.id)
         defaults = _movement_defaults(
             employee=employee,
             source=EmployeeMovement.Source.CASH_EXPENSE,
@@ -544,191 +875,206 @@ def _sync_employee_movements_once(start_date, end_date):
             description=f"{expense.method}: {expense.subcategory or expense.description}",
             alias=alias,
             existing=existing,
+            default_branch=default_branch,
         )
-        _, was_created = EmployeeMovement.objects.update_or_create(
-            expense_entry=expense,
-            defaults=defaults,
-        )
-        created += 1 if was_created else 0
-        updated += 0 if was_created else 1
-
-    pending_account_movements = (
-        EmployeeMovement.objects
-        .select_related('account_transaction')
-        .filter(
-            source=EmployeeMovement.Source.ACCOUNT_CURRENT,
-            date__gte=start_date,
-            date__lte=end_date,
-        )
-        .exclude(deduction_status=EmployeeMovement.DeductionStatus.CONFIRMED)
-    )
-    for movement in pending_account_movements:
-        if not movement.account_transaction or movement.account_transaction.remaining_amount <= Decimal('0'):
-            movement.delete()
+        batch.save(existing, 'expense_entry', expense, defaults)
 
-    account_transactions = (
+    # Abiertas, o ya saldadas que todavia tienen un descuento pendiente para borrar.
+    account_transactions = _changed_since(
         AccountTransaction.objects
         .select_related('client', 'branch')
-        .filter(date__gte=start_date, date__lte=end_date)
-        .filter(original_amount__gt=F('paid_amount'))
+        .filter(date__isnull=False)
+        .filter(OPEN_TRANSACTION | Q(employee_movement__isnull=False)),
+        states[EmployeeMovement.Source.ACCOUNT_CURRENT],
     )
+    existing_by_source = _existing_movements('account_transaction', account_transactions)
     employee_by_client = {
         employee.account_client_id: employee
-        for employee in Employee.objects.filter(active=True, account_client__isnull=False)
+        for employee in (
+            Employee.objects
+            .filter(active=True, account_client__isnull=False)
+            .select_related('account_client', 'branch')
+        )
     }
+    stats = passes[EmployeeMovement.Source.ACCOUNT_CURRENT]
     for tx in account_transactions:
+        stats['scanned'] += 1
+        existing = existing_by_source.get(tx.id)
+        if existing and existing.deduction_status == EmployeeMovement.DeductionStatus.CONFIRMED:
+            continue
+        if tx.remaining_amount <= Decimal('0'):
+            if existing:
+                batch.delete(existing)
+            continue
         employee = employee_by_client.get(tx.client_id)
         alias = employee.account_client.full_name if employee and employee.account_client else ''
         if not employee:
-            employee, alias = _match_employee(f"{tx.client.full_name if tx.client else ''} {tx.description}", matchers)
+            employee, alias = matcher.match(f"{tx.client.full_name if tx.client else ''} {tx.description}")
+        _record_pass(stats, employee, tx.external_id, tx.date, tx.original_amount, tx.description)
         if not employee:
             continue
-        existing = EmployeeMovement.objects.select_related('branch').filter(account_transaction=tx).first()
-        if existing and existing.deduction_status == EmployeeMovement.DeductionStatus.CONFIRMED:
-            continue
-        defaults = _account_movement_defaults(employee, tx, alias, existing=existing)
-        _, was_created = EmployeeMovement.objects.update_or_create(
-            account_transaction=tx,
-            defaults=defaults,
-        )
-        created += 1 if was_created else 0
-        updated += 0 if was_created else 1
+        defaults = _account_movement_defaults(employee, tx, alias, existing=existing, default_branch=default_branch)
+        batch.save(existing, 'account_transaction', tx, defaults)
 
-    return {'created': created, 'updated': updated}
+    result = batch.flush()
+    now = timezone.now()
+    for source, state in states.items():
+        _advance_state(state, signature, watermarks[source], passes[source], now)
+    result['scanned'] = sum(stats['scanned'] for stats in passes.values())
+    return result
 
 
-def sync_employee_movements(start_date, end_date):
-    # A failed source must not leave the month partially synchronized.
+def sync_employee_movements():
+    """Sincroniza solo las filas de origen nuevas o modificadas desde la ultima marca de agua."""
+    # A failed source must not leave the sync partially applied nor advance the watermarks.
     with transaction.atomic():
-        return _sync_employee_movements_once(start_date, end_date)
+        return _sync_employee_movements_once()
 
 
-def _sync_employee_movements_with_retry(start_date, end_date):
+def _sync_employee_movements_with_retry():
     for attempt in range(len(_SYNC_RETRY_DELAYS) + 1):
         try:
-            return sync_employee_movements(start_date, end_date)
+            return sync_employee_movements()
         except OperationalError:
             if attempt >= len(_SYNC_RETRY_DELAYS):
                 raise
             sleep(_SYNC_RETRY_DELAYS[attempt])
 
 
-def salaries_summary(start_date, end_date, sync=True, branch_id=None):
-    employee_sync = ensure_salary_category_employees()
-    if sync:
-        with _SYNC_LOCK:
-            try:
-                sync_result = _sync_employee_movements_with_retry(start_date, end_date)
-            except OperationalError as exc:
-                sync_result = {'created': 0, 'updated': 0, 'skipped': str(exc)}
-    else:
-        sync_result = {'created': 0, 'updated': 0}
-    qs = (
-        EmployeeMovement.objects
-        .select_related('employee__branch', 'branch', 'bank_transaction', 'expense_entry', 'account_transaction__branch')
-        .filter(
-            date__gte=start_date,
-            date__lte=end_date,
-            employee__active=True,
-        )
+def run_salary_sync():
+    """Sincronizacion serializada con reintentos; la usan el worker y los pedidos explicitos con sync=1."""
+    with _SYNC_LOCK:
+        try:
+            return _sync_employee_movements_with_retry()
+        except OperationalError as exc:
+            return {'created': 0, 'updated': 0, 'skipped': str(exc)}
+
+
+_SOURCE_KEYS = (
+    EmployeeMovement.Source.BANK_TRANSFER,
+    EmployeeMovement.Source.CASH_EXPENSE,
+    EmployeeMovement.Source.ACCOUNT_CURRENT,
+)
+_ACCOUNT_MOVEMENT = Q(source=EmployeeMovement.Source.ACCOUNT_CURRENT)
+_CONFIRMED_MOVEMENT = Q(deduction_status=EmployeeMovement.DeductionStatus.CONFIRMED)
+
+
+def _period_movements(start_date, end_date, branch_id=None):
+    qs = EmployeeMovement.objects.filter(
+        date__gte=start_date,
+        date__lte=end_date,
+        employee__active=True,
     )
     if branch_id:
         qs = qs.filter(branch_id=branch_id)
-    totals = {
-        EmployeeMovement.Source.BANK_TRANSFER: Decimal('0'),
-        EmployeeMovement.Source.CASH_EXPENSE: Decimal('0'),
-        EmployeeMovement.Source.ACCOUNT_CURRENT: Decimal('0'),
+    return qs
+
+
+def _money(value):
+    return float(value or 0)
+
+
+def salary_movements_page(start_date, end_date, branch_id=None, employee_id=None, source=None, search='', limit=None, offset=0):
+    """Detalle de movimientos del periodo, filtrado y paginado en SQL."""
+    qs = _period_movements(start_date, end_date, branch_id)
+    if employee_id:
+        qs = qs.filter(employee_id=employee_id)
+    if source:
+        qs = qs.filter(source=source)
+    search = (search or '').strip()
+    if search:
+        qs = qs.filter(
+            Q(description__icontains=search)
+            | Q(employee__name__icontains=search)
+            | Q(matched_alias__icontains=search)
+        )
+    limit = limit or getattr(settings, 'SALARY_MOVEMENTS_PAGE_SIZE', 500)
+    offset = max(offset or 0, 0)
+    page = (
+        qs
+        .select_related('employee', 'branch', 'account_transaction__branch')
+        .order_by('-date', 'employee__name', 'id')[offset:offset + limit]
+    )
+    return {
+        **_movements_page_meta(qs.count(), limit, offset),
+        'results': [movement_payload(movement) for movement in page],
     }
-    by_employee = defaultdict(lambda: {
-        'employee_id': '',
-        'employee_name': '',
-        'bank_transfer': Decimal('0'),
-        'cash_expense': Decimal('0'),
-        'account_current': Decimal('0'),
-        'total': Decimal('0'),
-    })
-    account_deductions = {
-        'gross_amount': Decimal('0'),
-        'discount_amount': Decimal('0'),
-        'net_amount': Decimal('0'),
-        'pending_gross_amount': Decimal('0'),
-        'pending_discount_amount': Decimal('0'),
-        'pending_net_amount': Decimal('0'),
-        'confirmed_net_amount': Decimal('0'),
+
+
+def _movements_page_meta(count, limit, offset=0):
+    return {
+        'count': count,
+        'limit': limit,
+        'offset': offset,
+        'next_offset': offset + limit if offset + limit < count else None,
     }
-    deductions_by_employee = defaultdict(lambda: {
-        'employee_id': '',
-        'employee_name': '',
-        'gross_amount': Decimal('0'),
-        'discount_amount': Decimal('0'),
-        'net_amount': Decimal('0'),
-        'pending_gross_amount': Decimal('0'),
-        'pending_discount_amount': Decimal('0'),
-        'pending_net_amount': Decimal('0'),
-        'confirmed_net_amount': Decimal('0'),
-        'pending_count': 0,
-        'confirmed_count': 0,
-    })
-    movements = []
-    for movement in qs.order_by('-date', 'employee__name'):
-        amount = movement.amount or Decimal('0')
-        totals[movement.source] = totals.get(movement.source, Decimal('0')) + amount
-        entry = by_employee[movement.employee_id]
-        entry['employee_id'] = str(movement.employee_id)
-        entry['employee_name'] = movement.employee.name
-        entry[movement.source] += amount
-        entry['total'] += amount
-        if movement.source == EmployeeMovement.Source.ACCOUNT_CURRENT:
-            gross_amount = movement.gross_amount if movement.gross_amount is not None else amount
-            discount_amount = movement.discount_amount or Decimal('0')
-            deduction_status = movement.deduction_status or EmployeeMovement.DeductionStatus.PENDING
-            account_deductions['gross_amount'] += gross_amount
-            account_deductions['discount_amount'] += discount_amount
-            account_deductions['net_amount'] += amount
-            deduction_entry = deductions_by_employee[movement.employee_id]
-            deduction_entry['employee_id'] = str(movement.employee_id)
-            deduction_entry['employee_name'] = movement.employee.name
-            deduction_entry['gross_amount'] += gross_amount
-            deduction_entry['discount_amount'] += discount_amount
-            deduction_entry['net_amount'] += amount
-            if deduction_status == EmployeeMovement.DeductionStatus.CONFIRMED:
-                account_deductions['confirmed_net_amount'] += amount
-                deduction_entry['confirmed_net_amount'] += amount
-                deduction_entry['confirmed_count'] += 1
-            else:
-                account_deductions['pending_gross_amount'] += gross_amount
-                account_deductions['pending_discount_amount'] += discount_amount
-                account_deductions['pending_net_amount'] += amount
-                deduction_entry['pending_gross_amount'] += gross_amount
-                deduction_entry['pending_discount_amount'] += discount_amount
-                deduction_entry['pending_net_amount'] += amount
-                deduction_entry['pending_count'] += 1
-        movements.append(movement_payload(movement))
 
+
+def salaries_summary(start_date, end_date, sync=False, branch_id=None, diagnostics=False):
+    employee_sync = ensure_salary_category_employees()
+    sync_result = run_salary_sync() if sync else {'created': 0, 'updated': 0}
+
+    gross_expr = Coalesce('gross_amount', 'amount')
+    pending = _ACCOUNT_MOVEMENT & ~_CONFIRMED_MOVEMENT
+    confirmed = _ACCOUNT_MOVEMENT & _CONFIRMED_MOVEMENT
+    grouped = (
+        _period_movements(start_date, end_date, branch_id)
+        .values('employee_id', 'employee__name')
+        .annotate(
+            total=Sum('amount'),
+            **{source: Sum('amount', filter=Q(source=source)) for source in _SOURCE_KEYS},
+            # Alias con sufijo _sum: gross_amount/discount_amount ya son campos del modelo.
+            gross_amount_sum=Sum(gross_expr, filter=_ACCOUNT_MOVEMENT),
+            discount_amount_sum=Sum('discount_amount', filter=_ACCOUNT_MOVEMENT),
+            net_amount_sum=Sum('amount', filter=_ACCOUNT_MOVEMENT),
+            pending_gross_amount_sum=Sum(gross_expr, filter=pending),
+            pending_discount_amount_sum=Sum('discount_amount', filter=pending),
+            pending_net_amount_sum=Sum('amount', filter=pending),
+            confirmed_net_amount_sum=Sum('amount', filter=confirmed),
+            account_count=Count('id', filter=_ACCOUNT_MOVEMENT),
+            pending_count=Count('id', filter=pending),
+            confirmed_count=Count('id', filter=confirmed),
+        )
+        .order_by('employee__name')
+    )
+
+    totals = dict.fromkeys(_SOURCE_KEYS, Decimal('0'))
+    deduction_keys = (
+        'gross_amount', 'discount_amount', 'net_amount',
+        'pending_gross_amount', 'pending_discount_amount', 'pending_net_amount', 'confirmed_net_amount',
+    )
+    account_deductions = dict.fromkeys(deduction_keys, Decimal('0'))
     employee_rows = []
-    for entry in by_employee.values():
+    deduction_rows = []
+    for row in grouped:
+        for source in _SOURCE_KEYS:
+            totals[source] += row[source] or Decimal('0')
         employee_rows.append({
-            'employee_id': entry['employee_id'],
-            'employee_name': entry['employee_name'],
-            'bank_transfer': float(entry['bank_transfer']),
-            'cash_expense': float(entry['cash_expense']),
-            'account_current': float(entry['account_current']),
-            'total': float(entry['total']),
+            'employee_id': str(row['employee_id']),
+            'employee_name': row['employee__name'],
+            **{source: _money(row[source]) for source in _SOURCE_KEYS},
+            'total': _money(row['total']),
+        })
+        if not row['account_count']:
+            continue
+        values = {key: row[f'{key}_sum'] or Decimal('0') for key in deduction_keys}
+        for key in deduction_keys:
+            account_deductions[key] += values[key]
+        deduction_rows.append({
+            'employee_id': str(row['employee_id']),
+            'employee_name': row['employee__name'],
+            **{key: float(values[key]) for key in deduction_keys},
+            'pending_count': row['pending_count'],
+            'confirmed_count': row['confirmed_count'],
         })
     employee_rows.sort(key=lambda item: item['total'], reverse=True)
-
-    deduction_rows = [{
-        **entry,
-        'gross_amount': float(entry['gross_amount']),
-        'discount_amount': float(entry['discount_amount']),
-        'net_amount': float(entry['net_amount']),
-        'pending_gross_amount': float(entry['pending_gross_amount']),
-        'pending_discount_amount': float(entry['pending_discount_amount']),
-        'pending_net_amount': float(entry['pending_net_amount']),
-        'confirmed_net_amount': float(entry['confirmed_net_amount']),
-    } for entry in deductions_by_employee.values()]
     deduction_rows.sort(key=lambda item: (item['pending_count'] == 0, -item['pending_net_amount'], item['employee_name']))
 
+    # El detalle se pide paginado a /api/salaries/movements/; aca solo va el conteo.
+    movements_page = _movements_page_meta(
+        _period_movements(start_date, end_date, branch_id).count(),
+        getattr(settings, 'SALARY_MOVEMENTS_PAGE_SIZE', 500),
+    )
     total_amount = sum(totals.values(), Decimal('0'))
     return {
         'period': {
@@ -737,78 +1083,55 @@ def salaries_summary(start_date, end_date, sync=True, branch_id=None):
         },
         'branch_id': branch_id,
         'sync': sync_result,
+        'freshness': salary_sync_freshness(),
         'employee_sync': employee_sync,
         'totals': {
-            'bank_transfer': float(totals[EmployeeMovement.Source.BANK_TRANSFER]),
-            'cash_expense': float(totals[EmployeeMovement.Source.CASH_EXPENSE]),
-            'account_current': float(totals[EmployeeMovement.Source.ACCOUNT_CURRENT]),
+            **{source: float(totals[source]) for source in _SOURCE_KEYS},
             'total': float(total_amount),
         },
         'employees': employee_rows,
-        'movements': movements,
+        'movements_page': movements_page,
         'account_deductions': {
-            'gross_amount': float(account_deductions['gross_amount']),
-            'discount_amount': float(account_deductions['discount_amount']),
-            'net_amount': float(account_deductions['net_amount']),
-            'pending_gross_amount': float(account_deductions['pending_gross_amount']),
-            'pending_discount_amount': float(account_deductions['pending_discount_amount']),
-            'pending_net_amount': float(account_deductions['pending_net_amount']),
-            'confirmed_net_amount': float(account_deductions['confirmed_net_amount']),
+            **{key: float(account_deductions[key]) for key in deduction_keys},
             'employees': deduction_rows,
         },
-        **_salary_source_diagnostics(start_date, end_date, branch_id=branch_id),
+        'sources': _salary_source_counts(start_date, end_date, branch_id=branch_id),
+        **({'unmatched': _salary_unmatched(start_date, end_date, branch_id=branch_id)} if diagnostics else {}),
     }
 
 
-def salaries_monthly_summary(year, sync=True, branch_id=None):
+def salaries_monthly_summary(year, sync=False, branch_id=None):
     selected_year = int(year)
     start_date = date(selected_year, 1, 1)
     end_date = date(selected_year, 12, 31)
     employee_sync = ensure_salary_category_employees()
-    if sync:
-        with _SYNC_LOCK:
-            try:
-                sync_result = _sync_employee_movements_with_retry(start_date, end_date)
-            except OperationalError as exc:
-                sync_result = {'created': 0, 'updated': 0, 'skipped': str(exc)}
-    else:
-        sync_result = {'created': 0, 'updated': 0}
-
-    by_employee = defaultdict(lambda: {
-        'employee_id': '',
-        'employee_name': '',
-        'bank_transfer': Decimal('0'),
-        'cash_expense': Decimal('0'),
-        'account_current': Decimal('0'),
-        'total': Decimal('0'),
-        'months': defaultdict(lambda: {
-            'bank_transfer': Decimal('0'),
-            'cash_expense': Decimal('0'),
-            'account_current': Decimal('0'),
-            'total': Decimal('0'),
-        }),
-    })
-    movements = (
-        EmployeeMovement.objects
-        .select_related('employee__branch', 'branch')
-        .filter(
-            date__gte=start_date,
-            date__lte=end_date,
-            employee__active=True,
-        )
-        .order_by('employee__name', 'date')
+    sync_result = run_salary_sync() if sync else {'created': 0, 'updated': 0}
+
+    def empty_totals():
+        return {**dict.fromkeys(_SOURCE_KEYS, Decimal('0')), 'total': Decimal('0')}
+
+    by_employee = {}
+    grouped = (
+        _period_movements(start_date, end_date, branch_id)
+        .annotate(month=ExtractMonth('date'))
+        .values('employee_id', 'employee__name', 'source', 'month')
+        .annotate(amount_total=Sum('amount'))
+        .order_by('employee__name', 'month')
     )
-    if branch_id:
-        movements = movements.filter(branch_id=branch_id)
-    for movement in movements:
-        amount = movement.amount or Decimal('0')
-        entry = by_employee[movement.employee_id]
-        entry['employee_id'] = str(movement.employee_id)
-        entry['employee_name'] = movement.employee.name
-        entry[movement.source] += amount
+    for row in grouped:
+        amount = row['amount_total'] or Decimal('0')
+        entry = by_employee.get(row['employee_id'])
+        if entry is None:
+            entry = by_employee[row['employee_id']] = {
+                'employee_id': str(row['employee_id']),
+                'employee_name': row['employee__name'],
+                **empty_totals(),
+                'months': {month_number: empty_totals() for month_number in range(1, 13)},
+            }
+        entry[row['source']] += amount
         entry['total'] += amount
-        month_entry = entry['months'][movement.date.month]
-        month_entry[movement.source] += amount
+        month_entry = entry['months'][row['month']]
+        month_entry[row['source']] += amount
         month_entry['total'] += amount
 
     employee_rows = []
@@ -816,19 +1139,13 @@ def salaries_monthly_summary(year, sync=True, branch_id=None):
         employee_rows.append({
             'employee_id': entry['employee_id'],
             'employee_name': entry['employee_name'],
-            'bank_transfer': float(entry['bank_transfer']),
-            'cash_expense': float(entry['cash_expense']),
-            'account_current': float(entry['account_current']),
-            'total': float(entry['total']),
+            **{key: float(entry[key]) for key in (*_SOURCE_KEYS, 'total')},
             'months': [
                 {
                     'month': month_number,
-                    'bank_transfer': float(entry['months'][month_number]['bank_transfer']),
-                    'cash_expense': float(entry['months'][month_number]['cash_expense']),
-                    'account_current': float(entry['months'][month_number]['account_current']),
-                    'total': float(entry['months'][month_number]['total']),
+                    **{key: float(month_entry[key]) for key in (*_SOURCE_KEYS, 'total')},
                 }
-                for month_number in range(1, 13)
+                for month_number, month_entry in entry['months'].items()
             ],
         })
     employee_rows.sort(key=lambda item: item['total'], reverse=True)
@@ -836,6 +1153,7 @@ def salaries_monthly_summary(year, sync=True, branch_id=None):
         'year': selected_year,
         'branch_id': branch_id,
         'sync': sync_result,
+        'freshness': salary_sync_freshness(),
         'employee_sync': employee_sync,
         'employees': employee_rows,
     }
@@ -859,26 +1177,8 @@ def _semester_bounds(year, semester):
     return selected_year, selected_semester, date(selected_year, 7, 1), date(selected_year, 12, 31), range(7, 13)
 
 
-def aguinaldo_estimate(employee, year, semester):
-    selected_year, selected_semester, start_date, end_date, semester_months = _semester_bounds(year, semester)
-    detected = {
-        row['date__month']: row['total'] or Decimal('0')
-        for row in (
-            EmployeeMovement.objects
-            .filter(employee=employee, date__gte=start_date, date__lte=end_date)
-            .values('date__month')
-            .annotate(total=Sum('amount'))
-        )
-    }
-    confirmed = {
-        row.month: row
-        for row in EmployeeRemuneration.objects.filter(
-            employee=employee,
-            year=selected_year,
-            month__in=semester_months,
-        ).select_related('confirmed_by')
-    }
-
+def _aguinaldo_values(employee, selected_year, start_date, end_date, semester_months, detected, confirmed):
+    """SAC del semestre a partir de los montos detectados y las remuneraciones confirmadas del empleado."""
     months = []
     effective_by_month = {}
     for month_number in semester_months:
@@ -912,10 +1212,6 @@ def aguinaldo_estimate(employee, year, semester):
     sac_amount = (best_remuneration / Decimal('2') * proportion).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
     return {
-        'employee': employee_payload(employee),
-        'year': selected_year,
-        'semester': selected_semester,
-        'period': {'start': start_date.isoformat(), 'end': end_date.isoformat()},
         'months': months,
         'best_month': best_month['month'] if best_month else None,
         'best_month_label': best_month['month_label'] if best_month else 'Sin datos',
@@ -931,6 +1227,103 @@ def aguinaldo_estimate(employee, year, semester):
     }
 
 
+def aguinaldo_estimate(employee, year, semester):
+    selected_year, selected_semester, start_date, end_date, semester_months = _semester_bounds(year, semester)
+    detected = {
+        row['date__month']: row['total'] or Decimal('0')
+        for row in (
+            EmployeeMovement.objects
+            .filter(employee=employee, date__gte=start_date, date__lte=end_date)
+            .values('date__month')
+            .annotate(total=Sum('amount'))
+        )
+    }
+    confirmed = {
+        row.month: row
+        for row in EmployeeRemuneration.objects.filter(
+            employee=employee,
+            year=selected_year,
+            month__in=semester_months,
+        ).select_related('confirmed_by')
+    }
+    return {
+        'employee': employee_payload(employee),
+        'year': selected_year,
+        'semester': selected_semester,
+        'period': {'start': start_date.isoformat(), 'end': end_date.isoformat()},
+        **_aguinaldo_values(employee, selected_year, start_date, end_date, semester_months, detected, confirmed),
+    }
+
+
+def aguinaldo_semester_summary(year, semester, branch_id=None):
+    """Planilla de aguinaldo de todo el personal del semestre: una consulta agrupada por fuente de montos."""
+    selected_year, selected_semester, start_date, end_date, semester_months = _semester_bounds(year, semester)
+    employees = (
+        Employee.objects
+        .filter(Q(active=True) | Q(termination_date__gte=start_date))
+        .filter(Q(hire_date__isnull=True) | Q(hire_date__lte=end_date))
+        .select_related('branch')
+        .order_by('name')
+    )
+    if branch_id:
+        employees = employees.filter(branch_id=branch_id)
+    employees = list(employees)
+    employee_ids = [employee.id for employee in employees]
+
+    detected = defaultdict(dict)
+    for row in (
+        EmployeeMovement.objects
+        .filter(employee_id__in=employee_ids, date__gte=start_date, date__lte=end_date)
+        .values('employee_id', 'date__month')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    ):
+        detected[row['employee_id']][row['date__month']] = row['total'] or Decimal('0')
+    confirmed = defaultdict(dict)
+    for remuneration in EmployeeRemuneration.objects.filter(
+        employee_id__in=employee_ids,
+        year=selected_year,
+        month__in=semester_months,
+    ).select_related('confirmed_by'):
+        confirmed[remuneration.employee_id][remuneration.month] = remuneration
+
+    rows = []
+    total_sac = Decimal('0')
+    for employee in employees:
+        values = _aguinaldo_values(
+            employee,
+            selected_year,
+            start_date,
+            end_date,
+            semester_months,
+            detected.get(employee.id, {}),
+            confirmed.get(employee.id, {}),
+        )
+        total_sac += Decimal(str(values['sac_amount']))
+        rows.append({
+            'employee_id': str(employee.id),
+            'employee_name': employee.name,
+            'active': employee.active,
+            'branch_id': employee.branch_id,
+            'branch_name': employee.branch.name if employee.branch else '',
+            'hire_date': employee.hire_date.isoformat() if employee.hire_date else None,
+            'termination_date': employee.termination_date.isoformat() if employee.termination_date else None,
+            **values,
+        })
+    return {
+        'year': selected_year,
+        'semester': selected_semester,
+        'period': {'start': start_date.isoformat(), 'end': end_date.isoformat()},
+        'branch_id': branch_id,
+        'totals': {
+            'employee_count': len(rows),
+            'complete_count': sum(1 for row in rows if row['complete']),
+            'sac_amount': float(total_sac),
+        },
+        'employees': rows,
+    }
+
+
 @transaction.atomic
 def save_aguinaldo_remunerations(employee, year, semester, rows, user=None):
     selected_year, _, _, _, semester_months = _semester_bounds(year, semester)
@@ -975,55 +1368,53 @@ def save_aguinaldo_remunerations(employee, year, semester, rows, user=None):
     return aguinaldo_estimate(employee, selected_year, semester)
 
 
-def _refresh_account_clients(client_ids):
-    for client_id in set(client_ids):
-        transactions = list(AccountTransaction.objects.filter(client_id=client_id))
-        pending = sum((tx.remaining_amount for tx in transactions), Decimal('0'))
-        pending_transactions = [tx for tx in transactions if tx.remaining_amount > Decimal('0')]
-        client_status = AccountClient.Status.PAID
-        if pending > Decimal('0'):
-            if any(tx.status == AccountTransaction.Status.OVERDUE for tx in pending_transactions):
-                client_status = AccountClient.Status.OVERDUE
-            elif any(tx.status == AccountTransaction.Status.PARTIAL for tx in pending_transactions):
-                client_status = AccountClient.Status.PARTIAL
-            else:
-                client_status = AccountClient.Status.ACTIVE
-        AccountClient.objects.filter(pk=client_id).update(total_debt=pending, status=client_status)
+_CONFIRMED_MOVEMENT_FIELDS = (
+    'gross_amount',
+    'discount_percent',
+    'discount_amount',
+    'amount',
+    'deduction_status',
+    'deduction_confirmed_by',
+    'deduction_confirmed_at',
+    'updated_at',
+)
 
 
-@transaction.atomic
-def confirm_account_deductions(employee, year, month, user=None):
-    start_date, end_date = month_range(year, month)
-    movements = list(
+def _pending_account_deductions(start_date, end_date):
+    return (
         EmployeeMovement.objects
-        .select_for_update()
-        .select_related('account_transaction')
         .filter(
-            employee=employee,
             source=EmployeeMovement.Source.ACCOUNT_CURRENT,
             deduction_status=EmployeeMovement.DeductionStatus.PENDING,
             date__gte=start_date,
             date__lte=end_date,
             account_transaction__isnull=False,
         )
-        .order_by('date', 'created_at')
+        .select_related('employee')
+        .order_by('employee__name', 'date', 'created_at')
     )
-    if not movements:
-        raise ValueError('No hay consumos pendientes para confirmar')
 
-    totals = {
-        'gross_amount': Decimal('0'),
-        'discount_amount': Decimal('0'),
-        'net_amount': Decimal('0'),
+
+def _confirm_account_movements(movements, start_date, user=None):
+    """Confirma descuentos ya bloqueados: un select_for_update para las transacciones y bulk_update al final."""
+    transactions = {
+        tx.pk: tx
+        for tx in AccountTransaction.objects.select_for_update().filter(
+            pk__in=[movement.account_transaction_id for movement in movements],
+        ).order_by('pk')
     }
     confirmed_at = timezone.now()
     payment_date = timezone.localdate()
-    client_ids = set()
-    confirmed_count = 0
+    confirmed_by = user if getattr(user, 'is_authenticated', False) else None
+    results = {}
+    stale_ids = []
+    changed_transactions = []
+    changed_movements = []
     for movement in movements:
-        account_transaction = AccountTransaction.objects.select_for_update().get(pk=movement.account_transaction_id)
+        employee = movement.employee
+        account_transaction = transactions[movement.account_transaction_id]
         if account_transaction.remaining_amount <= Decimal('0'):
-            movement.delete()
+            stale_ids.append(movement.pk)
             continue
         gross_amount, percent, discount_amount, net_amount = _account_deduction_values(
             account_transaction,
@@ -1049,44 +1440,94 @@ def confirm_account_deductions(employee, year, month, user=None):
         account_transaction.paid_amount = account_transaction.original_amount
         account_transaction.status = AccountTransaction.Status.PAID
         account_transaction.payments = payments
-        account_transaction.save(update_fields=['paid_amount', 'status', 'payments', 'updated_at'])
+        account_transaction.updated_at = confirmed_at
+        changed_transactions.append(account_transaction)
 
         movement.gross_amount = gross_amount
         movement.discount_percent = percent
         movement.discount_amount = discount_amount
         movement.amount = net_amount
         movement.deduction_status = EmployeeMovement.DeductionStatus.CONFIRMED
-        movement.deduction_confirmed_by = user if getattr(user, 'is_authenticated', False) else None
+        movement.deduction_confirmed_by = confirmed_by
         movement.deduction_confirmed_at = confirmed_at
-        movement.save(update_fields=[
-            'gross_amount',
-            'discount_percent',
-            'discount_amount',
-            'amount',
-            'deduction_status',
-            'deduction_confirmed_by',
-            'deduction_confirmed_at',
-            'updated_at',
-        ])
-        totals['gross_amount'] += gross_amount
-        totals['discount_amount'] += discount_amount
-        totals['net_amount'] += net_amount
-        client_ids.add(account_transaction.client_id)
-        confirmed_count += 1
-
-    if not confirmed_count:
+        movement.updated_at = confirmed_at
+        changed_movements.append(movement)
+
+        result = results.get(employee.pk)
+        if result is None:
+            result = results[employee.pk] = {
+                'employee_id': str(employee.id),
+                'employee_name': employee.name,
+                'year': start_date.year,
+                'month': start_date.month,
+                'confirmed_count': 0,
+                'gross_amount': Decimal('0'),
+                'discount_amount': Decimal('0'),
+                'net_amount': Decimal('0'),
+                'confirmed_at': confirmed_at.isoformat(),
+            }
+        result['confirmed_count'] += 1
+        result['gross_amount'] += gross_amount
+        result['discount_amount'] += discount_amount
+        result['net_amount'] += net_amount
+
+    if stale_ids:
+        EmployeeMovement.objects.filter(pk__in=stale_ids).delete()
+    if changed_transactions:
+        AccountTransaction.objects.bulk_update(
+            changed_transactions,
+            ['paid_amount', 'status', 'payments', 'updated_at'],
+            batch_size=500,
+        )
+        EmployeeMovement.objects.bulk_update(changed_movements, _CONFIRMED_MOVEMENT_FIELDS, batch_size=500)
+        recalc_account_totals({tx.client_id for tx in changed_transactions})
+    return list(results.values())
+
+
+_DEDUCTION_AMOUNT_KEYS = ('gross_amount', 'discount_amount', 'net_amount')
+
+
+def _deduction_payload(result):
+    return {**result, **{key: float(result[key]) for key in _DEDUCTION_AMOUNT_KEYS}}
+
+
+@transaction.atomic
+def confirm_account_deductions(employee, year, month, user=None):
+    start_date, end_date = month_range(year, month)
+    movements = list(
+        _pending_account_deductions(start_date, end_date)
+        .select_for_update(of=('self',))
+        .filter(employee=employee)
+    )
+    results = _confirm_account_movements(movements, start_date, user=user) if movements else []
+    if not results:
+        raise ValueError('No hay consumos pendientes para confirmar')
+    return _deduction_payload(results[0])
+
+
+@transaction.atomic
+def confirm_month_account_deductions(year, month, employee_ids=None, branch_id=None, user=None):
+    """Cierre de mes: confirma los descuentos pendientes de todos los empleados (o los indicados) en una transaccion."""
+    start_date, end_date = month_range(year, month)
+    qs = _pending_account_deductions(start_date, end_date).select_for_update(of=('self',))
+    if employee_ids is not None:
+        qs = qs.filter(employee_id__in=employee_ids)
+    if branch_id:
+        qs = qs.filter(employee__branch_id=branch_id)
+    movements = list(qs)
+    results = _confirm_account_movements(movements, start_date, user=user) if movements else []
+    if not results:
         raise ValueError('No hay consumos pendientes para confirmar')
-    _refresh_account_clients(client_ids)
     return {
-        'employee_id': str(employee.id),
-        'employee_name': employee.name,
         'year': start_date.year,
         'month': start_date.month,
-        'confirmed_count': confirmed_count,
-        'gross_amount': float(totals['gross_amount']),
-        'discount_amount': float(totals['discount_amount']),
-        'net_amount': float(totals['net_amount']),
-        'confirmed_at': confirmed_at.isoformat(),
+        'employee_count': len(results),
+        'confirmed_count': sum(result['confirmed_count'] for result in results),
+        **{
+            key: float(sum((result[key] for result in results), Decimal('0')))
+            for key in _DEDUCTION_AMOUNT_KEYS
+        },
+        'employees': [_deduction_payload(result) for result in results],
     }
 
 
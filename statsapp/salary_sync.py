@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import EmployeeMovement, SalarySyncState
+
+
+def request_salary_sync(*sources):
+    """
+    Marca fuentes con cambios para que el worker de sueldos las sincronice en la proxima vuelta.
+    La hora la pone la base (Now()), igual que el inicio del sync: si el UPDATE espera el lock de
+    un sync en curso, queda posterior a ese inicio y el pedido sigue pendiente.
+    """
+    sources = list(sources or EmployeeMovement.Source.values)
+    marked = SalarySyncState.objects.filter(source__in=sources).update(requested_at=Now())
+    if marked < len(sources):
+        SalarySyncState.objects.bulk_create(
+            [SalarySyncState(source=source, requested_at=Now()) for source in sources],
+            ignore_conflicts=True,
+        )
+
+
+def salary_sync_freshness():
+    """Fecha de la ultima sincronizacion completa y si hay cambios esperando al worker."""
+    states = {state.source: state for state in SalarySyncState.objects.all()}
+    synced = [
+        states[source].synced_at
+        for source in EmployeeMovement.Source.values
+        if source in states and states[source].synced_at
+    ]
+    complete = len(synced) == len(EmployeeMovement.Source.values)
+    requested = [state.requested_at for state in states.values() if state.requested_at]
+    pending = not complete or any(
+        state.requested_at and (not state.synced_at or state.requested_at >= state.synced_at)
+        for state in states.values()
+    )
+    return {
+        'synced_at': min(synced).isoformat() if complete else None,
+        'requested_at': max(requested).isoformat() if requested else None,
+        'pending': pending,
+    }
+
+
+def salary_sync_due(max_age_seconds=None):
+    """True si hay cambios pedidos o la ultima sincronizacion es mas vieja que max_age_seconds."""
+    freshness = salary_sync_freshness()
+    if freshness['pending']:
+        return True
+    if max_age_seconds is None:
+        max_age_seconds = getattr(settings, 'SALARY_SYNC_MAX_AGE_SECONDS', 300)
+    synced_at = SalarySyncState.objects.order_by('synced_at').values_list('synced_at', flat=True).first()
+    return synced_at is None or timezone.now() - synced_at >= timedelta(seconds=max_age_seconds)
@@ -12,8 +12,10 @@ from django.utils import timezone
 from .models import AccountClient, Branch, Employee, EmployeeAlias, EmployeeMovement
 from .salary_services import (
     aguinaldo_estimate,
+    aguinaldo_semester_summary,
     assign_employee_movement,
     confirm_account_deductions,
+    confirm_month_account_deductions,
     create_employee,
     employee_payload,
     ensure_salary_category_employees,
@@ -23,9 +25,12 @@ from .salary_services import (
     movement_payload,
     normalize_account_discount_percent,
     normalize_hire_date,
+    run_salary_sync,
     save_aguinaldo_remunerations,
     salaries_monthly_summary,
     salaries_summary,
+    salary_movements_page,
+    salary_source_diagnostics,
     normalize_employee_document,
     validate_account_client_assignment,
 )
@@ -49,12 +54,73 @@ def _active_branch(value, required=False):
 @permission_classes([IsAdminUser])
 def salaries_dashboard(request):
     start, end = month_range(request.query_params.get('year'), request.query_params.get('month'))
-    should_sync = (request.query_params.get('sync') or '1').strip().lower() not in {'0', 'false', 'no'}
+    # La sincronizacion corre en el worker (run_salary_sync); sync=1 la fuerza en el request.
+    should_sync = (request.query_params.get('sync') or '0').strip().lower() in {'1', 'true', 'yes'}
+    # Los candidatos sin asignar salen del ultimo sync; solo se agregan con diagnostics=1 o en salaries/diagnostics/.
+    with_diagnostics = (request.query_params.get('diagnostics') or '0').strip().lower() in {'1', 'true', 'yes'}
     try:
         branch = _active_branch(request.query_params.get('branch_id'))
     except ValueError as exc:
         return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-    return Response(salaries_summary(start, end, sync=should_sync, branch_id=branch.id if branch else None))
+    return Response(salaries_summary(
+        start,
+        end,
+        sync=should_sync,
+        branch_id=branch.id if branch else None,
+        diagnostics=with_diagnostics,
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def salaries_diagnostics(request):
+    start, end = month_range(request.query_params.get('year'), request.query_params.get('month'))
+    try:
+        limit = min(max(int(request.query_params.get('limit') or 100), 1), 500)
+    except (TypeError, ValueError):
+        return Response({'detail': 'Limite invalido'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        branch = _active_branch(request.query_params.get('branch_id'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(salary_source_diagnostics(start, end, branch_id=branch.id if branch else None, limit=limit))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def salaries_movements(request):
+    params = request.query_params
+    start, end = month_range(params.get('year'), params.get('month'))
+    source = (params.get('source') or '').strip()
+    if source and source not in EmployeeMovement.Source.values:
+        return Response({'detail': 'Origen de movimiento invalido'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(params.get('limit') or 50), 1), 500)
+        offset = max(int(params.get('offset') or 0), 0)
+    except (TypeError, ValueError):
+        return Response({'detail': 'Parametros de paginacion invalidos'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        branch = _active_branch(params.get('branch_id'))
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    employee_id = params.get('employee_id') or None
+    if employee_id:
+        try:
+            employee_exists = Employee.objects.filter(pk=employee_id).exists()
+        except (TypeError, ValueError, ValidationError):
+            employee_exists = False
+        if not employee_exists:
+            return Response({'detail': 'Empleado invalido'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(salary_movements_page(
+        start,
+        end,
+        branch_id=branch.id if branch else None,
+        employee_id=employee_id,
+        source=source or None,
+        search=params.get('search') or '',
+        limit=limit,
+        offset=offset,
+    ))
 
 
 @api_view(['GET'])
@@ -66,7 +132,7 @@ def salaries_monthly(request):
             raise ValueError
     except (TypeError, ValueError):
         return Response({'detail': 'Anio invalido'}, status=status.HTTP_400_BAD_REQUEST)
-    should_sync = (request.query_params.get('sync') or '1').strip().lower() not in {'0', 'false', 'no'}
+    should_sync = (request.query_params.get('sync') or '0').strip().lower() in {'1', 'true', 'yes'}
     try:
         branch = _active_branch(request.query_params.get('branch_id'))
     except ValueError as exc:
@@ -102,6 +168,21 @@ def salaries_aguinaldo(request):
     return Response(result)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def salaries_aguinaldo_semester(request):
+    try:
+        branch = _active_branch(request.query_params.get('branch_id'))
+        result = aguinaldo_semester_summary(
+            request.query_params.get('year'),
+            request.query_params.get('semester'),
+            branch_id=branch.id if branch else None,
+        )
+    except (TypeError, ValueError) as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def salaries_account_deductions_confirm(request):
@@ -113,8 +194,9 @@ def salaries_account_deductions_confirm(request):
     if not employee:
         return Response({'detail': 'Empleado invalido'}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        start, end = month_range(data.get('year'), data.get('month'))
-        salaries_summary(start, end, sync=True)
+        start, _ = month_range(data.get('year'), data.get('month'))
+        # Solo las filas cambiadas desde la ultima marca de agua, para confirmar montos al dia.
+        run_salary_sync()
         result = confirm_account_deductions(
             employee,
             start.year,
@@ -126,6 +208,36 @@ def salaries_account_deductions_confirm(request):
     return Response(result)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def salaries_account_deductions_confirm_month(request):
+    data = request.data or {}
+    employee_ids = data.get('employee_ids')
+    if employee_ids is not None:
+        if not isinstance(employee_ids, list):
+            return Response({'detail': 'Empleados invalidos'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            found = Employee.objects.filter(pk__in=employee_ids).count()
+        except (TypeError, ValueError, ValidationError):
+            found = -1
+        if found != len(set(map(str, employee_ids))):
+            return Response({'detail': 'Empleados invalidos'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        branch = _active_branch(data.get('branch_id'))
+        start, _ = month_range(data.get('year'), data.get('month'))
+        run_salary_sync()
+        result = confirm_month_account_deductions(
+            start.year,
+            start.month,
+            employee_ids=employee_ids,
+            branch_id=branch.id if branch else None,
+            user=request.user,
+        )
+    except (TypeError, ValueError) as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAdminUser])
 def employees_list(request):
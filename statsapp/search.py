@@ -0,0 +1,245 @@
+"""
+Busqueda de texto indexada para clientes, movimientos bancarios y lotes de vales.
+
+PostgreSQL: indice GIN sobre to_tsvector('simple', ...) del texto sin acentos
+(statsapp_unaccent envuelve unaccent como IMMUTABLE para poder indexarlo).
+SQLite: tablas FTS5 de contenido externo mantenidas por triggers.
+El indice solo resuelve prefijos de palabras: las palabras con numeros o signos (C-0013,
+planilla-0) se filtran por subcadena, y ademas siempre se suman las filas donde todas las
+palabras aparecen como subcadena ("ez" en Perez), igual que cuando no hay motor disponible.
+Los indices se actualizan en la base con cada escritura, incluidos bulk_create/update().
+"""
+import logging
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from .text_utils import normalize_search_text
+
+
+logger = logging.getLogger(__name__)
+
+# tabla -> columnas que forman el documento de busqueda
+SEARCH_INDEXES = {
+    'statsapp_accountclient': ('first_name', 'last_name', 'external_id'),
+    'statsapp_banktransaction': ('concept', 'description'),
+    'statsapp_valeimportbatch': ('search_text',),
+}
+
+# columnas que ya se guardan normalizadas (minusculas, sin acentos ni signos)
+NORMALIZED_COLUMNS = {
+    'statsapp_valeimportbatch': ('search_text',),
+}
+
+_READY = {}
+
+
+def search_terms(text):
+    """Palabras normalizadas (minusculas, sin acentos, solo alfanumericos) de la busqueda."""
+    return normalize_search_text(text).split()
+
+
+def postgres_document_sql(table, columns, qualify=False):
+    prefix = f'"{table}".' if qualify else ''
+    joined = " || ' ' || ".join(f"coalesce({prefix}\"{column}\", '')" for column in columns)
+    return f"to_tsvector('simple', regexp_replace(statsapp_unaccent({joined}), '[^[:alnum:]]+', ' ', 'g'))"
+
+
+def postgres_tsquery(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def sqlite_match_query(terms):
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _fts_table(table):
+    return f'{table}_fts'
+
+
+def _drop_sqlite_search(cursor):
+    for table in SEARCH_INDEXES:
+        fts = _fts_table(table)
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{suffix}"')
+        cursor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+
+
+def uninstall_search(schema_connection=None):
+    conn = schema_connection or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            _drop_sqlite_search(cursor)
+        elif conn.vendor == 'postgresql':
+            for table in SEARCH_INDEXES:
+                cursor.execute(f'DROP INDEX IF EXISTS "{table}_search_gin"')
+    _READY.clear()
+
+
+def _sqlite_schema_ready(conn, cursor):
+    """True si todas las tablas indexadas existen con sus columnas (no pasa a mitad de migraciones)."""
+    tables = set(conn.introspection.table_names(cursor))
+    for table, columns in SEARCH_INDEXES.items():
+        if table not in tables:
+            return False
+        existing = {column.name for column in conn.introspection.get_table_description(cursor, table)}
+        if not set(columns) <= existing:
+            return False
+    return True
+
+
+def install_sqlite_search(schema_connection=None):
+    """(Re)crea las tablas FTS5 y sus triggers; se llama despues de migrar porque SQLite rehace tablas al alterarlas."""
+    conn = schema_connection or connection
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        _drop_sqlite_search(cursor)
+        if not _sqlite_schema_ready(conn, cursor):
+            _READY.clear()
+            return False
+        for table, columns in SEARCH_INDEXES.items():
+            fts = _fts_table(table)
+            cols = ', '.join(f'"{column}"' for column in columns)
+            new_values = ', '.join(f'new."{column}"' for column in columns)
+            old_values = ', '.join(f'old."{column}"' for column in columns)
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE "{fts}" USING fts5({cols}, content=\'{table}\', '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{fts}_ai" AFTER INSERT ON "{table}" BEGIN '
+                f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.rowid, {new_values}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{fts}_ad" AFTER DELETE ON "{table}" BEGIN '
+                f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.rowid, {old_values}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{fts}_au" AFTER UPDATE OF {cols} ON "{table}" BEGIN '
+                f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old.rowid, {old_values}); '
+                f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.rowid, {new_values}); END'
+            )
+            cursor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+    _READY.clear()
+    return True
+
+
+def install_postgres_search(schema_connection=None):
+    """Crea unaccent, el wrapper IMMUTABLE y los indices GIN. Si falta permiso para la extension queda el fallback."""
+    conn = schema_connection or connection
+    if conn.vendor != 'postgresql':
+        return False
+    try:
+        with transaction.atomic(using=conn.alias):
+            with conn.cursor() as cursor:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+                cursor.execute(
+                    'CREATE OR REPLACE FUNCTION statsapp_unaccent(text) RETURNS text '
+                    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$ SELECT public.unaccent('public.unaccent', $1) $$"
+                )
+                for table, columns in SEARCH_INDEXES.items():
+                    cursor.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{table}_search_gin" ON "{table}" '
+                        f'USING gin (({postgres_document_sql(table, columns)}))'
+                    )
+    except Exception:
+        logger.warning('Busqueda de texto en PostgreSQL no disponible; se usa icontains', exc_info=True)
+        return False
+    _READY.clear()
+    return True
+
+
+def _backend():
+    key = (connection.vendor, connection.settings_dict.get('NAME'))
+    if key not in _READY:
+        backend = None
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT to_regprocedure('statsapp_unaccent(text)') IS NOT NULL")
+                backend = 'postgresql' if cursor.fetchone()[0] else None
+            elif connection.vendor == 'sqlite':
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [_fts_table('statsapp_accountclient')],
+                )
+                backend = 'sqlite' if cursor.fetchone()[0] else None
+        _READY[key] = backend
+    return _READY[key]
+
+
+def _substring_condition(table, text):
+    """Condicion previa al indice: cada palabra de la busqueda debe aparecer como subcadena."""
+    normalized_columns = NORMALIZED_COLUMNS.get(table, ())
+    result = Q()
+    for token in text.split():
+        condition = Q()
+        for column in SEARCH_INDEXES[table]:
+            if column in normalized_columns:
+                normalized = normalize_search_text(token)
+                if normalized:
+                    condition |= Q(**{f'{column}__contains': normalized})
+            else:
+                condition |= Q(**{f'{column}__icontains': token})
+        if condition:
+            result &= condition
+    return result
+
+
+def _index_match(table, backend, terms):
+    """(condicion booleana, expresion de ranking) del indice para los prefijos dados."""
+    columns = SEARCH_INDEXES[table]
+    if backend == 'postgresql':
+        document = postgres_document_sql(table, columns, qualify=True)
+        query = postgres_tsquery(terms)
+        condition = RawSQL(f"{document} @@ to_tsquery('simple', %s)", [query], output_field=BooleanField())
+        score = RawSQL(f"ts_rank({document}, to_tsquery('simple', %s))", [query], output_field=FloatField())
+        return condition, score
+    fts = _fts_table(table)
+    query = sqlite_match_query(terms)
+    condition = RawSQL(
+        f'"{table}".rowid IN (SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s)',
+        [query],
+        output_field=BooleanField(),
+    )
+    score = RawSQL(
+        f'(SELECT -bm25("{fts}") FROM "{fts}" WHERE "{fts}" MATCH %s AND "{fts}".rowid = "{table}".rowid)',
+        [query],
+        output_field=FloatField(),
+    )
+    return condition, score
+
+
+def search_filter(queryset, text, rank=False):
+    """
+    Filtra queryset por la busqueda usando el indice del motor; con rank=True anota search_rank
+    (mayor es mejor) para ordenar por relevancia. Una fila coincide si las palabras solo de letras
+    son prefijos en el indice (y las demas aparecen como subcadena) o si todas las palabras aparecen
+    como subcadena; el resultado no depende de que otras filas coincidan.
+    """
+    if not search_terms(text):
+        return queryset
+    table = queryset.model._meta.db_table
+    substring = _substring_condition(table, text)
+    backend = _backend()
+    words = []
+    literal = []
+    for token in text.split():
+        normalized = normalize_search_text(token)
+        if normalized.isalpha():
+            words.append(normalized)
+        elif normalized:
+            literal.append(token)
+    if backend is None or not words:
+        queryset = queryset.filter(substring)
+        if rank:
+            queryset = queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return queryset
+
+    condition, score = _index_match(table, backend, words)
+    queryset = queryset.filter((Q(condition) & _substring_condition(table, ' '.join(literal))) | substring)
+    if rank:
+        queryset = queryset.annotate(search_rank=Coalesce(score, Value(0.0), output_field=FloatField()))
+    return queryset
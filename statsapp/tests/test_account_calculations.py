@@ -182,3 +182,60 @@ class AccountCalculationTests(TestCase):
         self.assertEqual(response.data['client']['total_debt'], 25.0)
         self.assertEqual(response.data['totals']['original'], 25.0)
         self.assertEqual(response.data['totals']['remaining'], 25.0)
+
+    def test_stats_top_clients_keep_namesakes_apart(self):
+        first = AccountClient.objects.create(external_id='client-8', first_name='Ana', last_name='Gomez')
+        second = AccountClient.objects.create(external_id='client-9', first_name='Ana', last_name='Gomez')
+        for client, amount in ((first, '300'), (second, '200')):
+            AccountTransaction.objects.create(
+                client=client,
+                external_id=f'{client.external_id}-tx',
+                date=date(2026, 6, 1),
+                original_amount=Decimal(amount),
+                paid_amount=Decimal('0'),
+                status=AccountTransaction.Status.ACTIVE,
+            )
+        request = APIRequestFactory().get('/api/accounts/clients/stats/?year=2026')
+        force_authenticate(request, user=self.user)
+
+        response = account_clients_stats(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['original'] for row in response.data['top_clients']], [300.0, 200.0])
+
+    def test_stats_paginate_months_with_grouped_totals(self):
+        first = AccountClient.objects.create(external_id='client-6', first_name='Ana', last_name='Alvarez')
+        second = AccountClient.objects.create(external_id='client-7', first_name='Beto', last_name='Benitez')
+        for month, amount in ((3, '100'), (4, '200'), (5, '300')):
+            AccountTransaction.objects.create(
+                client=first,
+                external_id=f'a-{month}',
+                date=date(2026, month, 10),
+                original_amount=Decimal(amount),
+                paid_amount=Decimal('40'),
+                status=AccountTransaction.Status.PARTIAL,
+            )
+            AccountTransaction.objects.create(
+                client=second,
+                external_id=f'b-{month}',
+                date=date(2026, month, 12),
+                original_amount=Decimal('50'),
+                paid_amount=Decimal('80'),
+                status=AccountTransaction.Status.PAID,
+            )
+        request = APIRequestFactory().get('/api/accounts/clients/stats/?year=2026&page=2&page_size=1')
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(5):
+            response = account_clients_stats(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_months'], 3)
+        month_entry = response.data['results'][0]
+        self.assertEqual(month_entry['month'], '2026-04')
+        self.assertEqual(month_entry['totals'], {'original': 250.0, 'paid': 120.0, 'remaining': 160.0})
+        self.assertEqual([entry['date'] for entry in month_entry['days']], ['2026-04-12', '2026-04-10'])
+        self.assertEqual(month_entry['days'][1]['transactions'][0]['client'], 'Alvarez, Ana')
+        self.assertEqual(response.data['year_totals'], {'original': 750.0, 'remaining': 480.0})
+        self.assertEqual(response.data['top_clients'][0], {'client': 'Alvarez, Ana', 'original': 600.0})
+        self.assertEqual(response.data['top_clients'][1], {'client': 'Benitez, Beto', 'original': 150.0})
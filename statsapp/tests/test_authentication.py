@@ -0,0 +1,88 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from statsapp import activity
+from statsapp.auth_cache import reset_auth_user_cache
+from statsapp.models import UserActivity
+
+
+def _activity_writes(captured):
+    return [
+        query['sql'] for query in captured.captured_queries
+        if 'statsapp_useractivity' in query['sql'] and not query['sql'].lstrip().upper().startswith('SELECT')
+    ]
+
+
+def _user_lookups(captured):
+    return [query['sql'] for query in captured.captured_queries if 'FROM "auth_user"' in query['sql']]
+
+
+class AuthenticationActivityTests(TestCase):
+    def setUp(self):
+        activity.reset_activity_cache()
+        reset_auth_user_cache()
+        self.addCleanup(activity.reset_activity_cache)
+        self.addCleanup(reset_auth_user_cache)
+        self.admin = get_user_model().objects.create_user(
+            username='admin',
+            password='admin123',
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def test_activity_writes_are_coalesced_per_user(self):
+        self.assertEqual(self.api.get('/api/metrics/endpoints/').status_code, 200)
+        self.assertTrue(UserActivity.objects.filter(user=self.admin).exists())
+
+        with CaptureQueriesContext(connection) as captured:
+            for _ in range(3):
+                self.assertEqual(self.api.get('/api/metrics/endpoints/').status_code, 200)
+        self.assertEqual(_activity_writes(captured), [])
+
+        with override_settings(USER_ACTIVITY_WRITE_SECONDS=0):
+            with CaptureQueriesContext(connection) as captured:
+                self.api.get('/api/metrics/endpoints/')
+                self.api.get('/api/metrics/endpoints/')
+        self.assertEqual(len(_activity_writes(captured)), 2)
+
+    def test_inactivity_timeout_is_checked_against_cached_and_stored_activity(self):
+        self.api.get('/api/metrics/endpoints/')
+        stale = timezone.now() - timedelta(minutes=30)
+        UserActivity.objects.filter(user=self.admin).update(last_activity=stale)
+        activity._ACTIVITY_CACHE[self.admin.pk] = (stale, stale)
+
+        with patch.object(activity, '_get_inactivity_limit', return_value=timedelta(minutes=10)):
+            expired = self.api.get('/api/metrics/endpoints/')
+            UserActivity.objects.filter(user=self.admin).update(last_activity=timezone.now())
+            refreshed_elsewhere = self.api.get('/api/metrics/endpoints/')
+
+        self.assertEqual(expired.status_code, 401)
+        self.assertEqual(refreshed_elsewhere.status_code, 200)
+
+    def test_token_user_is_cached_until_the_user_changes(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.api.get('/api/metrics/endpoints/').status_code, 200)
+        self.assertEqual(len(_user_lookups(captured)), 1)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.api.get('/api/metrics/endpoints/').status_code, 200)
+        self.assertEqual(_user_lookups(captured), [])
+
+        self.admin.is_staff = False
+        self.admin.is_superuser = False
+        self.admin.save(update_fields=['is_staff', 'is_superuser'])
+        self.assertEqual(self.api.get('/api/metrics/endpoints/').status_code, 403)
+
+        self.admin.is_active = False
+        self.admin.save(update_fields=['is_active'])
+        self.assertEqual(self.api.get('/api/metrics/endpoints/').status_code, 401)
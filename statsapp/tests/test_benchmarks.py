@@ -0,0 +1,76 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from statsapp.models import AccountClient, AccountClientBranchBalance, ValeImportBatch, ValeImportItem
+
+
+class BenchmarkCommandTests(TestCase):
+    def setUp(self):
+        call_command(
+            'seed_synthetic_data',
+            branches=2,
+            years=1,
+            records_per_day=1,
+            bank_per_day=1,
+            clients=30,
+            transactions_per_client=2,
+            vale_batches=2,
+            vales_per_batch=3,
+            employees=2,
+            end_date='2026-07-20',
+            stdout=StringIO(),
+        )
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.baseline = Path(tmp_dir.name) / 'baseline.json'
+
+    def test_seed_generates_consistent_volumes(self):
+        self.assertEqual(AccountClient.objects.filter(external_id__startswith='SYN-').count(), 30)
+        self.assertEqual(ValeImportItem.objects.count(), 6)
+        self.assertFalse(ValeImportBatch.objects.filter(search_text='').exists())
+        self.assertTrue(AccountClientBranchBalance.objects.exists())
+
+    def test_reset_removes_seeded_operator_user(self):
+        self.assertTrue(get_user_model().objects.filter(username='syn-operador').exists())
+
+        call_command(
+            'seed_synthetic_data',
+            reset=True,
+            branches=1,
+            years=0,
+            records_per_day=0,
+            bank_per_day=0,
+            clients=0,
+            vale_batches=0,
+            employees=0,
+            end_date='2026-07-20',
+            stdout=StringIO(),
+        )
+
+        self.assertFalse(get_user_model().objects.filter(username='syn-operador').exists())
+
+    def test_benchmark_writes_baseline_and_detects_query_regressions(self):
+        call_command('benchmark_endpoints', iterations=1, update_baseline=True, baseline=str(self.baseline), stdout=StringIO())
+        data = json.loads(self.baseline.read_text(encoding='utf-8'))
+        self.assertIn('account_clients_stats', data['endpoints'])
+        self.assertGreater(data['endpoints']['billing_dashboard']['queries'], 0)
+
+        call_command('benchmark_endpoints', iterations=1, baseline=str(self.baseline), tolerance=100, stdout=StringIO())
+
+        data['endpoints']['stats']['queries'] = 0
+        self.baseline.write_text(json.dumps(data), encoding='utf-8')
+        with self.assertRaisesMessage(CommandError, 'stats:'):
+            call_command('benchmark_endpoints', iterations=1, baseline=str(self.baseline), tolerance=100, stdout=StringIO())
+
+    def test_salary_matcher_benchmark_compares_against_linear_scan(self):
+        output = StringIO()
+        call_command('benchmark_salary_matcher', synthetic=True, employees=20, rows=200, stdout=output)
+        self.assertIn('Mismos resultados', output.getvalue())
+        call_command('benchmark_salary_matcher', rows=50, stdout=output)
@@ -1,22 +1,43 @@
 import json
-from datetime import date
+import threading
+from unittest.mock import patch
+from datetime import date, timedelta
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, override_settings
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 
-from statsapp.fiscal_services import account_invoice_preview, process_getnet_webhook
+from statsapp.fiscal_services import (
+    _claim_external_events,
+    account_invoice_preview,
+    authorize_invoice,
+    billing_summary,
+    invoicing_job_payload,
+    create_account_invoice,
+    process_external_events,
+    process_getnet_webhook,
+    queue_account_invoicing,
+    receive_getnet_webhook,
+    reserve_voucher_numbers,
+    run_next_invoicing_job,
+)
 from statsapp.models import (
     AccountClient,
+    AccountInvoicingJob,
     AccountTransaction,
     BankTransaction,
     BankUploadBatch,
     Branch,
+    ExternalEvent,
     GetnetTerminal,
     Invoice,
     Payment,
+    VoucherSequence,
 )
 
 
@@ -95,6 +116,66 @@ class BillingFlowTests(TestCase):
         self.assertEqual(payment.provider_status, 'Pendiente')
         self.assertEqual(payment.amount, Decimal('25000.00'))
 
+    def test_getnet_csv_import_streams_rows_and_upserts_in_bulk(self):
+        header = (
+            'Nro de Establecimiento,Nombre Establecimiento,Fecha de Operación,Tipo de Transacción,'
+            'Canal,Código del POS,Estado,Cód. de Transacción,Moneda,'
+            'Monto Bruto Transacción,Monto Neto Transacción\n'
+        )
+
+        def csv_file(count):
+            lines = [
+                f'0000109768,CARNICERÍA,14/07/2026 09:14:49,Venta,pos,AR002R9R,Aprobado,bulk-{idx},ARS,{100 + idx},90\n'
+                for idx in range(count)
+            ]
+            return SimpleUploadedFile('getnet.csv', (header + ''.join(lines)).encode('cp1252'), content_type='text/csv')
+
+        Payment.objects.create(
+            source=Payment.Source.GETNET,
+            amount=Decimal('1'),
+            idempotency_key='getnet:bulk-0',
+            invoice=None,
+            meta={'getnet_webhook': {'id': 'bulk-0'}},
+        )
+        with CaptureQueriesContext(connection) as few:
+            first = self.client_api.post('/api/billing/getnet/import/', {'file': csv_file(3)}, format='multipart')
+        with CaptureQueriesContext(connection) as many:
+            second = self.client_api.post('/api/billing/getnet/import/', {'file': csv_file(300)}, format='multipart')
+
+        self.assertEqual(first.data['created'], 2)
+        self.assertEqual(first.data['updated'], 1)
+        self.assertEqual(second.data['rows'], 300)
+        self.assertEqual(second.data['created'], 297)
+        self.assertEqual(second.data['updated'], 3)
+        # Antes eran 2-3 consultas por fila; ahora una lectura y un upsert por bloque (SQLite parte el INSERT en lotes).
+        self.assertLessEqual(len(few.captured_queries), 12)
+        self.assertLessEqual(len(many.captured_queries), 15)
+        payment = Payment.objects.get(idempotency_key='getnet:bulk-0')
+        self.assertEqual(payment.amount, Decimal('100.00'))
+        self.assertEqual(payment.terminal.code, 'AR002R9R')
+        self.assertEqual(payment.meta['getnet_webhook'], {'id': 'bulk-0'})
+        self.assertEqual(payment.meta['getnet_csv']['establishment_name'], 'CARNICERÍA')
+
+    def test_getnet_csv_import_rolls_back_rows_before_an_invalid_one(self):
+        content = (
+            'Nro de Establecimiento,Nombre Establecimiento,Fecha de Operación,Tipo de Transacción,'
+            'Canal,Código del POS,Estado,Cód. de Transacción,Moneda,'
+            'Monto Bruto Transacción,Monto Neto Transacción\n'
+            '1,LOCAL,14/07/2026 09:14:49,Venta,pos,AR002R9R,Aprobado,dup-1,ARS,100,90\n'
+            '1,LOCAL,14/07/2026 09:15:49,Venta,pos,AR002R9R,Aprobado,dup-1,ARS,100,90\n'
+        )
+
+        response = self.client_api.post(
+            '/api/billing/getnet/import/',
+            {'file': SimpleUploadedFile('getnet.csv', content.encode('utf-8'), content_type='text/csv')},
+            format='multipart',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('duplicados', response.data['detail'])
+        self.assertFalse(Payment.objects.filter(source=Payment.Source.GETNET).exists())
+        self.assertFalse(GetnetTerminal.objects.filter(code='AR002R9R').exists())
+
     def test_unknown_getnet_terminal_can_be_assigned_after_import(self):
         response = self.client_api.post(
             '/api/billing/getnet/import/',
@@ -180,6 +261,301 @@ class BillingFlowTests(TestCase):
         self.assertEqual(response.data['getnet']['bank_settled_total'], 950.0)
         self.assertEqual(response.data['getnet']['bank_settled_by_bank']['santander'], 950.0)
 
+    def test_billing_summary_uses_one_grouped_query_per_table(self):
+        terminal = GetnetTerminal.objects.create(code='AR002R9R')
+        for key, status_value, amount, terminal_value in (
+            ('getnet:t1', Payment.Status.APPROVED, '300', terminal),
+            ('getnet:other', Payment.Status.APPROVED, '700', None),
+            ('getnet:pending', Payment.Status.PENDING, '50', terminal),
+            ('getnet:review', Payment.Status.NEEDS_REVIEW, '25', None),
+        ):
+            Payment.objects.create(
+                source=Payment.Source.GETNET,
+                status=status_value,
+                date=date(2026, 7, 10),
+                amount=Decimal(amount),
+                terminal=terminal_value,
+                idempotency_key=key,
+            )
+        Payment.objects.create(source=Payment.Source.CASH, status=Payment.Status.APPROVED, date=date(2026, 7, 10), amount=Decimal('80'), idempotency_key='cash:1')
+        Invoice.objects.create(client=self.account, status=Invoice.Status.DRAFT, issue_date=date(2026, 7, 5), total_amount=Decimal('10'), net_amount=Decimal('10'))
+        batch = BankUploadBatch.objects.create(bank='bancon')
+        settlement = BankTransaction.objects.create(batch=batch, date=date(2026, 7, 11), concept='Acreditacion', description='Liquidacion GETNET', amount=90)
+
+        with self.assertNumQueries(5):
+            summary = billing_summary(date(2026, 7, 1), date(2026, 7, 31))
+        by_terminal = billing_summary(date(2026, 7, 1), date(2026, 7, 31), getnet_terminal_id=terminal.id)
+
+        self.assertTrue(settlement.is_getnet)
+        self.assertEqual(summary['invoices']['draft_total'], 10.0)
+        self.assertEqual(summary['invoices']['count'], 1)
+        self.assertEqual(summary['collections']['getnet'], 1000.0)
+        self.assertEqual(summary['collections']['cash'], 80.0)
+        self.assertEqual(summary['getnet']['pending_total'], 75.0)
+        self.assertEqual(summary['getnet']['pending_count'], 2)
+        self.assertEqual(summary['getnet']['bank_settled_by_bank'], {'bancon': 90.0})
+        self.assertEqual(summary['collections']['bancon'], 0.0)
+        self.assertEqual(by_terminal['collections']['getnet'], 300.0)
+        self.assertEqual(by_terminal['collections']['cash'], 80.0)
+        self.assertEqual(by_terminal['getnet']['pending_count'], 1)
+
+    def test_voucher_numbers_continue_existing_series_and_rollbacks_leave_no_gaps(self):
+        Invoice.objects.create(point_of_sale=5, voucher_type=11, voucher_number=41, status=Invoice.Status.AUTHORIZED, idempotency_key='legacy-41')
+
+        with transaction.atomic():
+            block = reserve_voucher_numbers(5, 11, count=3)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            reserve_voucher_numbers(5, 11, count=2)
+            raise RuntimeError('falla el proveedor')
+        with transaction.atomic():
+            after_rollback = reserve_voucher_numbers(5, 11)
+            other_type = reserve_voucher_numbers(5, 6)
+
+        self.assertEqual(list(block), [42, 43, 44])
+        self.assertEqual(list(after_rollback), [45])
+        self.assertEqual(list(other_type), [1])
+        self.assertEqual(VoucherSequence.objects.get(point_of_sale=5, voucher_type=11).last_number, 45)
+
+    def test_batch_authorization_numbers_each_series_in_one_block(self):
+        def invoice(key, point_of_sale=5, amount='100', issue_date=date(2026, 7, 20), **extra):
+            return Invoice.objects.create(
+                client=self.account,
+                point_of_sale=point_of_sale,
+                voucher_type=11,
+                issue_date=issue_date,
+                total_amount=Decimal(amount),
+                net_amount=Decimal(amount),
+                idempotency_key=key,
+                **extra,
+            )
+
+        first, second, third = invoice('batch-1'), invoice('batch-2'), invoice('batch-3')
+        other_series = invoice('batch-pv6', point_of_sale=6)
+        empty = invoice('batch-empty', amount='0')
+        done = invoice('batch-done', status=Invoice.Status.AUTHORIZED, voucher_number=7)
+        missing = '00000000-0000-0000-0000-000000000000'
+        ids = [str(item.id) for item in (first, second, third, other_series, empty, done)] + [missing]
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client_api.post('/api/billing/invoices/authorize/', {'invoice_ids': ids}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['result'] for item in response.data['results']],
+            ['authorized', 'authorized', 'authorized', 'authorized', 'error', 'already_authorized', 'not_found'],
+        )
+        self.assertEqual(response.data['authorized'], 4)
+        self.assertEqual([item['invoice']['voucher_number'] for item in response.data['results'][:4]], [8, 9, 10, 1])
+        self.assertEqual(Invoice.objects.get(pk=empty.pk).status, Invoice.Status.ERROR)
+        self.assertLessEqual(len(captured.captured_queries), 14)
+
+        late = invoice('batch-late')
+        invoice('batch-other-month', issue_date=date(2026, 8, 1))
+        by_period = self.client_api.post(
+            '/api/billing/invoices/authorize/',
+            {'start_date': '2026-07-01', 'end_date': '2026-07-31'},
+            format='json',
+        )
+        invalid = self.client_api.post('/api/billing/invoices/authorize/', {'invoice_ids': ['x']}, format='json')
+
+        self.assertEqual(by_period.data['authorized'], 1)
+        self.assertEqual(by_period.data['error'], 0)
+        self.assertEqual(by_period.data['remaining'], 0)
+        self.assertFalse(by_period.data['has_more'])
+        late.refresh_from_db()
+        self.assertEqual(late.voucher_number, 11)
+        self.assertEqual(invalid.status_code, 400)
+
+        invoice('batch-capped-1', issue_date=date(2026, 9, 1))
+        invoice('batch-capped-2', issue_date=date(2026, 9, 2))
+        with patch('statsapp.fiscal_services.MAX_INVOICES_PER_AUTHORIZATION', 1):
+            capped = self.client_api.post(
+                '/api/billing/invoices/authorize/',
+                {'start_date': '2026-09-01', 'end_date': '2026-09-30'},
+                format='json',
+            )
+        self.assertEqual(capped.data['authorized'], 1)
+        self.assertEqual(capped.data['remaining'], 1)
+        self.assertTrue(capped.data['has_more'])
+
+        # Las invalidas al principio del periodo no se vuelven a tomar: cada llamada avanza.
+        invoice('batch-oct-empty-1', amount='0', issue_date=date(2026, 10, 1))
+        invoice('batch-oct-empty-2', amount='0', issue_date=date(2026, 10, 1))
+        invoice('batch-oct-valid', issue_date=date(2026, 10, 2))
+        calls = []
+        with patch('statsapp.fiscal_services.MAX_INVOICES_PER_AUTHORIZATION', 1):
+            while not calls or calls[-1]['has_more']:
+                self.assertLess(len(calls), 3)
+                calls.append(self.client_api.post(
+                    '/api/billing/invoices/authorize/',
+                    {'start_date': '2026-10-01', 'end_date': '2026-10-31'},
+                    format='json',
+                ).data)
+        self.assertEqual([call['authorized'] for call in calls], [1])
+
+    @override_settings(ARCA_PROVIDER='mock', ARCA_DEFAULT_POINT_OF_SALE=5, ARCA_DEFAULT_VOUCHER_TYPE=11)
+    def test_month_close_invoicing_job_bills_every_pending_account_in_bulk(self):
+        central = Branch.objects.create(name='Casa Central', slug='casa-central')
+        north = Branch.objects.create(name='Norte', slug='norte')
+        self.tx.branch = central
+        self.tx.save(update_fields=['branch'])
+
+        def pending(client, external_id, amount, branch, tx_date=date(2026, 7, 15), paid='0'):
+            return AccountTransaction.objects.create(
+                client=client,
+                branch=branch,
+                external_id=external_id,
+                description=f'Venta {external_id}',
+                date=tx_date,
+                original_amount=Decimal(amount),
+                paid_amount=Decimal(paid),
+            )
+
+        pending(self.account, 'ana-north', '300', north)
+        others = [
+            AccountClient.objects.create(external_id=f'C-2{idx}', first_name='Cliente', last_name=f'Mes {idx}')
+            for idx in range(4)
+        ]
+        for idx, client in enumerate(others):
+            pending(client, f'c{idx}-a', '100', central)
+            pending(client, f'c{idx}-b', '50', central, paid='20')
+        pending(others[0], 'c0-paid', '80', central, paid='80')
+        pending(others[0], 'c0-august', '90', central, tx_date=date(2026, 8, 2))
+        create_account_invoice(others[1], ['c1-a'])
+
+        queued = self.client_api.post('/api/billing/invoicing-jobs/', {'year': 2026, 'month': 7, 'authorize': True}, format='json')
+        again = self.client_api.post('/api/billing/invoicing-jobs/', {'year': 2026, 'month': 7, 'authorize': True}, format='json')
+        unauthorized = self.client_api.post('/api/billing/invoicing-jobs/', {'year': 2026, 'month': 7}, format='json')
+        self.assertEqual(queued.status_code, 202)
+        self.assertEqual(queued.data['status'], 'queued')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data['id'], queued.data['id'])
+        self.assertEqual(unauthorized.status_code, 409)
+        self.assertEqual(unauthorized.data['job']['id'], queued.data['id'])
+
+        with patch('statsapp.fiscal_services.INVOICING_JOB_CHUNK_SIZE', 2):
+            job = run_next_invoicing_job()
+        self.assertIsNone(run_next_invoicing_job())
+
+        progress = self.client_api.get(f"/api/billing/invoicing-jobs/{queued.data['id']}/")
+        self.assertEqual(progress.data['status'], 'done')
+        self.assertEqual(progress.data['total_groups'], 6)
+        self.assertEqual(progress.data['progress'], 100.0)
+        self.assertEqual(job.invoices_created, 6)
+        self.assertEqual(job.invoices_authorized, 6)
+        self.assertEqual(progress.data['total_amount'], 1500 + 300 + 130 * 3 + 30)
+
+        job_invoices = Invoice.objects.filter(invoicing_job=job)
+        self.assertEqual(set(job_invoices.values_list('status', flat=True)), {Invoice.Status.AUTHORIZED})
+        self.assertEqual(sorted(job_invoices.values_list('voucher_number', flat=True)), [1, 2, 3, 4, 5, 6])
+        ana_north = job_invoices.get(client=self.account, branch=north)
+        self.assertEqual(ana_north.total_amount, Decimal('300'))
+        c0 = job_invoices.get(client=others[0])
+        self.assertEqual(sorted(c0.lines.values_list('account_transaction__external_id', flat=True)), ['c0-a', 'c0-b'])
+        self.assertEqual(c0.total_amount, Decimal('130'))
+        self.assertEqual(job_invoices.get(client=others[1]).total_amount, Decimal('30'))
+        self.assertFalse(AccountTransaction.objects.filter(external_id='c0-august', invoice_link__isnull=False).exists())
+
+    @override_settings(ARCA_PROVIDER='mock', ARCA_DEFAULT_POINT_OF_SALE=5, ARCA_DEFAULT_VOUCHER_TYPE=11, INVOICING_JOB_STALE_SECONDS=600)
+    def test_abandoned_invoicing_job_is_resumed_by_the_worker(self):
+        job, _ = queue_account_invoicing(date(2026, 7, 31), authorize=True)
+        job.status = AccountInvoicingJob.Status.RUNNING
+        job.total_groups = 2
+        job.processed_groups = 1
+        job.save(update_fields=['status', 'total_groups', 'processed_groups'])
+        # La corrida cortada alcanzo a crear esta factura pero no a autorizarla.
+        half_done = create_account_invoice(self.account, ['tx-1'])
+        half_done.invoicing_job = job
+        half_done.save(update_fields=['invoicing_job'])
+        other = AccountClient.objects.create(external_id='C-300', last_name='Gomez')
+        AccountTransaction.objects.create(
+            client=other,
+            external_id='tx-gomez',
+            date=date(2026, 7, 12),
+            original_amount=Decimal('200'),
+        )
+
+        self.assertIsNone(run_next_invoicing_job())
+        again, created = queue_account_invoicing(date(2026, 7, 31), authorize=True)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, job.pk)
+
+        resumed = run_next_invoicing_job(now=timezone.now() + timedelta(seconds=601))
+        self.assertEqual(resumed.pk, job.pk)
+        self.assertEqual(resumed.status, AccountInvoicingJob.Status.DONE)
+        self.assertEqual(resumed.invoices_created, 1)
+        self.assertEqual(resumed.invoices_authorized, 2)
+        self.assertEqual((resumed.processed_groups, resumed.total_groups), (2, 2))
+        self.assertEqual(invoicing_job_payload(resumed)['progress'], 100.0)
+        half_done.refresh_from_db()
+        self.assertEqual(half_done.status, Invoice.Status.AUTHORIZED)
+        self.assertEqual(Invoice.objects.filter(client=self.account).count(), 1)
+
+    def test_invoice_and_payment_lists_page_by_cursor_without_gaps(self):
+        branch = Branch.objects.create(name='Sucursal Listados', slug='sucursal-listados')
+        invoice = Invoice.objects.create(
+            client=self.account,
+            branch=branch,
+            issue_date=date(2026, 7, 20),
+            total_amount=Decimal('1500'),
+            idempotency_key='list:account',
+        )
+        Invoice.objects.bulk_create([
+            Invoice(issue_date=date(2026, 7, 1 + (index % 3)), idempotency_key=f'list:{index}')
+            for index in range(6)
+        ])
+        Invoice.objects.create(issue_date=date(2026, 8, 1), idempotency_key='list:next-month')
+        Payment.objects.bulk_create([
+            Payment(
+                source=Payment.Source.MANUAL,
+                date=date(2026, 7, 5 + (index % 2)),
+                amount=Decimal('10'),
+                idempotency_key=f'list-payment:{index}',
+                client=self.account if index == 0 else None,
+            )
+            for index in range(5)
+        ])
+
+        def collect(url):
+            rows = []
+            cursor = ''
+            pages = 0
+            while True:
+                response = self.client_api.get(f'{url}?year=2026&month=7&limit=2&cursor={cursor}')
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+                self.assertEqual(data['limit'], 2)
+                self.assertLessEqual(len(data['results']), 2)
+                rows.extend(data['results'])
+                pages += 1
+                if not data['next_cursor']:
+                    return rows, pages
+                cursor = data['next_cursor']
+
+        invoices, pages = collect('/api/billing/invoices/')
+        self.assertEqual(pages, 4)
+        self.assertEqual(len({row['id'] for row in invoices}), 7)
+        self.assertEqual(
+            [row['issue_date'] for row in invoices],
+            sorted((row['issue_date'] for row in invoices), reverse=True),
+        )
+        first = invoices[0]
+        self.assertEqual(first['id'], str(invoice.id))
+        self.assertEqual(first['client_name'], 'Perez, Ana')
+        self.assertEqual(first['branch'], {'id': branch.id, 'name': 'Sucursal Listados'})
+        self.assertEqual(first['status_label'], 'Borrador')
+        self.assertNotIn('lines', first)
+
+        payments, _ = collect('/api/billing/payments/')
+        self.assertEqual(len({row['id'] for row in payments}), 5)
+        self.assertEqual(
+            sum(1 for row in payments if row['client_name'] == 'Perez, Ana'),
+            1,
+        )
+
+        response = self.client_api.get('/api/billing/invoices/?year=2026&month=7&cursor=no-es-un-cursor')
+        self.assertEqual(response.status_code, 400)
+
     @override_settings(ARCA_PROVIDER='mock', ARCA_DEFAULT_POINT_OF_SALE=5, ARCA_DEFAULT_VOUCHER_TYPE=11)
     def test_create_authorized_invoice_from_account_debt(self):
         response = self.client_api.post(
@@ -303,6 +679,79 @@ class BillingFlowTests(TestCase):
         self.assertEqual(payment.status, Payment.Status.NEEDS_REVIEW)
         self.assertIsNone(payment.invoice_id)
 
+    def test_getnet_webhook_only_enqueues_and_worker_applies_events(self):
+        invoice = Invoice.objects.create(
+            client=self.account,
+            source=Invoice.Source.GETNET,
+            status=Invoice.Status.DRAFT,
+            external_reference='order-queued',
+            idempotency_key='order-queued',
+            total_amount=Decimal('2000'),
+            net_amount=Decimal('2000'),
+        )
+        payload = {'id': 'evt-queued', 'payment_id': 'pay-queued', 'order_id': 'order-queued', 'status': 'APPROVED', 'amount': '2000'}
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client_api.post('/api/billing/getnet/webhook/', payload, format='json')
+        repeated = self.client_api.post('/api/billing/getnet/webhook/', payload, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(response.data['duplicate'])
+        self.assertFalse(repeated.data['duplicate'])
+        self.assertTrue(all('statsapp_externalevent' in query['sql'] or 'SAVEPOINT' in query['sql'] for query in captured.captured_queries))
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(ExternalEvent.objects.get().status, ExternalEvent.Status.RECEIVED)
+
+        self.assertEqual(process_external_events(), {'processed': 1, 'retrying': 0, 'failed': 0})
+        self.assertEqual(process_external_events(), {'processed': 0, 'retrying': 0, 'failed': 0})
+
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, Invoice.Status.AUTHORIZED)
+        self.assertEqual(Payment.objects.get().invoice, invoice)
+        self.assertEqual(ExternalEvent.objects.get().status, ExternalEvent.Status.PROCESSED)
+        self.assertTrue(self.client_api.post('/api/billing/getnet/webhook/', payload, format='json').data['duplicate'])
+
+    @override_settings(EXTERNAL_EVENT_MAX_ATTEMPTS=2, EXTERNAL_EVENT_RETRY_SECONDS=60)
+    def test_failed_events_back_off_and_are_dead_lettered(self):
+        receive_getnet_webhook(json.dumps({'id': 'evt-bad', 'payment_id': 'pay-bad', 'amount': '0'}).encode('utf-8'))
+        start = timezone.now()
+
+        first = process_external_events(now=start)
+        event = ExternalEvent.objects.get(event_id='evt-bad')
+        too_soon = process_external_events(now=start + timedelta(seconds=30))
+        last = process_external_events(now=start + timedelta(seconds=61))
+
+        self.assertEqual(first, {'processed': 0, 'retrying': 1, 'failed': 0})
+        self.assertEqual(event.next_attempt_at, start + timedelta(seconds=60))
+        self.assertEqual(too_soon['retrying'], 0)
+        self.assertEqual(last, {'processed': 0, 'retrying': 0, 'failed': 1})
+        event.refresh_from_db()
+        self.assertEqual(event.status, ExternalEvent.Status.ERROR)
+        self.assertEqual(event.attempts, 2)
+        self.assertIn('monto valido', event.error_message)
+        self.assertFalse(Payment.objects.exists())
+
+        # Un reenvio del proveedor vuelve a encolar el evento descartado.
+        receive_getnet_webhook(json.dumps({'id': 'evt-bad', 'payment_id': 'pay-bad', 'amount': '10'}).encode('utf-8'))
+        self.assertEqual(process_external_events()['processed'], 1)
+
+    @override_settings(EXTERNAL_EVENT_LEASE_SECONDS=120)
+    def test_events_claimed_by_a_dead_worker_are_retaken_after_the_lease(self):
+        receive_getnet_webhook(json.dumps({'id': 'evt-lease', 'payment_id': 'pay-lease', 'amount': '10'}).encode('utf-8'))
+        start = timezone.now()
+        # Un worker reservo el evento y se cayo antes de aplicarlo.
+        claimed, lease_until = _claim_external_events(10, start)
+        event = ExternalEvent.objects.get(event_id='evt-lease')
+
+        self.assertEqual(claimed, [event.pk])
+        self.assertEqual(event.next_attempt_at, lease_until)
+        self.assertEqual(process_external_events(now=start + timedelta(seconds=60))['processed'], 0)
+        self.assertEqual(process_external_events(now=start + timedelta(seconds=121))['processed'], 1)
+        event.refresh_from_db()
+        self.assertEqual(event.status, ExternalEvent.Status.PROCESSED)
+        self.assertIsNone(event.next_attempt_at)
+        self.assertEqual(event.attempts, 1)
+
     def test_billing_summary_includes_bank_income_and_getnet_payments(self):
         batch = BankUploadBatch.objects.create(
             bank='santander',
@@ -335,3 +784,42 @@ class BillingFlowTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['collections']['santander'], 1000.0)
         self.assertEqual(response.data['collections']['getnet'], 750.0)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class VoucherSequenceConcurrencyTests(TransactionTestCase):
+    """Necesita bloqueos de fila reales (PostgreSQL); SQLite serializa toda la base y no aplica."""
+
+    def test_concurrent_authorizations_get_consecutive_numbers(self):
+        invoices = [
+            Invoice.objects.create(
+                point_of_sale=3,
+                voucher_type=11,
+                total_amount=Decimal('100'),
+                net_amount=Decimal('100'),
+                idempotency_key=f'concurrent-{idx}',
+            )
+            for idx in range(8)
+        ]
+        barrier = threading.Barrier(len(invoices))
+        errors = []
+
+        def authorize(invoice):
+            try:
+                barrier.wait()
+                authorize_invoice(invoice)
+            except Exception as exc:  # pragma: no cover - se reporta en el assert
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=authorize, args=(invoice,)) for invoice in invoices]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        numbers = sorted(Invoice.objects.filter(point_of_sale=3, voucher_type=11).values_list('voucher_number', flat=True))
+        self.assertEqual(numbers, list(range(1, len(invoices) + 1)))
+        self.assertEqual(VoucherSequence.objects.get(point_of_sale=3, voucher_type=11).last_number, len(invoices))
@@ -1,14 +1,17 @@
 from datetime import date
 from decimal import Decimal
 from importlib import import_module
+from io import StringIO
 
 from django.apps import apps as django_apps
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 from rest_framework.test import APIClient
 
 from statsapp.models import (
     AccountClient,
+    AccountClientBranchBalance,
     AccountTransaction,
     Branch,
     ExpenseEntry,
@@ -18,6 +21,7 @@ from statsapp.models import (
     Record,
     UploadBatch,
 )
+from statsapp.views import _recalc_account_totals
 
 
 class PrimaryBranchBackfillTests(TestCase):
@@ -164,3 +168,92 @@ class BranchSupportTests(TestCase):
 
         tx_b = AccountTransaction.objects.get(external_id='tx-b')
         self.assertEqual(tx_b.paid_amount, Decimal('0.00'))
+
+    def test_account_clients_list_uses_branch_balances_and_cursor(self):
+        clients = []
+        for index, (last_name, amount_a, amount_b) in enumerate((
+            ('Alvarez', '300', '0'),
+            ('Benitez', '100', '900'),
+            ('Castro', '200', '0'),
+        )):
+            client = AccountClient.objects.create(
+                external_id=f'cursor-{index}',
+                first_name='Cliente',
+                last_name=last_name,
+            )
+            clients.append(client)
+            AccountTransaction.objects.create(
+                client=client,
+                branch=self.branch_a,
+                external_id=f'cursor-a-{index}',
+                original_amount=Decimal(amount_a),
+                status=AccountTransaction.Status.ACTIVE,
+            )
+            if amount_b != '0':
+                AccountTransaction.objects.create(
+                    client=client,
+                    branch=self.branch_b,
+                    external_id=f'cursor-b-{index}',
+                    original_amount=Decimal(amount_b),
+                    status=AccountTransaction.Status.OVERDUE,
+                )
+        _recalc_account_totals([client.id for client in clients])
+        self.api.post(f'/api/accounts/clients/{clients[0].id}/pay/', {
+            'branch_id': str(self.branch_a.id),
+            'mode': 'full',
+        }, format='json')
+
+        first_page = self.api.get(
+            f'/api/accounts/clients/?branch_id={self.branch_a.id}&ordering=debt&limit=2'
+        )
+        second_page = self.api.get(
+            f'/api/accounts/clients/?branch_id={self.branch_a.id}&ordering=debt&limit=2'
+            f'&cursor={first_page.data["next_cursor"]}'
+        )
+
+        self.assertEqual(first_page.status_code, 200)
+        self.assertEqual(first_page.data['count'], 3)
+        self.assertEqual(
+            [(row['last_name'], row['branch_total_debt']) for row in first_page.data['results']],
+            [('Castro', 200.0), ('Benitez', 100.0)],
+        )
+        self.assertEqual(first_page.data['summary']['paid'], 1)
+        self.assertEqual(first_page.data['summary']['active'], 2)
+        self.assertEqual(first_page.data['summary']['all'], 3)
+        self.assertEqual([row['last_name'] for row in second_page.data['results']], ['Alvarez'])
+        self.assertEqual(second_page.data['results'][0]['branch_status'], 'paid')
+        self.assertIsNone(second_page.data['next_cursor'])
+
+    def test_branch_balances_follow_transaction_changes(self):
+        client = AccountClient.objects.create(external_id='balance-client', first_name='Cliente', last_name='Saldo')
+        created = self.api.post(f'/api/accounts/clients/{client.id}/transactions/', {
+            'branch_id': str(self.branch_a.id),
+            'amount': '1200',
+            'date': date.today().isoformat(),
+        }, format='json')
+        self.api.post(f'/api/accounts/clients/{client.id}/transactions/', {
+            'branch_id': str(self.branch_b.id),
+            'amount': '300',
+            'date': date.today().isoformat(),
+        }, format='json')
+
+        balance_a = AccountClientBranchBalance.objects.get(client=client, branch=self.branch_a)
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(balance_a.total_debt, Decimal('1200.00'))
+        self.assertEqual(balance_a.pending_count, 1)
+        self.assertEqual(AccountClientBranchBalance.objects.filter(client=client).count(), 2)
+
+        detail = self.api.get(f'/api/accounts/clients/{client.id}/?branch_id={self.branch_a.id}')
+        summary = self.api.get('/api/billing/summary/?year=2026&month=7')
+        self.assertEqual(detail.data['totals'], {'original': 1200.0, 'paid': 0.0, 'remaining': 1200.0})
+        by_branch = {row['branch_id']: row['total_debt'] for row in summary.data['account_current']['by_branch']}
+        self.assertEqual(by_branch, {self.branch_a.id: 1200.0, self.branch_b.id: 300.0})
+
+        self.api.delete(f'/api/accounts/transactions/{created.data["transaction"]["id"]}/')
+
+        self.assertFalse(AccountClientBranchBalance.objects.filter(client=client, branch=self.branch_a).exists())
+        AccountClientBranchBalance.objects.all().delete()
+        call_command('rebuild_account_balances', stdout=StringIO())
+        rebuilt = AccountClientBranchBalance.objects.get(client=client)
+        self.assertEqual(rebuilt.branch, self.branch_b)
+        self.assertEqual(rebuilt.total_debt, Decimal('300.00'))
@@ -0,0 +1,80 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from statsapp.models import AccountClient
+from statsapp.request_metrics import RequestMetricsMiddleware, reset_endpoint_stats
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        reset_endpoint_stats()
+        self.addCleanup(reset_endpoint_stats)
+        self.admin = get_user_model().objects.create_user(
+            username='admin',
+            password='admin123',
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def test_response_has_server_timing_and_endpoint_stats(self):
+        AccountClient.objects.create(external_id='metrics-1', first_name='Ana', last_name='Perez')
+
+        response = self.api.get('/api/accounts/clients/')
+        stats = self.api.get('/api/metrics/endpoints/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('app;dur=', response['Server-Timing'])
+        rows = {row['endpoint']: row for row in stats.data['endpoints']}
+        row = rows['GET /api/accounts/clients/']
+        self.assertEqual(row['requests'], 1)
+        self.assertGreater(row['avg_queries'], 0)
+
+    @override_settings(REQUEST_METRICS_SLOW_QUERIES=1)
+    def test_slow_requests_log_repeated_sql(self):
+        with self.assertLogs('statsapp.request_metrics', level='WARNING') as logs:
+            self.api.get('/api/accounts/clients/')
+
+        self.assertIn('slow_request', logs.output[0])
+        payload = json.loads(logs.records[0].getMessage().split('slow_request ', 1)[1])
+        self.assertGreater(payload['queries'], 0)
+        counts = [entry['count'] for entry in payload['top_sql']]
+        self.assertTrue(all(count > 1 for count in counts))
+        self.assertEqual(counts, sorted(counts, reverse=True))
+
+    @override_settings(REQUEST_METRICS_SLOW_QUERIES=1, REQUEST_METRICS_TOP_SQL=2)
+    def test_slow_request_top_sql_is_ordered_by_repetitions(self):
+        often = 'SELECT 1 AS often'
+        twice = 'SELECT 2 AS twice'
+        once = 'SELECT 3 AS once'
+
+        def view(request):
+            with connection.cursor() as cursor:
+                for sql in (often, twice, often, once, twice, often):
+                    cursor.execute(sql)
+            return HttpResponse('ok')
+
+        middleware = RequestMetricsMiddleware(view)
+        with self.assertLogs('statsapp.request_metrics', level='WARNING') as logs:
+            middleware(RequestFactory().get('/api/lento/'))
+
+        payload = json.loads(logs.records[0].getMessage().split('slow_request ', 1)[1])
+        self.assertEqual(payload['queries'], 6)
+        self.assertEqual(
+            [(entry['sql'], entry['count']) for entry in payload['top_sql']],
+            [(often, 3), (twice, 2)],
+        )
+
+    def test_endpoint_stats_require_admin(self):
+        operator = get_user_model().objects.create_user(username='operador', password='x', is_staff=False)
+        api = APIClient()
+        api.force_authenticate(operator)
+
+        self.assertEqual(api.get('/api/metrics/endpoints/').status_code, 403)
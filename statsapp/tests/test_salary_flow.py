@@ -1,12 +1,16 @@
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import OperationalError
+from django.core.management import call_command
+from django.db import OperationalError, connection
 from django.db.models.query import QuerySet
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 
 from statsapp.models import (
@@ -22,15 +26,24 @@ from statsapp.models import (
     ExpenseCategory,
     ExpenseEntry,
     ExpenseSubcategory,
+    SalarySyncState,
 )
 from statsapp.salary_services import (
+    EmployeeMatcher,
+    _employee_matchers,
+    _salary_unmatched,
+    _match_employee,
     aguinaldo_estimate,
+    aguinaldo_semester_summary,
     create_employee,
+    ensure_employee_alias,
     salaries_monthly_summary,
     salaries_summary,
+    salary_movements_page,
     save_aguinaldo_remunerations,
     sync_employee_movements,
 )
+from statsapp.salary_sync import request_salary_sync, salary_sync_due, salary_sync_freshness
 
 
 class SalaryFlowTests(TestCase):
@@ -94,7 +107,8 @@ class SalaryFlowTests(TestCase):
         self.assertEqual(first['totals']['account_current'], 12000.0)
         self.assertEqual(first['totals']['total'], 137000.0)
         self.assertEqual(second['sync']['created'], 0)
-        self.assertEqual(len(second['movements']), 3)
+        self.assertEqual(second['movements_page']['count'], 3)
+        self.assertNotIn('movements', second)
 
     def test_salaries_dashboard_endpoint_returns_employee_rows(self):
         ExpenseEntry.objects.create(
@@ -106,11 +120,100 @@ class SalaryFlowTests(TestCase):
             description='Adelanto',
         )
 
+        stale = self.api.get('/api/salaries/summary/?year=2026&month=7')
+        call_command('run_salary_sync', stdout=StringIO())
         response = self.api.get('/api/salaries/summary/?year=2026&month=7')
 
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.data['totals']['cash_expense'], 0.0)
+        self.assertTrue(stale.data['freshness']['pending'])
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['totals']['cash_expense'], 35000.0)
         self.assertEqual(response.data['employees'][0]['employee_name'], 'Diego Empleado')
+        self.assertFalse(response.data['freshness']['pending'])
+        self.assertIsNotNone(response.data['freshness']['synced_at'])
+
+    def test_salary_summaries_are_grouped_and_movements_paginated(self):
+        batch = BankUploadBatch.objects.create(
+            bank='santander',
+            fecha_desde=date(2026, 1, 1),
+            fecha_hasta=date(2026, 7, 31),
+        )
+        for month in (1, 3, 7):
+            BankTransaction.objects.create(
+                batch=batch,
+                date=date(2026, month, 5),
+                concept='TRANSFERENCIA DIEGO EMP',
+                amount=-1000 * month,
+            )
+            ExpenseEntry.objects.create(
+                date=date(2026, month, 6),
+                amount=Decimal('100'),
+                method=ExpenseEntry.Method.CASH,
+                category='SUELDOS',
+                subcategory='DIEGO',
+            )
+        sync_employee_movements()
+
+        with self.assertNumQueries(3):
+            monthly = salaries_monthly_summary(2026)
+        months = {row['month']: row for row in monthly['employees'][0]['months']}
+        self.assertEqual(monthly['employees'][0]['total'], 11300.0)
+        self.assertEqual(months[3]['bank_transfer'], 3000.0)
+        self.assertEqual(months[3]['cash_expense'], 100.0)
+        self.assertEqual(months[2]['total'], 0.0)
+
+        page = self.api.get('/api/salaries/movements/?year=2026&month=7&limit=1')
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(page.data['count'], 2)
+        self.assertEqual(page.data['next_offset'], 1)
+        self.assertEqual(page.data['results'][0]['source'], 'cash_expense')
+        filtered = self.api.get('/api/salaries/movements/?year=2026&month=7&source=bank_transfer')
+        self.assertEqual([row['amount'] for row in filtered.data['results']], [7000.0])
+        invalid = self.api.get('/api/salaries/movements/?year=2026&month=7&source=otro')
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_imports_request_background_salary_sync(self):
+        call_command('run_salary_sync', stdout=StringIO())
+        self.assertFalse(salary_sync_due(max_age_seconds=3600))
+
+        response = self.api.post('/api/expenses/import/', {
+            'expenses': [{
+                'date': '2026-07-10',
+                'amount': 35000,
+                'method': 'EFECTIVO',
+                'category': 'SUELDOS',
+                'subcategory': 'DIEGO',
+            }],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(salary_sync_due(max_age_seconds=3600))
+        monthly = self.api.get('/api/salaries/monthly/?year=2026')
+        self.assertTrue(monthly.data['freshness']['pending'])
+        self.assertEqual(monthly.data['employees'], [])
+
+        call_command('run_salary_sync', stdout=StringIO())
+        self.assertFalse(salary_sync_due(max_age_seconds=3600))
+        monthly = self.api.get('/api/salaries/monthly/?year=2026')
+        self.assertEqual(monthly.data['employees'][0]['cash_expense'], 35000.0)
+
+    def test_sync_request_made_while_a_sync_runs_stays_pending(self):
+        call_command('run_salary_sync', stdout=StringIO())
+        original = _employee_matchers
+
+        def request_mid_sync():
+            # Llega un import mientras el sync ya tomo el lock y esta leyendo las fuentes.
+            request_salary_sync(EmployeeMovement.Source.CASH_EXPENSE)
+            return original()
+
+        with patch('statsapp.salary_services._employee_matchers', side_effect=request_mid_sync):
+            sync_employee_movements()
+
+        self.assertTrue(salary_sync_freshness()['pending'])
+        self.assertTrue(salary_sync_due(max_age_seconds=3600))
+        sync_employee_movements()
+        self.assertFalse(salary_sync_due(max_age_seconds=3600))
 
     def test_salaries_are_scoped_by_employee_branch_and_keep_historical_branch(self):
         north = Branch.objects.create(name='Sucursal Norte Sueldos', slug='sucursal-norte-sueldos')
@@ -220,7 +323,8 @@ class SalaryFlowTests(TestCase):
         self.assertEqual(summary['account_deductions']['pending_net_amount'], 8500.0)
         self.assertEqual(summary['account_deductions']['employees'][0]['pending_count'], 1)
         self.assertEqual(summary['account_deductions']['employees'][0]['pending_gross_amount'], 10000.0)
-        deduction = next(item for item in summary['movements'] if item['source'] == 'account_current')
+        page = salary_movements_page(date(2026, 7, 1), date(2026, 7, 31), source='account_current')
+        deduction = page['results'][0]
         self.assertEqual(deduction['account_deduction']['net_amount'], 8500.0)
 
     def test_confirm_account_deductions_settles_debt_and_freezes_snapshot(self):
@@ -283,6 +387,63 @@ class SalaryFlowTests(TestCase):
         self.assertEqual(repeated.status_code, 400)
         self.assertEqual(repeated.data['detail'], 'No hay consumos pendientes para confirmar')
 
+    def test_month_close_confirms_deductions_for_all_employees_at_once(self):
+        other_client = AccountClient.objects.create(external_id='EMP-ROCIO', first_name='Rocio', last_name='Cajera')
+        other = create_employee('Rocio Cajera', account_client=other_client, account_discount_percent='20')
+        for client, amounts in ((self.employee_client, (1000, 3000)), (other_client, (5000,))):
+            for index, amount in enumerate(amounts):
+                AccountTransaction.objects.create(
+                    client=client,
+                    external_id=f'cc-cierre-{client.external_id}-{index}',
+                    description='Consumo del mes',
+                    date=date(2026, 7, 10 + index),
+                    original_amount=Decimal(amount),
+                    status=AccountTransaction.Status.ACTIVE,
+                )
+        AccountTransaction.objects.create(
+            client=other_client,
+            external_id='cc-cierre-otro-mes',
+            description='Consumo de agosto',
+            date=date(2026, 8, 2),
+            original_amount=Decimal('700'),
+            status=AccountTransaction.Status.ACTIVE,
+        )
+        call_command('run_salary_sync', stdout=StringIO())
+
+        invalid = self.api.post('/api/salaries/account-deductions/confirm-month/', {
+            'year': 2026,
+            'month': 7,
+            'employee_ids': ['no-es-un-id'],
+        }, format='json')
+        response = self.api.post('/api/salaries/account-deductions/confirm-month/', {
+            'year': 2026,
+            'month': 7,
+        }, format='json')
+        repeated = self.api.post('/api/salaries/account-deductions/confirm-month/', {
+            'year': 2026,
+            'month': 7,
+        }, format='json')
+
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['employee_count'], 2)
+        self.assertEqual(response.data['confirmed_count'], 3)
+        self.assertEqual(response.data['net_amount'], 8000.0)
+        by_employee = {row['employee_id']: row for row in response.data['employees']}
+        self.assertEqual(by_employee[str(self.employee.id)]['confirmed_count'], 2)
+        self.assertEqual(by_employee[str(other.id)]['discount_amount'], 1000.0)
+        self.assertEqual(by_employee[str(other.id)]['net_amount'], 4000.0)
+        self.assertEqual(repeated.status_code, 400)
+        self.employee_client.refresh_from_db()
+        other_client.refresh_from_db()
+        self.assertEqual(self.employee_client.total_debt, Decimal('0'))
+        self.assertEqual(other_client.total_debt, Decimal('700'))
+        self.assertFalse(
+            EmployeeMovement.objects
+            .filter(date__month=7, deduction_status=EmployeeMovement.DeductionStatus.PENDING)
+            .exists()
+        )
+
     def test_employee_discount_percentage_is_validated(self):
         invalid_create = self.api.post('/api/salaries/employees/', {
             'name': 'Empleado descuento invalido',
@@ -463,6 +624,43 @@ class SalaryFlowTests(TestCase):
         self.assertEqual(fetched.status_code, 200)
         self.assertEqual(fetched.data['sac_amount'], 43812.15)
 
+    def test_aguinaldo_semester_table_matches_per_employee_estimates(self):
+        self.employee.hire_date = date(2026, 3, 1)
+        self.employee.save(update_fields=['hire_date'])
+        save_aguinaldo_remunerations(self.employee, 2026, 1, [
+            {'month': 3, 'amount': '100000'},
+            {'month': 6, 'amount': '130000'},
+        ], user=self.user)
+        other = create_employee('Rocio Cajera', hire_date='2025-01-10')
+        EmployeeMovement.objects.create(
+            employee=other,
+            branch=other.branch,
+            source=EmployeeMovement.Source.CASH_EXPENSE,
+            date=date(2026, 4, 5),
+            amount=Decimal('90000'),
+            description='Sueldo abril',
+        )
+        create_employee('Fuera Del Semestre', hire_date='2026-08-01')
+
+        with self.assertNumQueries(3):
+            table = aguinaldo_semester_summary(2026, 1)
+        response = self.api.get('/api/salaries/aguinaldo/semester/?year=2026&semester=1')
+        invalid = self.api.get('/api/salaries/aguinaldo/semester/?year=2026&semester=3')
+
+        rows = {row['employee_id']: row for row in table['employees']}
+        self.assertEqual(set(rows), {str(self.employee.id), str(other.id)})
+        for employee in (self.employee, other):
+            estimate = aguinaldo_estimate(employee, 2026, 1)
+            row = rows[str(employee.id)]
+            for key in ('months', 'best_month', 'sac_amount', 'worked_days', 'complete', 'confirmed_months'):
+                self.assertEqual(row[key], estimate[key])
+        self.assertEqual(rows[str(other.id)]['sac_amount'], 45000.0)
+        self.assertEqual(table['totals']['sac_amount'], 45000.0 + rows[str(self.employee.id)]['sac_amount'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals']['employee_count'], 2)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(invalid.data['detail'], 'Semestre invalido')
+
     def test_aguinaldo_rejects_negative_or_repeated_months(self):
         endpoint = f'/api/salaries/aguinaldo/?employee_id={self.employee.id}&year=2026&semester=1'
         negative = self.api.put(endpoint, {'remunerations': [{'month': 1, 'amount': '-1'}]}, format='json')
@@ -489,10 +687,91 @@ class SalaryFlowTests(TestCase):
             amount=-42000,
         )
 
-        result = salaries_summary(date(2026, 7, 1), date(2026, 7, 31), sync=True)
+        result = salaries_summary(date(2026, 7, 1), date(2026, 7, 31), sync=True, diagnostics=True)
+        default = salaries_summary(date(2026, 7, 1), date(2026, 7, 31))
 
         self.assertEqual(result['unmatched']['count'], 1)
         self.assertEqual(result['unmatched']['items'][0]['source'], 'bank_transfer')
+        self.assertNotIn('unmatched', default)
+        self.assertEqual(default['sources']['bank_outgoing'], 1)
+
+    def test_diagnostics_endpoint_reports_last_matcher_pass(self):
+        batch = BankUploadBatch.objects.create(
+            bank='bancon',
+            fecha_desde=date(2026, 7, 1),
+            fecha_hasta=date(2026, 7, 31),
+        )
+        for description, amount in (('DIEGO EMP', -50000), ('PERSONA SIN CONFIGURAR', -42000)):
+            BankTransaction.objects.create(
+                batch=batch,
+                date=date(2026, 7, 12),
+                concept='TRANSFERENCIA HOMEBANKING',
+                description=description,
+                amount=amount,
+            )
+        call_command('run_salary_sync', stdout=StringIO())
+
+        response = self.api.get('/api/salaries/diagnostics/?year=2026&month=7&limit=5')
+        invalid = self.api.get('/api/salaries/diagnostics/?year=2026&month=7&limit=x')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unmatched']['counts']['bank_transfer'], 1)
+        last_pass = response.data['sync_state']['bank_transfer']['last_pass']
+        self.assertTrue(last_pass['full'])
+        self.assertEqual(last_pass['scanned'], 2)
+        self.assertEqual(last_pass['matched'], 1)
+        self.assertEqual(last_pass['unmatched'], 1)
+        self.assertEqual(last_pass['unmatched_sample'][0]['amount'], 42000.0)
+        self.assertEqual(invalid.status_code, 400)
+
+    @override_settings(SALARY_SYNC_OVERLAP_SECONDS=0)
+    def test_unmatched_diagnostics_cover_rows_left_by_incremental_passes(self):
+        batch = BankUploadBatch.objects.create(
+            bank='bancon',
+            fecha_desde=date(2026, 7, 1),
+            fecha_hasta=date(2026, 7, 31),
+        )
+
+        def transfer(description, day):
+            return BankTransaction.objects.create(
+                batch=batch,
+                date=date(2026, 7, day),
+                concept='TRANSFERENCIA HOMEBANKING',
+                description=description,
+                amount=-1000 * day,
+            )
+
+        first, second = transfer('PERSONA UNO', 3), transfer('PERSONA DOS', 4)
+        BankTransaction.objects.filter(pk__in=[first.pk, second.pk]).update(updated_at=timezone.now() - timedelta(days=1))
+        sync_employee_movements()
+        third = transfer('PERSONA TRES', 5)
+        sync_employee_movements()
+
+        state = SalarySyncState.objects.get(source='bank_transfer')
+        self.assertFalse(state.meta['last_pass']['full'])
+        self.assertEqual(state.meta['last_pass']['scanned'], 1)
+        self.assertEqual(set(state.meta), {'last_pass'})
+        with self.assertNumQueries(6):
+            unmatched = _salary_unmatched(date(2026, 7, 1), date(2026, 7, 31))
+        self.assertEqual(unmatched['counts']['bank_transfer'], 3)
+        self.assertEqual([item['source_id'] for item in unmatched['items']], [str(third.pk), str(second.pk), str(first.pk)])
+        self.assertEqual(_salary_unmatched(date(2026, 8, 1), date(2026, 8, 31))['count'], 0)
+
+        # Asignado a mano despues del sync: deja de figurar sin esperar otra pasada.
+        EmployeeMovement.objects.create(
+            employee=self.employee,
+            source=EmployeeMovement.Source.BANK_TRANSFER,
+            date=second.date,
+            amount=Decimal('4000'),
+            bank_transaction=second,
+        )
+        response = self.api.get('/api/salaries/diagnostics/?year=2026&month=7')
+        self.assertEqual(response.data['unmatched']['counts']['bank_transfer'], 2)
+
+        create_employee('Persona Uno', aliases=['PERSONA UNO'])
+        sync_employee_movements()
+        unmatched = _salary_unmatched(date(2026, 7, 1), date(2026, 7, 31))
+        self.assertEqual([item['source_id'] for item in unmatched['items']], [str(third.pk)])
 
     def test_assign_pending_bank_transfer_endpoint_remains_available(self):
         batch = BankUploadBatch.objects.create(
@@ -562,12 +841,17 @@ class SalaryFlowTests(TestCase):
             fecha_desde=date(2026, 7, 1),
             fecha_hasta=date(2026, 7, 31),
         )
-        BankTransaction.objects.create(
+        bank_tx = BankTransaction.objects.create(
             batch=batch,
             date=date(2026, 7, 5),
             concept='TRANSFERENCIA DIEGO EMP',
             amount=-100000,
         )
+        sync_employee_movements()
+        state = SalarySyncState.objects.get(source=EmployeeMovement.Source.BANK_TRANSFER)
+
+        bank_tx.description = 'Sueldo julio'
+        bank_tx.save()
         ExpenseEntry.objects.create(
             date=date(2026, 7, 6),
             amount=Decimal('25000'),
@@ -576,21 +860,136 @@ class SalaryFlowTests(TestCase):
             subcategory='DIEGO',
         )
 
-        original_update_or_create = QuerySet.update_or_create
-        call_count = 0
+        with patch.object(QuerySet, 'bulk_update', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                sync_employee_movements()
+
+        self.assertEqual(EmployeeMovement.objects.count(), 1)
+        self.assertFalse(EmployeeMovement.objects.filter(source=EmployeeMovement.Source.CASH_EXPENSE).exists())
+        self.assertNotIn('Sueldo julio', EmployeeMovement.objects.get().description)
+        unchanged = SalarySyncState.objects.get(source=EmployeeMovement.Source.BANK_TRANSFER)
+        self.assertEqual(unchanged.last_updated_at, state.last_updated_at)
+
+    def test_compiled_matcher_agrees_with_linear_scan(self):
+        create_employee('Diego Emp Junior', aliases=['DIEGO EMPL'])
+        create_employee('Ana Sosa', aliases=['ANA', 'SOSA'], document_type='dni', document_number='19.440.880')
+        create_employee('Mariana Sosa', document_type='cuil_cuit', document_number='20-12345678-6')
+        matchers = _employee_matchers()
+        matcher = EmployeeMatcher(matchers)
+        texts = [
+            'TRANSFERENCIA DIEGO EMPLEADO',
+            'TRANSFERENCIA DIEGO EMP JUNIOR',
+            'pago a diego emp',
+            'HAVANA SOSA',
+            'MARIANA SOSA AGUINALDO',
+            'TRANSFERENCIA A TERCEROS 19.440.880',
+            'CUIL 20-12345678-6 ANA',
+            'PROVEEDOR SIN EMPLEADO',
+            '',
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                expected_employee, expected_alias = _match_employee(text, matchers, match_documents=True)
+                employee, alias = matcher.match(text, match_documents=True)
+                self.assertEqual(employee, expected_employee)
+                self.assertEqual(alias, expected_alias)
+        self.assertEqual(matcher.match('TRANSFERENCIA DIEGO EMP JUNIOR')[1], 'Diego Emp Junior')
+
+    @override_settings(SALARY_SYNC_OVERLAP_SECONDS=0)
+    def test_salary_sync_only_processes_rows_past_the_watermark(self):
+        batch = BankUploadBatch.objects.create(
+            bank='santander',
+            fecha_desde=date(2026, 7, 1),
+            fecha_hasta=date(2026, 7, 31),
+        )
+        BankTransaction.objects.create(
+            batch=batch,
+            date=date(2026, 7, 5),
+            concept='TRANSFERENCIA DIEGO EMP',
+            amount=-50000,
+        )
+        account_tx = AccountTransaction.objects.create(
+            client=self.employee_client,
+            external_id='cc-diego-watermark',
+            description='Compra empleado',
+            date=date(2026, 7, 8),
+            original_amount=Decimal('10000'),
+            paid_amount=Decimal('0'),
+            status=AccountTransaction.Status.ACTIVE,
+        )
 
-        def fail_second_update(queryset, *args, **kwargs):
-            nonlocal call_count
-            call_count += 1
-            if call_count == 2:
-                raise OperationalError('database is locked')
-            return original_update_or_create(queryset, *args, **kwargs)
+        first = sync_employee_movements()
+        self.assertEqual(first['created'], 2)
+        self.assertEqual(first['scanned'], 2)
 
-        with patch.object(QuerySet, 'update_or_create', new=fail_second_update):
-            with self.assertRaises(OperationalError):
-                sync_employee_movements(date(2026, 7, 1), date(2026, 7, 31))
+        BankTransaction.objects.create(
+            batch=batch,
+            date=date(2026, 7, 20),
+            concept='TRANSFERENCIA DIEGO EMP',
+            amount=-60000,
+        )
+        second = sync_employee_movements()
+        self.assertEqual(second['scanned'], 1)
+        self.assertEqual(second['created'], 1)
+
+        account_tx.paid_amount = account_tx.original_amount
+        account_tx.status = AccountTransaction.Status.PAID
+        account_tx.save()
+        third = sync_employee_movements()
+        self.assertEqual(third['scanned'], 1)
+        self.assertEqual(third['deleted'], 1)
+        self.assertFalse(EmployeeMovement.objects.filter(account_transaction=account_tx).exists())
+
+        ensure_employee_alias(self.employee, 'DIEGO TRANSFERENCIAS')
+        fourth = sync_employee_movements()
+        self.assertEqual(fourth['scanned'], 2)
+        self.assertEqual(fourth['created'], 0)
+        state = SalarySyncState.objects.get(source=EmployeeMovement.Source.BANK_TRANSFER)
+        self.assertEqual(state.last_id, BankTransaction.objects.order_by('-id').first().id)
+        self.assertEqual(state.rows_scanned, 2)
+
+    def test_salary_sync_query_count_does_not_grow_with_movements(self):
+        batch = BankUploadBatch.objects.create(
+            bank='santander',
+            fecha_desde=date(2026, 7, 1),
+            fecha_hasta=date(2026, 7, 31),
+        )
 
-        self.assertEqual(EmployeeMovement.objects.count(), 0)
+        def add_rows(count, offset):
+            for index in range(offset, offset + count):
+                BankTransaction.objects.create(
+                    batch=batch,
+                    date=date(2026, 7, 1 + index),
+                    concept='TRANSFERENCIA DIEGO EMP',
+                    amount=-1000 - index,
+                )
+                ExpenseEntry.objects.create(
+                    date=date(2026, 7, 1 + index),
+                    amount=Decimal('500'),
+                    method=ExpenseEntry.Method.CASH,
+                    category='SUELDOS',
+                    subcategory='DIEGO',
+                )
+                AccountTransaction.objects.create(
+                    client=self.employee_client,
+                    external_id=f'cc-diego-bulk-{index}',
+                    date=date(2026, 7, 1 + index),
+                    original_amount=Decimal('800'),
+                    status=AccountTransaction.Status.ACTIVE,
+                )
+
+        sync_employee_movements()
+        add_rows(2, 0)
+        with CaptureQueriesContext(connection) as few:
+            first = sync_employee_movements()
+        add_rows(8, 2)
+        with CaptureQueriesContext(connection) as many:
+            second = sync_employee_movements()
+
+        self.assertEqual(first['created'], 6)
+        self.assertEqual(second['created'], 24)
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        self.assertEqual(EmployeeMovement.objects.count(), 30)
 
     @patch('statsapp.salary_services.sleep')
     @patch('statsapp.salary_services.sync_employee_movements')
@@ -650,7 +1049,7 @@ class SalaryFlowTests(TestCase):
             amount=-1000,
         )
 
-        sync_employee_movements(date(2026, 7, 1), date(2026, 7, 31))
+        sync_employee_movements()
 
         movement = EmployeeMovement.objects.get(bank_transaction=matching)
         self.assertEqual(movement.employee, employee)
@@ -676,7 +1075,7 @@ class SalaryFlowTests(TestCase):
             amount=-65000,
         )
 
-        sync_employee_movements(date(2026, 7, 1), date(2026, 7, 31))
+        sync_employee_movements()
 
         movement = EmployeeMovement.objects.get(bank_transaction=transaction)
         self.assertEqual(movement.employee, employee)
@@ -700,7 +1099,7 @@ class SalaryFlowTests(TestCase):
         self.assertEqual(transaction.description, 'DNI')
         self.assertIn('DNI 12345678', transaction.raw_details)
 
-        sync_employee_movements(date(2026, 7, 1), date(2026, 7, 31))
+        sync_employee_movements()
 
         movement = EmployeeMovement.objects.get(bank_transaction=transaction)
         self.assertEqual(movement.employee, employee)
@@ -730,7 +1129,7 @@ class SalaryFlowTests(TestCase):
             amount=-65000,
         )
 
-        sync_employee_movements(date(2026, 7, 1), date(2026, 7, 31))
+        sync_employee_movements()
 
         self.assertFalse(EmployeeMovement.objects.filter(bank_transaction=transaction).exists())
 
@@ -807,7 +1206,7 @@ class SalaryFlowTests(TestCase):
             concept='TRANSFERENCIA DIEGO EMP',
             amount=-50000,
         )
-        sync_employee_movements(date(2026, 7, 1), date(2026, 7, 10))
+        sync_employee_movements()
 
         response = self.api.patch(f'/api/salaries/employees/{self.employee.id}/', {
             'active': False,
@@ -820,7 +1219,7 @@ class SalaryFlowTests(TestCase):
             concept='TRANSFERENCIA DIEGO EMP',
             amount=-60000,
         )
-        sync_employee_movements(date(2026, 7, 11), date(2026, 7, 31))
+        sync_employee_movements()
 
         self.assertEqual(response.status_code, 200)
         self.assertFalse(response.data['active'])
@@ -834,7 +1233,7 @@ class SalaryFlowTests(TestCase):
         self.assertNotIn(str(self.employee.id), [row['employee_id'] for row in summary['employees']])
         self.assertNotIn(str(self.employee.id), [row['employee_id'] for row in monthly['employees']])
         self.assertEqual(summary['totals']['total'], 0.0)
-        self.assertEqual(summary['movements'], [])
+        self.assertEqual(summary['movements_page']['count'], 0)
 
     def test_employee_reactivation_clears_termination_data(self):
         self.employee.active = False
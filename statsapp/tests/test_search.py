@@ -0,0 +1,108 @@
+from datetime import date
+
+from django.contrib.admin import site
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from statsapp import search
+from statsapp.models import AccountClient, BankTransaction, BankUploadBatch
+from statsapp.vales_services import create_vale_batch
+
+
+class SearchQueryTests(TestCase):
+    def test_terms_are_normalized_for_both_backends(self):
+        terms = search.search_terms('  Farías  C-0089 ')
+
+        self.assertEqual(terms, ['farias', 'c', '0089'])
+        self.assertEqual(search.postgres_tsquery(terms), 'farias:* & c:* & 0089:*')
+        self.assertEqual(search.sqlite_match_query(terms), '"farias"* "c"* "0089"*')
+        self.assertIn('statsapp_unaccent', search.postgres_document_sql('statsapp_accountclient', ('first_name',)))
+
+
+class SearchIndexTests(TestCase):
+    """Corre contra el motor configurado: FTS5 en SQLite, tsvector + GIN en PostgreSQL."""
+
+    def setUp(self):
+        search._READY.clear()
+        self.silvina = AccountClient.objects.create(external_id='C-0012', first_name='Silvina', last_name='Farías')
+        self.silvio = AccountClient.objects.create(external_id='C-0013', first_name='Silvio', last_name='Gomez')
+        AccountClient.objects.create(external_id='C-0014', first_name='Valeria', last_name='Gomez')
+
+    def test_index_backend_matches_database_vendor(self):
+        self.assertEqual(search._backend(), connection.vendor if connection.vendor in {'sqlite', 'postgresql'} else None)
+
+    def test_prefix_search_ignores_accents_and_case(self):
+        found = search.search_filter(AccountClient.objects.all(), 'silv FARIAS')
+
+        self.assertEqual(list(found), [self.silvina])
+        self.assertEqual(set(search.search_filter(AccountClient.objects.all(), 'silv')), {self.silvina, self.silvio})
+        self.assertEqual(list(search.search_filter(AccountClient.objects.all(), 'c 0013')), [self.silvio])
+
+    def test_digits_and_inner_substrings_keep_matching_like_before_the_index(self):
+        self.assertEqual(list(search.search_filter(AccountClient.objects.all(), '0013')), [self.silvio])
+        self.assertEqual(list(search.search_filter(AccountClient.objects.all(), 'C-0012')), [self.silvina])
+        self.assertEqual(search.search_filter(AccountClient.objects.all(), 'ez').count(), 2)
+        self.assertEqual(list(search.search_filter(AccountClient.objects.all(), 'vina 0012')), [self.silvina])
+        self.assertEqual(search.search_filter(AccountClient.objects.all(), 'ez', rank=True).first().search_rank, 0.0)
+
+    def test_inner_substrings_match_even_when_other_rows_match_the_prefix(self):
+        basilva = AccountClient.objects.create(external_id='C-0017', first_name='Ana', last_name='Basilva')
+
+        found = search.search_filter(AccountClient.objects.all(), 'silv')
+        ranked = search.search_filter(AccountClient.objects.all(), 'silv', rank=True).order_by('-search_rank', 'external_id')
+
+        self.assertEqual(set(found), {self.silvina, self.silvio, basilva})
+        self.assertEqual(ranked.last(), basilva)
+        self.assertEqual(ranked.last().search_rank, 0.0)
+
+    def test_index_follows_bulk_writes_and_deletes(self):
+        AccountClient.objects.filter(pk=self.silvio.pk).update(last_name='Romero')
+        self.silvina.first_name = 'Silvana'
+        AccountClient.objects.bulk_update([self.silvina], ['first_name'])
+        AccountClient.objects.bulk_create([AccountClient(external_id='C-0015', first_name='Romina', last_name='Sosa')])
+
+        self.assertEqual(list(search.search_filter(AccountClient.objects.all(), 'romero')), [self.silvio])
+        self.assertEqual(list(search.search_filter(AccountClient.objects.all(), 'silvana')), [self.silvina])
+        self.assertEqual(search.search_filter(AccountClient.objects.all(), 'rom').count(), 2)
+
+        self.silvio.delete()
+        self.assertEqual(search.search_filter(AccountClient.objects.all(), 'romero').count(), 0)
+
+    def test_ranked_search_orders_by_relevance(self):
+        AccountClient.objects.create(external_id='C-0016', first_name='Gomez', last_name='Gomez')
+
+        ranked = search.search_filter(AccountClient.objects.all(), 'gomez', rank=True).order_by('-search_rank', 'external_id')
+
+        self.assertEqual(ranked.count(), 3)
+        if search._backend():
+            self.assertEqual(ranked.first().external_id, 'C-0016')
+
+    def test_search_endpoints_and_admin_use_the_index(self):
+        user = get_user_model().objects.create_user(username='admin', password='x', is_staff=True, is_superuser=True)
+        api = APIClient()
+        api.force_authenticate(user)
+        batch = BankUploadBatch.objects.create(bank='bancon', fecha_desde=date(2026, 7, 1), fecha_hasta=date(2026, 7, 31))
+        BankTransaction.objects.create(batch=batch, date=date(2026, 7, 2), concept='TRANSFERENCIA', description='Pago Getnet', amount=10)
+        BankTransaction.objects.create(batch=batch, date=date(2026, 7, 3), concept='DEBITO', description='Comision', amount=-5)
+        create_vale_batch(
+            user=user,
+            batch_date=date(2026, 7, 4),
+            vales_payload=[{'importe': 100, 'cliente_id': str(self.silvina.id), 'cliente_raw': 'Silvi', 'confianza': 1}],
+        )
+
+        clientes = api.get('/api/clientes/?search=farias')
+        accounts = api.get('/api/accounts/clients/?search=silv')
+        lotes = api.get('/api/vales/lotes/?q=farias')
+        admin_results, may_have_duplicates = site._registry[BankTransaction].get_search_results(
+            None,
+            BankTransaction.objects.all(),
+            'getnet',
+        )
+
+        self.assertEqual([row['id'] for row in clientes.data], [str(self.silvina.id)])
+        self.assertEqual(accounts.data['count'], 2)
+        self.assertEqual(lotes.data['count'], 1)
+        self.assertEqual([tx.description for tx in admin_results], ['Pago Getnet'])
+        self.assertFalse(may_have_duplicates)
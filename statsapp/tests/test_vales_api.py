@@ -6,7 +6,9 @@ from io import BytesIO
 from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APITestCase
 
@@ -297,6 +299,44 @@ class ValesApiTests(APITestCase):
         self.assertTrue(detail_response.data['vales'][0]['en_cuenta_corriente'])
         self.assertFalse(detail_response.data['vales'][1]['en_cuenta_corriente'])
 
+    def test_vale_batch_query_count_does_not_grow_with_vales(self):
+        alias = AccountClientAlias.objects.create(client=self.silvina, alias='Silvi Farias')
+        clients = [self.valeria, self.silvina, self.vila]
+
+        def payload(size):
+            return [
+                {
+                    'importe': 1000 + idx,
+                    'cliente_id': str(clients[idx % 3].id) if idx % 4 else None,
+                    'cliente_raw': 'Silvi Farias' if clients[idx % 3] == self.silvina else f'Cliente {idx}',
+                    'detalle': '',
+                    'confianza': 1,
+                }
+                for idx in range(size)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            create_vale_batch(user=self.user, batch_date=date(2026, 4, 1), vales_payload=payload(6))
+        with CaptureQueriesContext(connection) as large:
+            batch, warnings = create_vale_batch(user=self.user, batch_date=date(2026, 4, 2), vales_payload=payload(60))
+
+        # La primera carga ademas crea las marcas de sincronizacion de sueldos.
+        self.assertLessEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(batch.items.count(), 60)
+        self.assertEqual(batch.items.filter(pending_review=True).count(), 15)
+        self.assertEqual(AccountTransaction.objects.filter(vale_items__batch=batch).count(), 45)
+        self.assertIn('15 vales', warnings[0])
+        alias.refresh_from_db()
+        silvina_vales = sum(1 for idx in range(6) if idx % 4 and idx % 3 == 1)
+        silvina_vales += sum(1 for idx in range(60) if idx % 4 and idx % 3 == 1)
+        self.assertEqual(alias.uses, silvina_vales)
+        self.silvina.refresh_from_db()
+        self.assertEqual(
+            self.silvina.total_debt,
+            sum(1000 + idx for idx in range(6) if idx % 4 and idx % 3 == 1)
+            + sum(1000 + idx for idx in range(60) if idx % 4 and idx % 3 == 1),
+        )
+
     def test_pending_vale_item_can_be_resolved_from_history(self):
         self.authenticate()
         payload = {
@@ -493,6 +533,75 @@ class ValesApiTests(APITestCase):
         self.assertEqual(date_response.data['count'], 1)
         self.assertEqual(date_response.data['results'][0]['fecha'], '2026-04-05')
 
+    def test_vales_lotes_listing_is_one_annotated_query_with_search_document(self):
+        self.authenticate()
+
+        def load(idx):
+            return create_vale_batch(
+                user=self.user,
+                batch_date=date(2026, 4, 1),
+                source_filenames=[f'planilla-{idx}.jpeg'],
+                vales_payload=[
+                    {'importe': 1000, 'cliente_id': str(self.silvina.id), 'cliente_raw': 'Silvi', 'detalle': 'Asado', 'confianza': 1},
+                    {'importe': 500, 'cliente_id': None, 'cliente_raw': f'Sin Cliente {idx}', 'detalle': '', 'confianza': 0.3},
+                ],
+            )[0]
+
+        first = load(0)
+        load(1)
+        self.client.get('/api/vales/lotes/')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/vales/lotes/')
+        for idx in range(2, 8):
+            load(idx)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/api/vales/lotes/')
+
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        self.assertEqual(len(many.captured_queries), 2)
+        row = response.data['results'][0]
+        self.assertEqual(row['vales_count'], 2)
+        self.assertEqual(row['pendientes_count'], 1)
+        self.assertEqual(row['cuenta_corriente_count'], 1)
+        self.assertEqual(row['cuenta_corriente_total'], 1000.0)
+
+        by_client = self.client.get('/api/vales/lotes/?q=farías asado')
+        self.assertEqual(by_client.data['count'], 8)
+        by_file = self.client.get('/api/vales/lotes/?q=planilla-0')
+        self.assertEqual([item['lote_id'] for item in by_file.data['results']], [first.lote_id])
+
+        pending = first.items.get(pending_review=True)
+        response = self.client.post(f'/api/vales/items/{pending.id}/resolver/', {'cliente_id': str(self.vila.id)}, format='json')
+        self.assertIn(response.status_code, {200, 201})
+        by_resolved_client = self.client.get('/api/vales/lotes/?q=vila')
+        self.assertEqual([item['lote_id'] for item in by_resolved_client.data['results']], [first.lote_id])
+
+    def test_renamed_client_updates_lote_search_document(self):
+        self.authenticate()
+        batch = create_vale_batch(
+            user=self.user,
+            batch_date=date(2026, 4, 2),
+            vales_payload=[{'importe': 700, 'cliente_id': str(self.silvina.id), 'cliente_raw': 'Silvi', 'confianza': 1}],
+        )[0]
+
+        patched = self.client.patch(f'/api/accounts/clients/{self.silvina.id}/', {'last_name': 'Ferreyra'}, format='json')
+        self.assertEqual(patched.status_code, 200)
+        self.assertEqual(self.client.get('/api/vales/lotes/?q=farias').data['count'], 0)
+        self.assertEqual(
+            [item['lote_id'] for item in self.client.get('/api/vales/lotes/?q=ferreyra').data['results']],
+            [batch.lote_id],
+        )
+
+        upload = SimpleUploadedFile(
+            'clientes.json',
+            b'{"clientes": [{"id": "C-0012", "nombre": "Silvina", "apellido": "Quiroga"}]}',
+            content_type='application/json',
+        )
+        imported = self.client.post('/api/accounts/upload/', {'file': upload}, format='multipart')
+        self.assertEqual(imported.status_code, 200)
+        self.assertEqual(self.client.get('/api/vales/lotes/?q=ferreyra').data['count'], 0)
+        self.assertEqual(self.client.get('/api/vales/lotes/?q=quiroga').data['count'], 1)
+
     @mock.patch.dict(os.environ, {'OCR_PROVIDER': 'mock'}, clear=False)
     def test_ocr_process_returns_mock_payload(self):
         self.authenticate()
@@ -12,6 +12,11 @@ def normalize_search_text(value):
     return collapsed
 
 
+def mentions_getnet(*values):
+    """Movimiento bancario que corresponde a una liquidacion de Getnet (concepto o descripcion)."""
+    return any('getnet' in str(value or '').lower() for value in values)
+
+
 def normalize_name_shape(value):
     normalized = normalize_search_text(value)
     if not normalized:
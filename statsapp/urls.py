@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     branches,
+    request_metrics,
     upload_csv,
     stats,
     list_filters,
@@ -51,7 +52,10 @@ from .fiscal_views import (
     getnet_webhook,
     invoice_authorize,
     invoice_detail,
+    invoices_authorize_batch,
     invoices_list,
+    invoicing_job_detail,
+    invoicing_jobs,
     payments_list,
 )
 from .salary_views import (
@@ -59,13 +63,18 @@ from .salary_views import (
     employees_list,
     salary_movement_assign,
     salaries_account_deductions_confirm,
+    salaries_account_deductions_confirm_month,
     salaries_aguinaldo,
+    salaries_aguinaldo_semester,
     salaries_dashboard,
+    salaries_diagnostics,
     salaries_monthly,
+    salaries_movements,
 )
 
 urlpatterns = [
     path('branches/', branches, name='branches'),
+    path('metrics/endpoints/', request_metrics, name='request_metrics'),
     path('upload/', upload_csv, name='upload_csv'),
     path('stats/', stats, name='stats'),
     path('filters/', list_filters, name='filters'),
@@ -103,20 +112,27 @@ urlpatterns = [
     path('vales/items/<int:item_id>/resolver/', vales_item_resolver, name='vales_item_resolver'),
     path('billing/summary/', billing_dashboard, name='billing_summary'),
     path('billing/invoices/', invoices_list, name='billing_invoices'),
+    path('billing/invoices/authorize/', invoices_authorize_batch, name='billing_invoices_authorize'),
     path('billing/invoices/<uuid:pk>/', invoice_detail, name='billing_invoice_detail'),
     path('billing/invoices/<uuid:pk>/authorize/', invoice_authorize, name='billing_invoice_authorize'),
     path('billing/accounts/<uuid:pk>/preview/', account_invoice_preview_view, name='billing_account_preview'),
     path('billing/accounts/<uuid:pk>/invoices/', account_invoice_create_view, name='billing_account_invoice_create'),
+    path('billing/invoicing-jobs/', invoicing_jobs, name='billing_invoicing_jobs'),
+    path('billing/invoicing-jobs/<int:pk>/', invoicing_job_detail, name='billing_invoicing_job_detail'),
     path('billing/payments/', payments_list, name='billing_payments'),
     path('billing/getnet/import/', getnet_import, name='billing_getnet_import'),
     path('billing/getnet/terminals/', getnet_terminals, name='billing_getnet_terminals'),
     path('billing/getnet/terminals/<int:pk>/', getnet_terminal_detail, name='billing_getnet_terminal_detail'),
     path('billing/getnet/webhook/', getnet_webhook, name='billing_getnet_webhook'),
     path('salaries/summary/', salaries_dashboard, name='salaries_summary'),
+    path('salaries/diagnostics/', salaries_diagnostics, name='salaries_diagnostics'),
     path('salaries/monthly/', salaries_monthly, name='salaries_monthly'),
     path('salaries/aguinaldo/', salaries_aguinaldo, name='salaries_aguinaldo'),
+    path('salaries/aguinaldo/semester/', salaries_aguinaldo_semester, name='salaries_aguinaldo_semester'),
     path('salaries/account-deductions/confirm/', salaries_account_deductions_confirm, name='salaries_account_deductions_confirm'),
+    path('salaries/account-deductions/confirm-month/', salaries_account_deductions_confirm_month, name='salaries_account_deductions_confirm_month'),
     path('salaries/employees/', employees_list, name='salaries_employees'),
     path('salaries/employees/<uuid:pk>/', employee_detail, name='salaries_employee_detail'),
+    path('salaries/movements/', salaries_movements, name='salaries_movements'),
     path('salaries/movements/assign/', salary_movement_assign, name='salaries_movement_assign'),
 ]
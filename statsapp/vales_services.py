@@ -6,6 +6,7 @@ import re
 import time
 import urllib.error
 import urllib.request
+from collections import Counter
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
 from difflib import SequenceMatcher
@@ -19,7 +20,7 @@ except ImportError:  # pragma: no cover
 
 from django.contrib.auth import get_user_model
 from django.db import connection, transaction as db_transaction
-from django.db.models import F, Sum
+from django.db.models import Case, Count, F, PositiveIntegerField, Prefetch, Q, Sum, Value, When
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
@@ -27,9 +28,12 @@ from .models import (
     AccountClient,
     AccountClientAlias,
     AccountTransaction,
+    EmployeeMovement,
     ValeImportBatch,
     ValeImportItem,
 )
+from .account_services import recalc_account_totals
+from .salary_sync import request_salary_sync
 from .text_utils import build_initials, normalize_name_shape, normalize_search_text, simple_soundex
 
 
@@ -937,58 +941,79 @@ def match_client_for_ocr(raw_name, limit=4):
     return {'client': None, 'suggestions': suggestions, 'auto': False, 'match': suggestions[0] if suggestions else None}
 
 
-def recalc_account_totals(client_ids=None):
-    qs = AccountTransaction.objects.all()
-    if client_ids is not None:
-        qs = qs.filter(client_id__in=client_ids)
-
-    updated_ids = set()
-    for client in AccountClient.objects.filter(id__in=qs.values_list('client_id', flat=True).distinct()):
-        pending = Decimal('0')
-        has_partial = False
-        has_overdue = False
-        for tx in client.transactions.all():
-            remaining = tx.remaining_amount
-            pending += remaining
-            if tx.status == AccountTransaction.Status.OVERDUE and remaining > Decimal('0'):
-                has_overdue = True
-            if tx.status == AccountTransaction.Status.PARTIAL and remaining > Decimal('0'):
-                has_partial = True
-
-        if pending <= Decimal('0'):
-            status_value = AccountClient.Status.PAID
-        elif has_overdue:
-            status_value = AccountClient.Status.OVERDUE
-        elif has_partial:
-            status_value = AccountClient.Status.PARTIAL
-        else:
-            status_value = AccountClient.Status.ACTIVE
-        AccountClient.objects.filter(id=client.id).update(total_debt=pending, status=status_value)
-        updated_ids.add(client.id)
+def vale_batch_aggregates(prefix=''):
+    """Conteos y total en cuenta corriente de los vales; prefix='items__' para anotar lotes."""
+    linked = Q(**{f'{prefix}transaction__isnull': False})
+    return {
+        'vales_count': Count(f'{prefix}id'),
+        'pendientes_count': Count(f'{prefix}id', filter=Q(**{f'{prefix}pending_review': True})),
+        'cuenta_corriente_count': Count(f'{prefix}id', filter=linked),
+        'cuenta_corriente_total': Sum(f'{prefix}amount', filter=linked),
+    }
+
+
+def build_vale_batch_search_text(batch, items):
+    """Documento de busqueda del lote: se guarda normalizado para filtrar sin joins contra los vales."""
+    user = batch.uploaded_by
+    parts = [batch.lote_id, *(batch.source_filenames or [])]
+    if user:
+        parts.extend([user.username, user.first_name, user.last_name])
+    for item in items:
+        parts.extend([item.client_raw, item.detail])
+        if item.client:
+            parts.extend([item.client.first_name, item.client.last_name])
+    normalized = []
+    for part in parts:
+        value = normalize_search_text(part)
+        if value and value not in normalized:
+            normalized.append(value)
+    return ' '.join(normalized)
+
+
+def refresh_vale_batch_search(batch_ids):
+    batches = list(
+        ValeImportBatch.objects
+        .filter(pk__in=batch_ids)
+        .select_related('uploaded_by')
+        .prefetch_related(Prefetch('items', queryset=ValeImportItem.objects.select_related('client')))
+    )
+    for batch in batches:
+        batch.search_text = build_vale_batch_search_text(batch, batch.items.all())
+    ValeImportBatch.objects.bulk_update(batches, ['search_text'], batch_size=200)
 
-    if client_ids is not None:
-        missing_ids = set(client_ids) - updated_ids
-        if missing_ids:
-            AccountClient.objects.filter(id__in=missing_ids).update(total_debt=Decimal('0'), status=AccountClient.Status.PAID)
+
+def refresh_client_vale_search(client_ids):
+    """Rehace el search_text de los lotes con vales de estos clientes; se llama al renombrarlos."""
+    batch_ids = list(
+        ValeImportItem.objects
+        .filter(client_id__in=client_ids)
+        .values_list('batch_id', flat=True)
+        .distinct()
+    )
+    for offset in range(0, len(batch_ids), 200):
+        refresh_vale_batch_search(batch_ids[offset:offset + 200])
 
 
 def serialize_batch(batch, include_items=False):
-    account_items_qs = batch.items.filter(transaction__isnull=False)
-    account_total = account_items_qs.aggregate(total=Sum('amount')).get('total') or Decimal('0')
+    """Los conteos salen de las anotaciones del listado; si faltan se consultan para el lote."""
+    counts = {
+        key: getattr(batch, key, None)
+        for key in ('vales_count', 'pendientes_count', 'cuenta_corriente_count', 'cuenta_corriente_total')
+    }
+    if None in counts.values():
+        counts = batch.items.aggregate(**vale_batch_aggregates())
     payload = {
         'lote_id': batch.lote_id,
         'fecha': batch.date.isoformat() if batch.date else None,
         'total': float(batch.total or 0),
-        'cuenta_corriente_total': float(account_total),
+        'cuenta_corriente_total': float(counts['cuenta_corriente_total'] or 0),
         'cargado_por': auth_user_payload(batch.uploaded_by) if batch.uploaded_by else None,
         'cargado_en': batch.created_at.isoformat() if batch.created_at else None,
         'source_filenames': batch.source_filenames or [],
-        'vales_count': getattr(batch, 'vales_count', None) or batch.items.count(),
-        'cuenta_corriente_count': account_items_qs.count(),
-        'pendientes_count': getattr(batch, 'pendientes_count', None),
+        'vales_count': counts['vales_count'],
+        'cuenta_corriente_count': counts['cuenta_corriente_count'],
+        'pendientes_count': counts['pendientes_count'],
     }
-    if payload['pendientes_count'] is None:
-        payload['pendientes_count'] = batch.items.filter(pending_review=True).count()
     if include_items:
         payload['vales'] = [
             serialize_vale_item(item)
@@ -1446,6 +1471,7 @@ def resolve_vale_import_item(*, item, client, user=None, create_alias=True):
                 warnings.append('El alias OCR ya estaba vinculado a otro cliente y no se reemplazo.')
 
         recalc_account_totals(list(touched_client_ids))
+        refresh_vale_batch_search([item.batch_id])
 
     item.refresh_from_db()
     return item, warnings
@@ -1482,6 +1508,7 @@ def update_vale_batch_date(*, batch, batch_date):
             ValeImportItem.objects.bulk_update(items, ['date'], batch_size=500)
         if transactions:
             AccountTransaction.objects.bulk_update(transactions, ['date', 'status', 'updated_at'], batch_size=500)
+            request_salary_sync(EmployeeMovement.Source.ACCOUNT_CURRENT)
         if touched_client_ids:
             recalc_account_totals(list(touched_client_ids))
 
@@ -1529,6 +1556,27 @@ def delete_vale_batch(*, batch):
     }
 
 
+def _increment_alias_uses(alias_keys):
+    """Suma un uso por vale a los alias (cliente, texto normalizado) que ya existian, en un solo UPDATE."""
+    uses = Counter(alias_keys)
+    if not uses:
+        return
+    aliases = AccountClientAlias.objects.filter(
+        normalized_alias__in={normalized for _, normalized in uses},
+    ).values_list('pk', 'client_id', 'normalized_alias')
+    increments = {
+        pk: uses[(client_id, normalized)]
+        for pk, client_id, normalized in aliases
+        if (client_id, normalized) in uses
+    }
+    if increments:
+        AccountClientAlias.objects.filter(pk__in=increments).update(uses=F('uses') + Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in increments.items()],
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        ))
+
+
 def create_vale_batch(*, user, batch_date, vales_payload, source_filenames=None):
     batch_date = normalize_vale_date_year(batch_date)
     if not batch_date:
@@ -1539,7 +1587,11 @@ def create_vale_batch(*, user, batch_date, vales_payload, source_filenames=None)
     touched_client_ids = set()
     pending_count = 0
 
+    client_ids = {entry.get('cliente_id') for entry in vales_payload if entry.get('cliente_id')}
+
     with db_transaction.atomic():
+        clients = AccountClient.objects.in_bulk(client_ids) if client_ids else {}
+        clients = {str(pk): client for pk, client in clients.items()}
         batch = ValeImportBatch.objects.create(
             lote_id=lote_id,
             date=batch_date,
@@ -1548,14 +1600,17 @@ def create_vale_batch(*, user, batch_date, vales_payload, source_filenames=None)
             source_filenames=source_filenames,
         )
         total = Decimal('0')
+        now = timezone.now()
+        transaction_status = _transaction_status_for_date(batch_date)
+        transactions = []
+        items = []
+        alias_keys = []
         for idx, entry in enumerate(vales_payload, start=1):
             amount = parse_decimal(entry.get('importe'))
             if amount <= Decimal('0'):
                 continue
-            client = None
             client_id = entry.get('cliente_id')
-            if client_id:
-                client = AccountClient.objects.filter(pk=client_id).first()
+            client = clients.get(str(client_id)) if client_id else None
             client_raw = str(entry.get('cliente_raw') or '').strip()
             detail = str(entry.get('detalle') or '').strip()
             confidence = parse_decimal(entry.get('confianza') or 0, default='0')
@@ -1569,15 +1624,15 @@ def create_vale_batch(*, user, batch_date, vales_payload, source_filenames=None)
             pending = client is None
             transaction_obj = None
             if client:
-                transaction_obj = AccountTransaction.objects.create(
+                transaction_obj = AccountTransaction(
                     client=client,
                     external_id=f"vale-{uuid4().hex}",
                     description=detail or f"Vale {lote_id}",
                     date=batch_date,
-                    created_at=timezone.now(),
+                    created_at=now,
                     original_amount=amount,
                     paid_amount=Decimal('0'),
-                    status=_transaction_status_for_date(batch_date),
+                    status=transaction_status,
                     payments=[],
                     meta={
                         'source': 'transform_vales_carni',
@@ -1587,16 +1642,12 @@ def create_vale_batch(*, user, batch_date, vales_payload, source_filenames=None)
                         'bbox': bbox,
                     },
                 )
+                transactions.append(transaction_obj)
                 touched_client_ids.add(client.id)
-                alias = AccountClientAlias.objects.filter(
-                    client=client,
-                    normalized_alias=normalize_search_text(client_raw),
-                ).first()
-                if alias:
-                    AccountClientAlias.objects.filter(pk=alias.pk).update(uses=F('uses') + 1)
+                alias_keys.append((client.id, normalize_search_text(client_raw)))
             else:
                 pending_count += 1
-            ValeImportItem.objects.create(
+            items.append(ValeImportItem(
                 batch=batch,
                 transaction=transaction_obj,
                 date=batch_date,
@@ -1607,13 +1658,18 @@ def create_vale_batch(*, user, batch_date, vales_payload, source_filenames=None)
                 pending_review=pending,
                 confidence=confidence,
                 meta=item_meta,
-            )
+            ))
             total += amount
 
+        AccountTransaction.objects.bulk_create(transactions, batch_size=500)
+        ValeImportItem.objects.bulk_create(items, batch_size=500)
+        _increment_alias_uses(alias_keys)
         batch.total = total
-        batch.save(update_fields=['total'])
+        batch.search_text = build_vale_batch_search_text(batch, items)
+        batch.save(update_fields=['total', 'search_text'])
         if touched_client_ids:
             recalc_account_totals(list(touched_client_ids))
+            request_salary_sync(EmployeeMovement.Source.ACCOUNT_CURRENT)
 
     if pending_count:
         warnings.append(f'{pending_count} vales con cliente sin vincular: quedaron pendientes de revision.')
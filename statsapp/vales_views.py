@@ -3,8 +3,7 @@ from time import perf_counter
 from decimal import Decimal
 
 from django.db import connection
-from django.db.models import CharField, Count, Max, Q
-from django.db.models.functions import Cast
+from django.db.models import Max
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -28,7 +27,9 @@ from .vales_services import (
     serialize_vale_item,
     suggest_clients,
     update_vale_batch_date,
+    vale_batch_aggregates,
 )
+from .search import search_filter
 
 logger = logging.getLogger(__name__)
 
@@ -81,8 +82,7 @@ def clientes_list(request):
 
     qs = AccountClient.objects.all().order_by('last_name', 'first_name')
     if search:
-        for token in search.split():
-            qs = qs.filter(Q(first_name__icontains=token) | Q(last_name__icontains=token) | Q(external_id__icontains=token))
+        qs = search_filter(qs, search, rank=True).order_by('-search_rank', 'last_name', 'first_name')
 
     total = qs.count()
     offset = (page - 1) * page_size
@@ -236,38 +236,17 @@ def vales_lotes(request):
     fecha_desde = parse_client_date(request.query_params.get('fecha_desde') or request.query_params.get('date_from'))
     fecha_hasta = parse_client_date(request.query_params.get('fecha_hasta') or request.query_params.get('date_to'))
 
-    qs = (
-        ValeImportBatch.objects
-        .select_related('uploaded_by')
-        .annotate(source_text=Cast('source_filenames', output_field=CharField()))
-    )
+    qs = ValeImportBatch.objects.select_related('uploaded_by')
 
     if search:
-        for token in search.split():
-            qs = qs.filter(
-                Q(lote_id__icontains=token)
-                | Q(source_text__icontains=token)
-                | Q(uploaded_by__username__icontains=token)
-                | Q(uploaded_by__first_name__icontains=token)
-                | Q(uploaded_by__last_name__icontains=token)
-                | Q(items__client_raw__icontains=token)
-                | Q(items__detail__icontains=token)
-                | Q(items__client__first_name__icontains=token)
-                | Q(items__client__last_name__icontains=token)
-            )
+        qs = search_filter(qs, search)
 
     if fecha_desde:
         qs = qs.filter(date__gte=fecha_desde)
     if fecha_hasta:
         qs = qs.filter(date__lte=fecha_hasta)
 
-    qs = (
-        qs.distinct()
-        .annotate(
-            vales_count=Count('items', distinct=True),
-            pendientes_count=Count('items', filter=Q(items__pending_review=True), distinct=True),
-        )
-    )
+    qs = qs.annotate(**vale_batch_aggregates('items__'))
 
     if estado in {'pendiente', 'pendientes', 'pending'}:
         qs = qs.filter(pendientes_count__gt=0)
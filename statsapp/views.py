@@ -1,3 +1,5 @@
+import base64
+import binascii
 import json
 from decimal import Decimal
 from datetime import date, datetime
@@ -22,14 +24,21 @@ from .models import (
     BankUploadBatch,
     BankTransaction,
     AccountClient,
+    AccountClientBranchBalance,
     AccountTransaction,
     SalesManualEntry,
     ExpenseCategory,
     ExpenseSubcategory,
     ExpenseEntry,
     BankExpenseAssignment,
+    EmployeeMovement,
 )
-from .text_utils import normalize_search_text
+from .text_utils import mentions_getnet, normalize_search_text
+from .account_services import branch_balance_totals, recalc_account_totals
+from .request_metrics import endpoint_stats, reset_endpoint_stats
+from .search import search_filter
+from .salary_sync import request_salary_sync
+from .vales_services import refresh_client_vale_search
 
 SPANISH_MONTHS = [
     'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
@@ -101,6 +110,15 @@ def _format_spanish_day(date_obj):
     return f"{weekday}, {date_obj.day} de {month} de {date_obj.year}".capitalize()
 
 
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    if request.method == 'DELETE':
+        reset_endpoint_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({'endpoints': endpoint_stats()})
+
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def upload_csv(request):
@@ -657,13 +675,15 @@ def upload_bank_file(request):
             raw_details = row.get('raw_details') or ''
             if raw_details and not existing.raw_details:
                 existing.raw_details = raw_details
+                existing.updated_at = timezone.now()
                 enriched_duplicates.append(existing)
             duplicate_count += 1
             continue
         unique_rows.append(row)
 
     if enriched_duplicates:
-        BankTransaction.objects.bulk_update(enriched_duplicates, ['raw_details'], batch_size=1000)
+        BankTransaction.objects.bulk_update(enriched_duplicates, ['raw_details', 'updated_at'], batch_size=1000)
+        request_salary_sync(EmployeeMovement.Source.BANK_TRANSFER)
 
     if not unique_rows:
         return Response({
@@ -701,10 +721,12 @@ def upload_bank_file(request):
             description=row.get('description') or '',
             raw_details=row.get('raw_details') or '',
             amount=row.get('amount') or 0.0,
+            is_getnet=mentions_getnet(row.get('concept'), row.get('description')),
         )
         for row in unique_rows
     ]
     BankTransaction.objects.bulk_create(txs, batch_size=1000)
+    request_salary_sync(EmployeeMovement.Source.BANK_TRANSFER)
 
     ingresos = sum(row['amount'] for row in unique_rows if row['amount'] > 0)
     egresos = sum(row['amount'] for row in unique_rows if row['amount'] < 0)
@@ -1000,7 +1022,10 @@ def expense_categories(request):
         deleted, _ = ExpenseSubcategory.objects.filter(category__name=category, name=subcategory).delete()
         if not deleted:
             return Response({'detail': 'Subcategoria no encontrada'}, status=status.HTTP_404_NOT_FOUND)
-        ExpenseEntry.objects.filter(category=category, subcategory=subcategory).update(subcategory='')
+        ExpenseEntry.objects.filter(category=category, subcategory=subcategory).update(
+            subcategory='',
+            updated_at=timezone.now(),
+        )
         BankExpenseAssignment.objects.filter(category=category, subcategory=subcategory).update(subcategory='')
         return Response({'detail': 'Subcategoria eliminada'})
 
@@ -1164,6 +1189,8 @@ def expenses_import(request):
             )
             updated_assignments += 1
 
+    if created_expenses or updated_expenses:
+        request_salary_sync(EmployeeMovement.Source.CASH_EXPENSE)
     return Response({
         'categories_created': created_categories,
         'subcategories_created': created_subcategories,
@@ -1253,49 +1280,7 @@ def _normalize_account_tx_status(value, *, original_amount=None, paid_amount=Non
 
 
 def _recalc_account_totals(client_ids=None):
-    qs = AccountTransaction.objects.all()
-    if client_ids is not None:
-        qs = qs.filter(client_id__in=client_ids)
-
-    pending_expr = ExpressionWrapper(
-        F('original_amount') - F('paid_amount'),
-        output_field=DecimalField(max_digits=14, decimal_places=2),
-    )
-
-    summary = qs.values('client_id').annotate(
-        pending=Sum(
-            Case(
-                When(original_amount__gt=F('paid_amount'), then=pending_expr),
-                default=Value(Decimal('0')),
-                output_field=DecimalField(max_digits=14, decimal_places=2),
-            )
-        ),
-        overdue=Count('id', filter=Q(status=AccountTransaction.Status.OVERDUE, original_amount__gt=F('paid_amount'))),
-        partial=Count('id', filter=Q(status=AccountTransaction.Status.PARTIAL, original_amount__gt=F('paid_amount'))),
-    )
-
-    updated_ids = set()
-    for row in summary:
-        client_id = row['client_id']
-        pending = row['pending'] or Decimal('0')
-        status_value = AccountClient.Status.PAID
-        if pending > Decimal('0'):
-            if row['overdue']:
-                status_value = AccountClient.Status.OVERDUE
-            elif row['partial']:
-                status_value = AccountClient.Status.PARTIAL
-            else:
-                status_value = AccountClient.Status.ACTIVE
-        AccountClient.objects.filter(id=client_id).update(total_debt=pending, status=status_value)
-        updated_ids.add(client_id)
-
-    if client_ids is None:
-        remaining_qs = AccountClient.objects.exclude(id__in=updated_ids)
-    else:
-        missing_ids = set(client_ids) - updated_ids
-        remaining_qs = AccountClient.objects.filter(id__in=missing_ids)
-    if remaining_qs.exists():
-        remaining_qs.update(total_debt=Decimal('0'), status=AccountClient.Status.PAID)
+    recalc_account_totals(client_ids)
 
 
 def _serialize_account_client(client, branch_id=None):
@@ -1313,6 +1298,7 @@ def _serialize_account_client(client, branch_id=None):
         'status_label': client.get_status_display(),
         'total_debt': float(client.total_debt or 0),
         'branch_total_debt': float(branch_total or 0) if branch_id else None,
+        'branch_status': getattr(client, 'branch_status', None) if branch_id else None,
     }
 
 
@@ -1368,6 +1354,7 @@ def upload_account_clients(request):
     to_create = []
     to_update = []
     touched_clients = set()
+    renamed_clients = set()
     for row in normalized_clients:
         external_id = row['external_id']
         if external_id in existing_map:
@@ -1376,9 +1363,11 @@ def upload_account_clients(request):
             if client.first_name != row['first_name']:
                 client.first_name = row['first_name']
                 changed = True
+                renamed_clients.add(client.id)
             if client.last_name != row['last_name']:
                 client.last_name = row['last_name']
                 changed = True
+                renamed_clients.add(client.id)
             if row['source_created_at'] and client.source_created_at != row['source_created_at']:
                 client.source_created_at = row['source_created_at']
                 changed = True
@@ -1404,6 +1393,8 @@ def upload_account_clients(request):
             touched_clients.update(client.id for client in to_create)
         if to_update:
             AccountClient.objects.bulk_update(to_update, ['first_name', 'last_name', 'source_created_at', 'phone'], batch_size=1000)
+        if renamed_clients:
+            refresh_client_vale_search(renamed_clients)
 
         client_map = {
             client.external_id: client
@@ -1502,15 +1493,23 @@ def upload_account_clients(request):
         if tx_to_create:
             AccountTransaction.objects.bulk_create(tx_to_create, batch_size=1000)
         if tx_to_update:
+            now = timezone.now()
+            for obj in tx_to_update:
+                obj.updated_at = now
             AccountTransaction.objects.bulk_update(
                 tx_to_update,
-                ['client', 'branch', 'description', 'status', 'date', 'created_at', 'original_amount', 'paid_amount', 'payments'],
+                [
+                    'client', 'branch', 'description', 'status', 'date', 'created_at',
+                    'original_amount', 'paid_amount', 'payments', 'updated_at',
+                ],
                 batch_size=500,
             )
 
         touched_clients.update(clients_to_recalc)
         if touched_clients:
             _recalc_account_totals(list(touched_clients))
+        if tx_to_create or tx_to_update:
+            request_salary_sync(EmployeeMovement.Source.ACCOUNT_CURRENT)
 
     return Response({
         'detail': 'Datos de cuentas procesados correctamente',
@@ -1524,6 +1523,41 @@ def upload_account_clients(request):
     })
 
 
+ACCOUNT_CLIENT_ORDERINGS = {
+    'last_name': ('last_name', 'first_name', 'id'),
+    '-last_name': ('-last_name', '-first_name', '-id'),
+    'debt': ('-total_debt', 'id'),
+}
+
+
+def _encode_cursor(obj, fields):
+    values = [str(getattr(obj, field.lstrip('-'))) for field in fields]
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(raw):
+    if not raw:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _keyset_filter(fields, values):
+    """Filtro "posterior a" para paginar por cursor sobre un orden lexicografico de varias columnas."""
+    condition = Q()
+    for idx, field in enumerate(fields):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[idx]})
+        for prev_field, prev_value in zip(fields[:idx], values[:idx]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAdminUser])
 def list_account_clients(request):
@@ -1548,68 +1582,60 @@ def list_account_clients(request):
 
     search = (request.query_params.get('search') or '').strip()
     ordering = (request.query_params.get('ordering') or 'last_name').strip()
+    if ordering not in ACCOUNT_CLIENT_ORDERINGS:
+        ordering = 'last_name'
     status_filter = request.query_params.get('status')
     branch_id = _branch_id_from_params(request.query_params)
     limit = min(max(_safe_int(request.query_params.get('limit', 15), 15), 1), 200)
     offset = max(_safe_int(request.query_params.get('offset', 0), 0), 0)
+    cursor = _decode_cursor(request.query_params.get('cursor'))
 
     qs = AccountClient.objects.all()
     if branch_id:
-        pending_expr = ExpressionWrapper(
-            F('transactions__original_amount') - F('transactions__paid_amount'),
-            output_field=DecimalField(max_digits=14, decimal_places=2),
+        # El saldo por sucursal sale de la tabla materializada: un join 1 a 1, sin agrupar transacciones.
+        qs = qs.filter(branch_balances__branch_id=branch_id).annotate(
+            branch_total_debt=F('branch_balances__total_debt'),
+            branch_status=F('branch_balances__status'),
         )
-        qs = qs.filter(transactions__branch_id=branch_id).annotate(
-            branch_total_debt=Coalesce(Sum(
-                Case(
-                    When(
-                        transactions__branch_id=branch_id,
-                        transactions__original_amount__gt=F('transactions__paid_amount'),
-                        then=pending_expr,
-                    ),
-                    default=Value(Decimal('0')),
-                    output_field=DecimalField(max_digits=14, decimal_places=2),
-                )
-            ), Decimal('0'))
-        ).distinct()
 
     if search:
-        tokens = [token for token in search.split() if token]
-        for token in tokens:
-            qs = qs.filter(
-                Q(first_name__icontains=token) |
-                Q(last_name__icontains=token) |
-                Q(external_id__icontains=token)
-            )
+        qs = search_filter(qs, search)
 
+    status_field = 'branch_status' if branch_id else 'status'
     if status_filter and status_filter != 'all':
-        qs = qs.filter(status=status_filter)
-
-    ordering_map = {
-        'last_name': ('last_name', 'first_name'),
-        '-last_name': ('-last_name', '-first_name'),
-        'debt': ('-branch_total_debt', 'last_name') if branch_id else ('-total_debt', 'last_name'),
-    }
-    qs = qs.order_by(*ordering_map.get(ordering, ordering_map['last_name']))
+        qs = qs.filter(**{status_field: status_filter})
 
     total = qs.count()
-    clients = list(qs[offset:offset + limit])
+    fields = ACCOUNT_CLIENT_ORDERINGS[ordering]
+    if ordering == 'debt' and branch_id:
+        fields = ('-branch_total_debt', 'id')
+    qs = qs.order_by(*fields)
+
+    if cursor is not None and len(cursor) == len(fields):
+        qs = qs.filter(_keyset_filter(fields, cursor))
+        page = list(qs[:limit + 1])
+    else:
+        page = list(qs[offset:offset + limit + 1])
+    has_more = len(page) > limit
+    clients = page[:limit]
     results = [_serialize_account_client(client, branch_id=branch_id) for client in clients]
+    next_cursor = _encode_cursor(clients[-1], fields) if has_more else None
 
     status_counts = {choice.value: 0 for choice in AccountClient.Status}
-    counts_qs = AccountClient.objects.all()
     if branch_id:
-        counts_qs = counts_qs.filter(transactions__branch_id=branch_id).distinct()
-    total_clients = counts_qs.count()
-    for row in counts_qs.values('status').annotate(total=Count('id', distinct=True)):
+        counts_qs = AccountClientBranchBalance.objects.filter(branch_id=branch_id)
+    else:
+        counts_qs = AccountClient.objects.all()
+    for row in counts_qs.values('status').annotate(total=Count('id')).order_by():
         status_counts[row['status']] = row['total']
-    status_counts['all'] = total_clients
+    status_counts['all'] = sum(status_counts.values())
 
     return Response({
         'results': results,
         'count': total,
         'limit': limit,
         'offset': offset,
+        'next_cursor': next_cursor,
         'summary': status_counts,
     })
 
@@ -1632,14 +1658,11 @@ def _serialize_transactions(qs):
     return data
 
 
-def _account_transaction_totals(client, branch_id=None):
-    qs = client.transactions.all()
-    if branch_id:
-        qs = qs.filter(branch_id=branch_id)
-    totals = qs.aggregate(
-        original=Coalesce(Sum('original_amount'), Decimal('0')),
-        paid=Coalesce(Sum('paid_amount'), Decimal('0')),
-        remaining=Coalesce(Sum(
+def _account_totals_aggregates():
+    return {
+        'original': Coalesce(Sum('original_amount'), Decimal('0')),
+        'paid': Coalesce(Sum('paid_amount'), Decimal('0')),
+        'remaining': Coalesce(Sum(
             Case(
                 When(original_amount__gt=F('paid_amount'), then=ExpressionWrapper(
                     F('original_amount') - F('paid_amount'),
@@ -1649,14 +1672,23 @@ def _account_transaction_totals(client, branch_id=None):
                 output_field=DecimalField(max_digits=14, decimal_places=2),
             )
         ), Decimal('0')),
-    )
-    return {
-        'original': float(totals['original']),
-        'paid': float(totals['paid']),
-        'remaining': float(totals['remaining']),
     }
 
 
+def _float_totals(row, keys=('original', 'paid', 'remaining')):
+    return {key: float(row[key] or 0) for key in keys}
+
+
+def _account_transaction_totals(client, branch_id=None):
+    qs = client.transactions.all()
+    if branch_id:
+        totals = branch_balance_totals(client, branch_id)
+        if totals is not None:
+            return totals
+        qs = qs.filter(branch_id=branch_id)
+    return _float_totals(qs.aggregate(**_account_totals_aggregates()))
+
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def account_clients_stats(request):
@@ -1668,7 +1700,6 @@ def account_clients_stats(request):
     branch_id = _branch_id_from_params(request.query_params)
     qs = (
         AccountTransaction.objects
-        .select_related('client')
         .annotate(generated_date=Coalesce('date', TruncDate('created_at')))
         .filter(generated_date__isnull=False)
     )
@@ -1684,92 +1715,108 @@ def account_clients_stats(request):
         qs = qs.filter(generated_date__day=day)
     if branch_id:
         qs = qs.filter(branch_id=branch_id)
-    qs = qs.order_by('-generated_date', '-created_at')
 
-    months = OrderedDict()
+    page = max(_safe_int(request.query_params.get('page', 1), 1), 1)
+    page_size = min(max(_safe_int(request.query_params.get('page_size', 4), 4), 1), 12)
 
-    year_totals = {'original': Decimal('0'), 'remaining': Decimal('0')}
-    client_totals = defaultdict(lambda: Decimal('0'))
+    # Totales agrupados en la base: una fila por mes, el detalle solo para la pagina pedida.
+    month_rows = list(
+        qs.values(stat_year=ExtractYear('generated_date'), stat_month=ExtractMonth('generated_date'))
+        .annotate(**_account_totals_aggregates())
+        .order_by('-stat_year', '-stat_month')
+    )
+    total_months = len(month_rows)
+    start_idx = (page - 1) * page_size
+    page_rows = month_rows[start_idx:start_idx + page_size]
 
-    for tx in qs:
-        stat_date = tx.generated_date
-        if not stat_date:
-            continue
-        month_key = stat_date.strftime('%Y-%m')
-        month_label = _format_spanish_month(stat_date)
-        month_entry = months.setdefault(month_key, {
+    months = OrderedDict()
+    for row in page_rows:
+        month_start = date(row['stat_year'], row['stat_month'], 1)
+        month_key = month_start.strftime('%Y-%m')
+        months[month_key] = {
             'month': month_key,
-            'month_label': month_label,
-            'totals': {'original': Decimal('0'), 'paid': Decimal('0'), 'remaining': Decimal('0')},
+            'month_label': _format_spanish_month(month_start),
+            'totals': _float_totals(row),
             'days': OrderedDict(),
-        })
-
-        remaining = tx.remaining_amount
-        month_entry['totals']['original'] += tx.original_amount or Decimal('0')
-        month_entry['totals']['paid'] += tx.paid_amount or Decimal('0')
-        month_entry['totals']['remaining'] += remaining
-
-        day_key = stat_date.strftime('%Y-%m-%d')
-        day_label = _format_spanish_day(stat_date)
-        day_entry = month_entry['days'].setdefault(day_key, {
-            'date': day_key,
-            'label': day_label,
-            'totals': {'original': Decimal('0'), 'paid': Decimal('0'), 'remaining': Decimal('0')},
-            'transactions': [],
-        })
-
-        day_entry['totals']['original'] += tx.original_amount or Decimal('0')
-        day_entry['totals']['paid'] += tx.paid_amount or Decimal('0')
-        day_entry['totals']['remaining'] += remaining
-
-        day_entry['transactions'].append({
-            'client': tx.client.full_name if tx.client else '',
-            'description': tx.description or '',
-            'original': float(tx.original_amount or 0),
-            'paid': float(tx.paid_amount or 0),
-            'remaining': float(remaining),
-            'status': tx.status,
-            'transaction_date': tx.date.isoformat() if tx.date else None,
-            'generated_date': stat_date.isoformat(),
-        })
+        }
 
-        year_totals['original'] += tx.original_amount or Decimal('0')
-        year_totals['remaining'] += remaining
-        if tx.client:
-            client_totals[tx.client.full_name] += tx.original_amount or Decimal('0')
+    if page_rows:
+        last = page_rows[0]
+        first = page_rows[-1]
+        range_start = date(first['stat_year'], first['stat_month'], 1)
+        range_end = date(
+            last['stat_year'] + (last['stat_month'] // 12),
+            last['stat_month'] % 12 + 1,
+            1,
+        )
+        page_qs = qs.filter(generated_date__gte=range_start, generated_date__lt=range_end)
 
-    page = max(_safe_int(request.query_params.get('page', 1), 1), 1)
-    page_size = min(max(_safe_int(request.query_params.get('page_size', 4), 4), 1), 12)
+        day_rows = (
+            page_qs.values('generated_date')
+            .annotate(**_account_totals_aggregates())
+            .order_by('-generated_date')
+        )
+        for row in day_rows:
+            stat_date = row['generated_date']
+            day_key = stat_date.strftime('%Y-%m-%d')
+            months[stat_date.strftime('%Y-%m')]['days'][day_key] = {
+                'date': day_key,
+                'label': _format_spanish_day(stat_date),
+                'totals': _float_totals(row),
+                'transactions': [],
+            }
 
-    response = []
-    for month in months.values():
-        month['totals'] = {k: float(v) for k, v in month['totals'].items()}
-        days_list = []
-        for day in month['days'].values():
-            day['totals'] = {k: float(v) for k, v in day['totals'].items()}
-            days_list.append(day)
-        month['days'] = days_list
-        response.append(month)
-
-    total_months = len(response)
-    start_idx = (page - 1) * page_size
-    end_idx = start_idx + page_size
-    paginated = response[start_idx:end_idx]
+        tx_rows = (
+            page_qs.select_related('client')
+            .only(
+                'date', 'created_at', 'description', 'original_amount', 'paid_amount', 'status',
+                'client__first_name', 'client__last_name',
+            )
+            .order_by('-generated_date', '-created_at')
+        )
+        for tx in tx_rows.iterator(chunk_size=2000):
+            stat_date = tx.generated_date
+            day_entry = months[stat_date.strftime('%Y-%m')]['days'][stat_date.strftime('%Y-%m-%d')]
+            day_entry['transactions'].append({
+                'client': tx.client.full_name if tx.client else '',
+                'description': tx.description or '',
+                'original': float(tx.original_amount or 0),
+                'paid': float(tx.paid_amount or 0),
+                'remaining': float(tx.remaining_amount),
+                'status': tx.status,
+                'transaction_date': tx.date.isoformat() if tx.date else None,
+                'generated_date': stat_date.isoformat(),
+            })
 
-    top_clients = sorted(client_totals.items(), key=lambda x: x[1], reverse=True)[:8]
+    results = []
+    for month_entry in months.values():
+        month_entry['days'] = list(month_entry['days'].values())
+        results.append(month_entry)
+
+    year_totals = qs.aggregate(**_account_totals_aggregates())
+    top_clients = (
+        qs.filter(client__isnull=False)
+        .values('client_id', 'client__last_name', 'client__first_name', 'client__external_id')
+        .annotate(original=Coalesce(Sum('original_amount'), Decimal('0')))
+        .order_by('-original', 'client__last_name', 'client__first_name', 'client_id')[:8]
+    )
 
     return Response({
-        'results': paginated,
+        'results': results,
         'total_months': total_months,
         'page': page,
         'page_size': page_size,
-        'year_totals': {
-            'original': float(year_totals['original']),
-            'remaining': float(year_totals['remaining']),
-        },
+        'year_totals': _float_totals(year_totals, keys=('original', 'remaining')),
         'top_clients': [
-            {'client': name, 'original': float(total)}
-            for name, total in top_clients
+            {
+                'client': AccountClient(
+                    first_name=row['client__first_name'],
+                    last_name=row['client__last_name'],
+                    external_id=row['client__external_id'],
+                ).full_name,
+                'original': float(row['original']),
+            }
+            for row in top_clients
         ],
     })
 
@@ -1817,6 +1864,8 @@ def account_client_view(request, pk):
                 updated_fields.append('status')
         if updated_fields:
             client.save(update_fields=updated_fields + ['updated_at'])
+            if {'first_name', 'last_name'} & set(updated_fields):
+                refresh_client_vale_search([client.id])
         return Response(_serialize_account_client(client))
 
     # DELETE
@@ -1977,20 +2026,20 @@ def account_transaction_create(request, pk):
     if AccountTransaction.objects.filter(external_id=external_id).exists():
         external_id = uuid4().hex
 
-    new_tx = AccountTransaction.objects.create(
-        client=client,
-        branch=branch,
-        external_id=external_id,
-        description=description,
-        date=tx_date,
-        created_at=timezone.now(),
-        original_amount=amount,
-        paid_amount=Decimal('0'),
-        status=status_value,
-        payments=[],
-    )
-
-    _recalc_account_totals([client.id])
+    with db_transaction.atomic():
+        new_tx = AccountTransaction.objects.create(
+            client=client,
+            branch=branch,
+            external_id=external_id,
+            description=description,
+            date=tx_date,
+            created_at=timezone.now(),
+            original_amount=amount,
+            paid_amount=Decimal('0'),
+            status=status_value,
+            payments=[],
+        )
+        _recalc_account_totals([client.id])
     client.refresh_from_db()
 
     return Response({
@@ -2006,8 +2055,9 @@ def account_transaction_create(request, pk):
 def account_transaction_delete(request, external_id):
     tx = get_object_or_404(AccountTransaction, external_id=external_id)
     client_id = tx.client_id
-    tx.delete()
-    _recalc_account_totals([client_id])
+    with db_transaction.atomic():
+        tx.delete()
+        _recalc_account_totals([client_id])
     client = AccountClient.objects.filter(pk=client_id).first()
     return Response({
         'detail': 'Movimiento eliminado correctamente',